@@ -1,10 +1,12 @@
-from flask import Flask
+from flask import Flask, g, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
+from db_routing import DATABASE_REPLICA_URL, REPLICA, RoutingSession, database_url, engine_options, remember_writes
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import time
 import logging
 
 # Define base for models
@@ -12,7 +14,7 @@ class Base(DeclarativeBase):
     pass
 
 # Initialize extensions
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 migrate = Migrate()
 
 # Create app
@@ -20,26 +22,22 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "fallback-secret-key")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Configure database
-db_url = os.getenv("DATABASE_URL")
+# Request profiling is off unless configured, and then the middleware is not installed at all
+from profiler import PROFILING_ENABLED, ProfilerMiddleware, profile_async_views
+if PROFILING_ENABLED:
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app)
+    # Async views run on an event loop and in to_thread workers; follow the request there
+    app.async_to_sync = profile_async_views(app.async_to_sync)
 
-# Fix postgres:// vs postgresql:// for SQLAlchemy
-if db_url and db_url.startswith("postgres://"):
-    db_url = db_url.replace("postgres://", "postgresql://", 1)
-
-# Force SSL for Render PostgreSQL
-if db_url and "sslmode" not in db_url:
-    if "?" in db_url:
-        db_url = db_url + "&sslmode=require"
-    else:
-        db_url = db_url + "?sslmode=require"
+# Configure database; pool profiles, pool metrics and replica routing live in db_routing
+db_url = database_url(os.getenv("DATABASE_URL"))
 
 app.config["SQLALCHEMY_DATABASE_URI"] = db_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(db_url, 'primary')
+if DATABASE_REPLICA_URL:
+    replica_url = database_url(DATABASE_REPLICA_URL)
+    app.config["SQLALCHEMY_BINDS"] = {REPLICA: {"url": replica_url, **engine_options(replica_url, REPLICA)}}
 logging.basicConfig(level=logging.DEBUG)
 
 # Attach app to extensions
@@ -52,10 +50,32 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
+# Fingerprinted static assets and HTML compression; see asset_service
+from asset_service import asset_url, compress_html
+app.jinja_env.globals['asset_url'] = asset_url
+app.after_request(compress_html)
+app.after_request(remember_writes)
+
+# Request latency per endpoint; stage timings are recorded where the work happens
+from metrics import observe, timed
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.teardown_request
+def record_request_time(exc):
+    started = g.pop('request_started', None)
+    if started is not None:
+        observe('http_request_seconds', time.perf_counter() - started,
+                endpoint=request.endpoint or 'unmatched', method=request.method)
+
 @login_manager.user_loader
+@timed('load_user_seconds')
 def load_user(user_id):
-    from models import User
-    return User.query.get(int(user_id))
+    # Served from a short-lived per-worker cache; see identity_cache
+    from identity_cache import load_cached_user
+    return load_cached_user(int(user_id))
 
 # ✅ Import models
 import models  # now SQLAlchemy knows about your tables
@@ -65,6 +85,9 @@ import routes
 with app.app_context():
     db.create_all()
 
+    from scheduling_service import ensure_default_practitioner
+    ensure_default_practitioner()
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
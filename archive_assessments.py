@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Maintain the monthly assessment partitions on PostgreSQL
+Creates upcoming partitions (and partitions for any rows that landed in the default
+partition because the job did not run for a while), then moves every partition older than
+the retention window into a gzip file under ARCHIVE_DIR and drops it; /result/<id> keeps
+reading archived rows. Also deletes quiz submission claims past SUBMISSION_RETENTION_HOURS
+and summary_blob rows no assessment references any more (on any database).
+Run daily from cron; each partition is archived in its own transaction
+
+    python archive_assessments.py --dry-run
+    python archive_assessments.py --retention-months 18
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+
+
+def parse_args():
+    from archive_service import ASSESSMENT_RETENTION_MONTHS, PARTITION_MONTHS_AHEAD
+    from submission_service import SUBMISSION_RETENTION_HOURS
+    parser = argparse.ArgumentParser(description="Create upcoming assessment partitions and archive old ones")
+    parser.add_argument('--retention-months', type=int, default=ASSESSMENT_RETENTION_MONTHS,
+                        help=f'months kept in the database (default {ASSESSMENT_RETENTION_MONTHS})')
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help=f'future partitions to keep ready (default {PARTITION_MONTHS_AHEAD})')
+    parser.add_argument('--limit', type=int, help='archive at most this many partitions this run')
+    parser.add_argument('--submission-retention-hours', type=float, default=SUBMISSION_RETENTION_HOURS,
+                        help=f'hours quiz submission claims are kept (default {SUBMISSION_RETENTION_HOURS:g})')
+    parser.add_argument('--dry-run', action='store_true', help='report what would happen without changing anything')
+    return parser.parse_args()
+
+
+def maintain_partitions(args, db):
+    """Create upcoming partitions and archive the ones past the retention window"""
+    from archive_service import (DEFAULT_PARTITION, add_months, archive_partition, default_partition_rows,
+                                 ensure_partitions, is_partitioned, list_partitions, month_start)
+
+    with db.engine.connect() as connection:
+        if not is_partitioned(connection):
+            print("assessment is not partitioned (needs PostgreSQL after `flask db upgrade`); "
+                  "nothing to archive")
+            return
+
+    cutoff = add_months(month_start(datetime.utcnow()), -args.retention_months)
+    if args.dry_run:
+        with db.engine.connect() as connection:
+            partitions = list_partitions(connection)
+            stray = default_partition_rows(connection)
+        print(f"{len(partitions)} partitions attached; archiving those before {cutoff:%Y-%m}")
+        for name, month in partitions:
+            print(f"  {name}: {'archive' if month < cutoff else 'keep'}")
+        for month, count in stray:
+            print(f"  {DEFAULT_PARTITION}: {count} rows for {month:%Y-%m} would move to their own partition")
+        return
+
+    with db.engine.begin() as connection:
+        created = ensure_partitions(connection, args.months_ahead)
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+
+    with db.engine.connect() as connection:
+        due = [(name, month) for name, month in list_partitions(connection) if month < cutoff]
+    for name, month in due[:args.limit]:
+        began = time.perf_counter()
+        with db.engine.begin() as connection:
+            written = archive_partition(connection, name, month)
+        print(f"Archived {name}: {written['row_count']} rows in {time.perf_counter() - began:.1f}s")
+    if not due:
+        print(f"Nothing older than {cutoff:%Y-%m} to archive")
+
+
+def main():
+    from app import app, db
+    from submission_service import purge_submissions
+    from summary_store import purge_unreferenced_blobs
+
+    args = parse_args()
+    logging.getLogger().setLevel(logging.INFO)
+    with app.app_context():
+        purged = purge_submissions(args.submission_retention_hours, dry_run=args.dry_run)
+        print(f"{'Would delete' if args.dry_run else 'Deleted'} {purged} quiz submission claims older than "
+              f"{args.submission_retention_hours:g}h")
+
+        maintain_partitions(args, db)
+
+        # Archived assessments (and regenerated summaries) leave summary_blob rows nothing uses
+        swept = purge_unreferenced_blobs(dry_run=args.dry_run)
+        print(f"{'Would delete' if args.dry_run else 'Deleted'} {swept} unreferenced summary blobs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Archive Service for MindMetric AI
+Monthly range partitions of the assessment table on PostgreSQL, archival of old
+partitions to gzip files, and read-back of archived assessments by id
+"""
+import bisect
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import select, text
+from models import Assessment, ArchivedPartition
+from summary_store import decompress, make_blob
+
+# Archived partitions are written here; every app worker must be able to read it
+ARCHIVE_DIR = os.environ.get("ARCHIVE_DIR", "archive")
+
+# Partitions whose whole month is older than this many months get archived
+ASSESSMENT_RETENTION_MONTHS = int(os.environ.get("ASSESSMENT_RETENTION_MONTHS", "24"))
+
+# Future monthly partitions kept ready, so new rows never land in the default partition
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PARTITION_MONTHS_AHEAD", "3"))
+
+# Rows per gzip member in an archive file; one member is decompressed per lookup
+ARCHIVE_BLOCK_ROWS = int(os.environ.get("ARCHIVE_BLOCK_ROWS", "500"))
+
+PARTITION_PATTERN = re.compile(r'^assessment_p(\d{4})_(\d{2})$')
+
+# Created by the partitioning migration; catches rows for months without a partition
+DEFAULT_PARTITION = 'assessment_default'
+
+_lock = threading.Lock()
+_block_indexes = OrderedDict()
+_BLOCK_INDEX_CACHE_SIZE = 64
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"assessment_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(connection):
+    """True when assessment is a partitioned table (PostgreSQL after the partitioning migration)"""
+    if connection.dialect.name != 'postgresql':
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.oid = to_regclass('assessment'))"
+    )).scalar()
+
+
+def list_partitions(connection):
+    """Attached monthly partitions as [(name, month start)], oldest first"""
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('assessment')"
+    )).scalars()
+    partitions = []
+    for name in names:
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def default_partition_rows(connection):
+    """Rows sitting in the default partition as [(month start, row count)], oldest first"""
+    if connection.execute(text(f"SELECT to_regclass('{DEFAULT_PARTITION}')")).scalar() is None:
+        return []
+    return [(month, count) for month, count in connection.execute(text(
+        f"SELECT date_trunc('month', created_at) AS month, count(*) FROM {DEFAULT_PARTITION} "
+        f"GROUP BY month ORDER BY month"
+    ))]
+
+
+def ensure_partitions(connection, months_ahead=PARTITION_MONTHS_AHEAD, now=None):
+    """Create this month's partition and the next months_ahead; returns the names created
+
+    Rows that landed in the default partition (the job did not run for longer than
+    months_ahead) get their own monthly partitions too: PostgreSQL refuses to create a
+    partition whose range the attached default already holds rows for, so the default is
+    detached while they are created and the rows moved, then attached again
+    """
+    month = month_start(now or datetime.utcnow())
+    existing = {name for name, _ in list_partitions(connection)}
+    stray = dict(default_partition_rows(connection))
+    archived = set(connection.execute(select(ArchivedPartition.name)).scalars())
+    for start in [start for start in stray if partition_name(start) in archived]:
+        # A month can only be archived once; these rows need moving by hand
+        logging.error(f"{stray.pop(start)} assessments in {DEFAULT_PARTITION} belong to {start:%Y-%m}, "
+                      f"which is already archived; leaving them there")
+    if stray:
+        logging.warning(f"{sum(stray.values())} assessments are in {DEFAULT_PARTITION} "
+                        f"({', '.join(f'{start:%Y-%m}' for start in sorted(stray))}); "
+                        f"moving them to monthly partitions")
+        connection.execute(text(f"ALTER TABLE assessment DETACH PARTITION {DEFAULT_PARTITION}"))
+    months = sorted(set(stray) | {add_months(month, offset) for offset in range(months_ahead + 1)})
+
+    created = []
+    for start in months:
+        name = partition_name(start)
+        end = add_months(start, 1)
+        if name not in existing:
+            connection.execute(text(
+                f"CREATE TABLE {name} PARTITION OF assessment "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        if start in stray:
+            in_range = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+            connection.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+            connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"))
+
+    if stray:
+        connection.execute(text(f"ALTER TABLE assessment ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return created
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def write_archive(rows, columns, path, block_rows=ARCHIVE_BLOCK_ROWS):
+    """Write rows (ordered by id) as NDJSON in gzip members of block_rows rows each
+
+    The file is an ordinary gzip stream (zcat reads it whole); the returned block index
+    lets a reader seek straight to the member holding a given id
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    digest = hashlib.sha256()
+    blocks = []
+    row_count = 0
+    min_id = max_id = None
+    offset = 0
+    id_position = columns.index('id')
+
+    def write_block(file, lines, first_id):
+        nonlocal offset
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        data = compressor.compress(''.join(lines).encode('utf-8')) + compressor.flush()
+        file.write(data)
+        digest.update(data)
+        blocks.append([first_id, offset, len(data)])
+        offset += len(data)
+
+    with open(tmp_path, 'wb') as file:
+        lines = []
+        first_id = None
+        for row in rows:
+            row_id = row[id_position]
+            if first_id is None:
+                first_id = row_id
+            lines.append(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + '\n')
+            row_count += 1
+            min_id = row_id if min_id is None else min(min_id, row_id)
+            max_id = row_id if max_id is None else max(max_id, row_id)
+            if len(lines) >= block_rows:
+                write_block(file, lines, first_id)
+                lines, first_id = [], None
+        if lines:
+            write_block(file, lines, first_id)
+        file.flush()
+        # The partition is dropped right after this, so the file must really be on disk
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    return {'row_count': row_count, 'min_id': min_id, 'max_id': max_id, 'blocks': blocks,
+            'sha256': digest.hexdigest()}
+
+
+def archive_partition(connection, name, month):
+    """Copy one partition to ARCHIVE_DIR, record it, then detach and drop it (one transaction)"""
+    # Summaries are written out as text, so an archive never depends on summary_blob rows
+    columns = [column.name for column in Assessment.__table__.columns if column.name != 'summary_sha256']
+    path = os.path.join(ARCHIVE_DIR, f"{name}.ndjson.gz")
+    query = text(
+        f"SELECT {', '.join(f'a.{column}' for column in columns)}, b.text_data, b.html_data FROM {name} a "
+        f"LEFT JOIN summary_blob b ON b.sha256 = a.summary_sha256 ORDER BY a.id"
+    ).execution_options(yield_per=5000)
+    rows = (tuple(row[:-2]) + (decompress(row[-2]), decompress(row[-1])) for row in connection.execute(query))
+    written = write_archive(rows, columns + ['gemini_summary', 'gemini_summary_html'], path)
+
+    expected = connection.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    if expected != written['row_count']:
+        raise RuntimeError(f"{name}: wrote {written['row_count']} rows but the partition has {expected}")
+
+    connection.execute(ArchivedPartition.__table__.insert().values(
+        name=name, range_start=month, range_end=add_months(month, 1), path=os.path.abspath(path),
+        row_count=written['row_count'], min_id=written['min_id'], max_id=written['max_id'],
+        block_index=json.dumps(written['blocks']), sha256=written['sha256'], archived_at=datetime.utcnow(),
+    ))
+    connection.execute(text(f"ALTER TABLE assessment DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
+    logging.info(f"Archived {name}: {written['row_count']} rows to {path}")
+    return written
+
+
+def _block_index(record):
+    """Parsed block index of an archive, cached per worker"""
+    with _lock:
+        cached = _block_indexes.get(record.name)
+        if cached is not None:
+            _block_indexes.move_to_end(record.name)
+            return cached
+    blocks = json.loads(record.block_index)
+    cached = ([block[0] for block in blocks], blocks)
+    with _lock:
+        _block_indexes[record.name] = cached
+        while len(_block_indexes) > _BLOCK_INDEX_CACHE_SIZE:
+            _block_indexes.popitem(last=False)
+    return cached
+
+
+def read_archived_row(record, assessment_id):
+    """The row dict for an id from one archive file, or None"""
+    first_ids, blocks = _block_index(record)
+    position = bisect.bisect_right(first_ids, assessment_id) - 1
+    if position < 0:
+        return None
+    _, offset, length = blocks[position]
+    with open(record.path, 'rb') as file:
+        file.seek(offset)
+        data = zlib.decompress(file.read(length), 31)
+    for line in data.splitlines():
+        row = json.loads(line)
+        if row['id'] == assessment_id:
+            return row
+    return None
+
+
+def find_archived_assessment(assessment_id):
+    """A detached Assessment rebuilt from the archive files, or None if it was never archived"""
+    records = ArchivedPartition.query.filter(
+        ArchivedPartition.min_id <= assessment_id, ArchivedPartition.max_id >= assessment_id
+    ).all()
+    for record in records:
+        try:
+            row = read_archived_row(record, assessment_id)
+        except OSError as e:
+            logging.error(f"Cannot read archive {record.path} for assessment {assessment_id}: {e}")
+            continue
+        if row is not None:
+            if row.get('created_at'):
+                row['created_at'] = datetime.fromisoformat(row['created_at'])
+            # Partitions archived before answers were packed carry a 'responses' JSON string
+            known = {column.name for column in Assessment.__table__.columns} | {'responses'}
+            assessment = Assessment(**{key: value for key, value in row.items() if key in known})
+            # Detached like the assessment itself: nothing is written to summary_blob
+            assessment.summary_blob = make_blob(row.get('gemini_summary'), row.get('gemini_summary_html'))
+            return assessment
+    return None
@@ -0,0 +1,126 @@
+"""
+ASGI entry point for MindMetric AI
+Runs alongside main:app (gunicorn) and serves the same Flask app on one event loop:
+    uvicorn asgi:app --workers 4
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from asgiref.sync import async_to_sync, sync_to_async
+from main import app as flask_app
+
+# Threads that run the sync part of each request; async views await on the event loop meanwhile
+ASGI_REQUEST_THREADS = int(os.environ.get("ASGI_REQUEST_THREADS", "64"))
+
+# Kept separate from the loop's default executor, which the views use for asyncio.to_thread,
+# so a full set of waiting requests can never starve their own blocking calls
+_request_executor = ThreadPoolExecutor(max_workers=ASGI_REQUEST_THREADS, thread_name_prefix="asgi-request")
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI http scope and its spooled request body"""
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1")
+        if name == "content-length":
+            key = "CONTENT_LENGTH"
+        elif name == "content-type":
+            key = "CONTENT_TYPE"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        # Repeated headers are joined, as a WSGI server would
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class ConcurrentWsgiToAsgi:
+    """ASGI adapter that runs each request's WSGI call in a thread pool
+
+    Only asgiref's public sync_to_async and async_to_sync are used: the request threads
+    they run on let async views await on this event loop instead of starting their own
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.run_wsgi_app = sync_to_async(self._run_wsgi_app, thread_sensitive=False, executor=_request_executor)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            # Nothing to set up or tear down; acknowledge so uvicorn does not log an error
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise ValueError(f"Cannot serve an ASGI {scope['type']!r} scope with a WSGI app")
+
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            await self.run_wsgi_app(build_environ(scope, body), async_to_sync(send))
+
+    def _run_wsgi_app(self, environ, send):
+        """Call the WSGI app on a request thread and send its response as it is produced"""
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and start.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            start["message"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+            }
+
+        def send_start():
+            if not start.get("sent"):
+                start["sent"] = True
+                send(start["message"])
+
+        iterable = self.wsgi_application(environ, start_response)
+        try:
+            for chunk in iterable:
+                send_start()
+                if chunk:
+                    send({"type": "http.response.body", "body": chunk, "more_body": True})
+            send_start()
+            send({"type": "http.response.body"})
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+
+app = ConcurrentWsgiToAsgi(flask_app)
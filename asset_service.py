@@ -0,0 +1,95 @@
+"""
+Asset Service for MindMetric AI
+Serves fingerprinted, precompressed static files and gzips large HTML responses
+"""
+import gzip
+import json
+import logging
+import mimetypes
+import os
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Fingerprinted files never change under the same name, so browsers may keep them for a year
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+# HTML smaller than this is sent as-is; compressing it costs more than it saves
+HTML_GZIP_MIN_BYTES = int(os.environ.get("HTML_GZIP_MIN_BYTES", "1024"))
+HTML_GZIP_LEVEL = int(os.environ.get("HTML_GZIP_LEVEL", "6"))
+
+# Preferred first: brotli is smaller than gzip for text assets
+ASSET_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = None
+
+
+def load_manifest():
+    """Map source filenames to fingerprinted ones in static/dist; empty until build_assets.py has run"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH, encoding='utf-8') as file:
+                _manifest = json.load(file)
+        except FileNotFoundError:
+            logging.info("No asset manifest found; serving unfingerprinted static files")
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(endpoint, **values):
+    """Drop-in replacement for url_for that points static files at their fingerprinted build"""
+    if endpoint == 'static':
+        hashed = load_manifest().get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+            return url_for('hashed_asset', **values)
+    return url_for(endpoint, **values)
+
+
+def send_asset(filename):
+    """Serve a fingerprinted asset in the smallest encoding the client accepts"""
+    path = safe_join(DIST_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    for encoding, suffix in ASSET_ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            response = send_file(path + suffix, mimetype=mimetype, conditional=True)
+            response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=True)
+
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def compress_html(response):
+    """after_request hook: gzip HTML bodies above the size threshold for clients that accept it"""
+    if (response.is_streamed or response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.mimetype != 'text/html'
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not request.accept_encodings['gzip']:
+        return response
+
+    body = response.get_data()
+    if len(body) < HTML_GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(body, HTML_GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    # The encoded bytes differ from the identity ones, so a strong validator no longer applies
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
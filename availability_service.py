@@ -0,0 +1,120 @@
+"""
+Availability Service for MindMetric AI
+Keeps a per-day bitmap of fully booked session slots for the booking window
+"""
+import os
+import hashlib
+import logging
+import threading
+import time as _time
+from datetime import time, timedelta
+from scheduling_service import booking_window, unavailable_slots
+
+# Bookable hourly slots shown on the booking page (9:00 AM - 5:00 PM)
+SLOT_TIMES = [time(hour, 0) for hour in range(9, 18)]
+
+# How long a worker trusts its bitmaps before re-reading the window.
+# Bookings made in this worker update the bitmaps immediately; the TTL only
+# bounds how long bookings made by other workers can go unnoticed.
+AVAILABILITY_CACHE_TTL = float(os.environ.get("AVAILABILITY_CACHE_TTL", "30"))
+
+_lock = threading.Lock()
+_day_bitmaps = {}
+_window_start = None
+_loaded_at = 0.0
+_etag = None
+
+
+def _load_window(start, end):
+    """Build the bitmaps for the whole window from the scheduler's indexes"""
+    bitmaps = {}
+    day = start
+    while day <= end:
+        bits = unavailable_slots(day, SLOT_TIMES)
+        if bits:
+            bitmaps[day] = bits
+        day += timedelta(days=1)
+    return bitmaps
+
+
+def _compute_etag(start, bitmaps):
+    """Derive a strong ETag from the window start and its bitmaps"""
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(start.isoformat().encode())
+    for day in sorted(bitmaps):
+        digest.update(f"{day.isoformat()}:{bitmaps[day]};".encode())
+    return digest.hexdigest()
+
+
+def _ensure_loaded():
+    """Reload the window when the day rolls over or the TTL expires"""
+    global _day_bitmaps, _window_start, _loaded_at, _etag
+
+    start, end = booking_window()
+    now = _time.monotonic()
+    if _window_start == start and now - _loaded_at < AVAILABILITY_CACHE_TTL:
+        return
+
+    bitmaps = _load_window(start, end)
+    _day_bitmaps = bitmaps
+    _window_start = start
+    _loaded_at = now
+    _etag = None
+    logging.debug(f"Availability window reloaded: {len(bitmaps)} days with unavailable slots")
+
+
+def get_availability():
+    """Return (start, end, taken slots per day, etag) for the booking window"""
+    global _etag
+
+    with _lock:
+        _ensure_loaded()
+        start, end = booking_window()
+        taken = {}
+        for day, bits in _day_bitmaps.items():
+            if start <= day <= end and bits:
+                taken[day] = [slot for index, slot in enumerate(SLOT_TIMES) if bits & (1 << index)]
+        if _etag is None:
+            _etag = _compute_etag(start, _day_bitmaps)
+        return start, end, taken, _etag
+
+
+def availability_payload():
+    """Return the availability data as a JSON-serialisable dict and its ETag"""
+    start, end, taken, etag = get_availability()
+    payload = {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'slots': [slot.strftime('%H:%M') for slot in SLOT_TIMES],
+        'taken': {
+            day.isoformat(): [slot.strftime('%H:%M') for slot in slots]
+            for day, slots in sorted(taken.items())
+        }
+    }
+    return payload, etag
+
+
+def _refresh_day(session_date):
+    """Recompute a single day's bitmap after a booking change"""
+    global _etag
+
+    with _lock:
+        if _window_start is None:
+            # Nothing cached yet; the next read loads the whole window
+            return
+        bits = unavailable_slots(session_date, SLOT_TIMES)
+        if bits:
+            _day_bitmaps[session_date] = bits
+        else:
+            _day_bitmaps.pop(session_date, None)
+        _etag = None
+
+
+def mark_slot_taken(session_date, session_time):
+    """Record a newly committed booking in the cached bitmaps"""
+    _refresh_day(session_date)
+
+
+def mark_slot_released(session_date, session_time):
+    """Record a cancelled booking in the cached bitmaps"""
+    _refresh_day(session_date)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script to pre-render stored Gemini summaries to HTML for MindMetric AI
+Fills summary_blob.html_data in hash-ordered batches, one transaction per batch, so it
+can run against a live database and be stopped and restarted at any point. Each
+distinct summary is rendered once, however many assessments share it
+
+    python backfill_summary_html.py
+    python backfill_summary_html.py --all   # re-render every row after a formatter change
+"""
+import argparse
+import logging
+import time
+from app import app, db
+from models import SummaryBlob
+from summary_formatter import format_summary
+from summary_store import compress, decompress
+
+
+def render(text_data):
+    html = format_summary(decompress(text_data))
+    return compress(html) if html is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the stored HTML of existing summaries")
+    parser.add_argument('--batch-size', type=int, default=2000, help='summaries per transaction')
+    parser.add_argument('--all', action='store_true', help='re-render rows that already have HTML')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    table = SummaryBlob.__table__
+    query = db.select(table.c.sha256, table.c.text_data).where(
+        table.c.sha256 > db.bindparam('after_key')
+    ).order_by(table.c.sha256).limit(args.batch_size)
+    if not args.all:
+        query = query.where(table.c.html_data.is_(None))
+    update = table.update().where(table.c.sha256 == db.bindparam('key')).values(
+        html_data=db.bindparam('html'))
+
+    print("Rendering summary HTML...")
+    began = time.perf_counter()
+    after_key = ''
+    rendered = 0
+    with app.app_context():
+        while True:
+            with db.engine.begin() as connection:
+                rows = connection.execute(query, {'after_key': after_key}).all()
+                if not rows:
+                    break
+                connection.execute(update, [{'key': row.sha256, 'html': render(row.text_data)} for row in rows])
+            after_key = rows[-1].sha256
+            rendered += len(rows)
+            if rendered % (args.batch_size * 25) == 0:
+                print(f"  {rendered:,} rendered ({rendered / (time.perf_counter() - began):,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - began
+    print(f"✓ Rendered {rendered:,} summaries in {elapsed:.1f}s ({rendered / max(elapsed, 1e-9):,.0f} rows/s)")
+    if rendered:
+        print("Bump PAGE_CACHE_VERSION so cached result pages pick up the stored HTML")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Script to build per-user stress trend rollups for MindMetric AI
+Run once after deploying trend tracking, or any time rollups need rebuilding
+"""
+import argparse
+import time
+from app import app
+from trend_service import rebuild_trends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild stress trend rollups from existing assessments")
+    parser.add_argument('--batch-size', type=int, default=1000, help='users per transaction')
+    args = parser.parse_args()
+
+    print("Rebuilding stress trends...")
+    began = time.perf_counter()
+    with app.app_context():
+        try:
+            rebuilt = rebuild_trends(args.batch_size)
+        except RuntimeError as e:
+            raise SystemExit(f"✗ {e}")
+    print(f"✓ Rebuilt trends for {rebuilt} users in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark for concurrent-request capacity per process
+Drives POST /submit_quiz through main:app with a fixed number of worker threads (the
+gunicorn deployment) and through asgi:app with many requests in flight, using simulated
+Gemini and ML latencies so the numbers reflect time spent waiting on I/O
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUIZ_FORM = {f'q{i}': 'C' for i in range(1, 11)}
+QUIZ_FORM.update({f'q{i}': 'Medium' for i in range(11, 16)})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200, help='quiz submissions per run')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='worker threads for the WSGI run (gunicorn --threads)')
+    parser.add_argument('--concurrency', type=int, default=64, help='requests in flight for the ASGI run')
+    parser.add_argument('--gemini-ms', type=float, default=800.0, help='simulated Gemini latency')
+    parser.add_argument('--ml-ms', type=float, default=20.0, help='simulated model inference time')
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_async_bench.db'))
+    return parser.parse_args()
+
+
+def simulate_latency(args):
+    """Replace the Gemini and model calls with sleeps of the configured length"""
+    import routes
+
+    def predict(responses, stress_score):
+        time.sleep(args.ml_ms / 1000)
+        return 'Meditation'
+
+    async def summarize(responses, stress_score, age):
+        await asyncio.sleep(args.gemini_ms / 1000)
+        return 'Simulated summary'
+
+    routes.predict_content_type = predict
+    routes.generate_psychological_summary_async = summarize
+    routes.log_to_csv = lambda *row: None
+
+
+def run_wsgi(app, total, threads):
+    """Submit quizzes from a fixed pool of threads, one request per thread at a time"""
+    remaining = [total]
+    lock = threading.Lock()
+    clients = []
+    for _ in range(threads):
+        client = app.test_client()
+        client.post('/login', data={'email': 'bench@bench.local', 'password': 'bench'})
+        clients.append(client)
+
+    def worker(client):
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    return
+                remaining[0] -= 1
+            response = client.post('/submit_quiz', data=QUIZ_FORM)
+            assert response.status_code == 302, response.status_code
+
+    began = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return total / (time.perf_counter() - began)
+
+
+async def run_asgi(app, total, concurrency):
+    """Submit quizzes over ASGI keeping a fixed number of requests in flight"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await client.post('/login', data={'email': 'bench@bench.local', 'password': 'bench'})
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def submit():
+            async with semaphore:
+                response = await client.post('/submit_quiz', data=QUIZ_FORM)
+                assert response.status_code == 302, response.status_code
+
+        began = time.perf_counter()
+        await asyncio.gather(*(submit() for _ in range(total)))
+        return total / (time.perf_counter() - began)
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from app import app, db
+    from models import User
+    from asgi import app as asgi_app
+    simulate_latency(args)
+
+    with app.app_context():
+        if not User.query.filter_by(email='bench@bench.local').first():
+            from werkzeug.security import generate_password_hash
+            db.session.add(User(name='Bench', age=30, address='-', email='bench@bench.local',
+                                password_hash=generate_password_hash('bench')))
+            db.session.commit()
+
+    wsgi_rps = run_wsgi(app, args.requests, args.threads)
+    asgi_rps = asyncio.run(run_asgi(asgi_app, args.requests, args.concurrency))
+
+    print(f"POST /submit_quiz x{args.requests}, Gemini {args.gemini_ms:.0f} ms, model {args.ml_ms:.0f} ms")
+    print(f"  {'main:app, ' + str(args.threads) + ' threads':>24}: {wsgi_rps:8.1f} req/s")
+    print(f"  {'asgi:app, ' + str(args.concurrency) + ' in flight':>24}: {asgi_rps:8.1f} req/s")
+    print(f"  capacity per process: {asgi_rps / wsgi_rps:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark for streaming exports
+Seeds assessments with seed_data.py (unless --reuse) and streams them through
+/admin/export/assessments, reporting time to first byte, throughput and peak Python
+heap, next to the Assessment.query.all() approach it replaces
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100_000, help='users to seed (10 assessments each)')
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_export_bench.db'))
+    parser.add_argument('--reuse', action='store_true', help='skip seeding if assessments already exist')
+    parser.add_argument('--naive-limit', type=int, default=200_000,
+                        help='rows loaded by the query.all() comparison (0 to skip)')
+    return parser.parse_args()
+
+
+def measure(client, url):
+    """Stream one export; returns (seconds to first byte, total seconds, bytes, peak heap bytes)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(url, buffered=False)
+    first_byte = None
+    size = 0
+    for chunk in response.response:
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    response.close()
+    total = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_byte, total, size, peak
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ['ADMIN_EMAILS'] = 'export-bench@bench.local'
+    import logging
+    from werkzeug.security import generate_password_hash
+    from app import app, db
+    from models import Assessment, User
+    import routes  # noqa: F401
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        existing = db.session.query(Assessment.id).count()
+    if not (args.reuse and existing):
+        subprocess.run([sys.executable, 'seed_data.py', '--users', str(args.users), '--skip-trends'],
+                       cwd=REPO_ROOT, env=dict(os.environ), check=True)
+
+    with app.app_context():
+        rows = db.session.query(Assessment.id).count()
+        if not User.query.filter_by(email='export-bench@bench.local').first():
+            db.session.add(User(name='Export Bench', age=40, address='-', email='export-bench@bench.local',
+                                password_hash=generate_password_hash('bench')))
+            db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'export-bench@bench.local', 'password': 'bench'})
+    print(f"{rows:,} assessments")
+    print(f"{'export':<28} {'first byte ms':>14} {'seconds':>9} {'rows/s':>10} {'MB':>8} {'peak heap MB':>13}")
+    for label, query in (('csv', 'format=csv'), ('csv gzip', 'format=csv&gzip=1'),
+                         ('ndjson', 'format=ndjson'), ('csv 4 columns', 'columns=id,user_id,stress_score,created_at')):
+        first_byte, total, size, peak = measure(client, f'/admin/export/assessments?{query}')
+        print(f"{label:<28} {first_byte * 1000:>14.1f} {total:>9.2f} {rows / total:>10,.0f} {size / 1e6:>8.1f} "
+              f"{peak / 1e6:>13.1f}")
+
+    if args.naive_limit:
+        with app.app_context():
+            tracemalloc.start()
+            started = time.perf_counter()
+            loaded = Assessment.query.limit(args.naive_limit).all()
+            total = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{f'query.all() ({len(loaded):,} rows)':<28} {total * 1000:>14.1f} {total:>9.2f} "
+                  f"{len(loaded) / total:>10,.0f} {'-':>8} {peak / 1e6:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark for assessment history pagination
+Seeds a large assessment table and compares keyset pages against OFFSET pages
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000_000, help='total assessment rows')
+    parser.add_argument('--users', type=int, default=100_000, help='number of users')
+    parser.add_argument('--target-rows', type=int, default=5_000,
+                        help='assessments belonging to the user whose history is paged')
+    parser.add_argument('--summary-bytes', type=int, default=800, help='length of each stored summary')
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_history_bench.db'))
+    parser.add_argument('--reuse', action='store_true', help='skip seeding if the table is already populated')
+    return parser.parse_args()
+
+
+def seed(db, User, Assessment, args):
+    """Bulk insert users and assessments in large batches"""
+    from response_codec import encode_responses
+    from summary_store import store_summary
+    rng = random.Random(42)
+    # Every row shares one summary, which is stored once in summary_blob
+    summary = store_summary(('Your assessment indicates moderate stress levels. ' * 40)[:args.summary_bytes]).sha256
+    db.session.commit()
+    answers = encode_responses({'q1': 'A', 'q2': 'B', 'q3': 'C', 'q4': 'D', 'q5': 'E', 'q6': 'A', 'q7': 'B',
+                                'q8': 'C', 'q9': 'D', 'q10': 'E', 'q11': 'Low', 'q12': 'Medium', 'q13': 'High',
+                                'q14': 'Low', 'q15': 'Medium'})
+    predictions = ['Meditation', 'Music', 'Nature Sounds', 'Guided Breathing', 'Podcasts', 'Professional Therapy']
+    start = datetime(2024, 1, 1)
+    span_seconds = 2 * 365 * 24 * 3600
+
+    print(f"Seeding {args.users:,} users...")
+    for first in range(1, args.users + 1, args.batch_size):
+        db.session.execute(User.__table__.insert(), [{
+            'id': user_id, 'name': f'User {user_id}', 'age': 18 + user_id % 60, 'address': '-',
+            'email': f'user{user_id}@bench.local', 'password_hash': '-', 'created_at': start
+        } for user_id in range(first, min(first + args.batch_size, args.users + 1))])
+        db.session.commit()
+
+    print(f"Seeding {args.rows:,} assessments ({args.target_rows:,} for user 1)...")
+    began = time.perf_counter()
+    inserted = 0
+    while inserted < args.rows:
+        batch = []
+        for n in range(inserted, min(inserted + args.batch_size, args.rows)):
+            user_id = 1 if n < args.target_rows else rng.randint(2, args.users)
+            batch.append({
+                'user_id': user_id,
+                'stress_score': round(rng.uniform(0, 10), 2),
+                'ml_prediction': rng.choice(predictions),
+                'summary_sha256': summary,
+                'answers': answers,
+                'created_at': start + timedelta(seconds=rng.randrange(span_seconds)),
+            })
+        db.session.execute(Assessment.__table__.insert(), batch)
+        db.session.commit()
+        inserted += len(batch)
+        if inserted % (args.batch_size * 20) == 0 or inserted == args.rows:
+            rate = inserted / (time.perf_counter() - began)
+            print(f"  {inserted:,} rows ({rate:,.0f} rows/s)")
+
+
+def timed(fn, repeat=5):
+    """Return the median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - began) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from app import app, db
+    from models import User, Assessment
+    from history_service import get_history_page, HISTORY_PAGE_SIZE
+
+    with app.app_context():
+        existing = db.session.query(db.func.count(Assessment.id)).scalar()
+        if not (args.reuse and existing):
+            if existing:
+                sys.exit(f"{existing:,} assessments already present; use --reuse or an empty database")
+            seed(db, User, Assessment, args)
+
+        total = db.session.query(db.func.count(Assessment.id)).scalar()
+        target = db.session.query(db.func.count(Assessment.id)).filter_by(user_id=1).scalar()
+        pages = -(-target // HISTORY_PAGE_SIZE)
+        print(f"\nTable: {total:,} assessments; user 1 has {target:,} ({pages} pages)")
+
+        # Walk every page with keyset pagination, timing each step
+        keyset_times = []
+        cursor = None
+        cursors = [None]
+        while True:
+            began = time.perf_counter()
+            _, cursor = get_history_page(1, cursor)
+            keyset_times.append((time.perf_counter() - began) * 1000)
+            db.session.expunge_all()
+            if cursor is None:
+                break
+            cursors.append(cursor)
+
+        def offset_page(page):
+            # The naive approach: full rows, OFFSET paging
+            Assessment.query.filter_by(user_id=1).order_by(
+                Assessment.created_at.desc(), Assessment.id.desc()
+            ).offset(page * HISTORY_PAGE_SIZE).limit(HISTORY_PAGE_SIZE).all()
+            db.session.expunge_all()
+
+        print(f"\nKeyset, all {len(keyset_times)} pages: median {statistics.median(keyset_times):.2f} ms, "
+              f"max {max(keyset_times):.2f} ms")
+
+        def unindexed_page(page):
+            # What a history page cost before the composite index existed
+            db.session.execute(db.text(
+                "SELECT * FROM assessment NOT INDEXED WHERE user_id = 1 "
+                "ORDER BY created_at DESC, id DESC LIMIT :limit OFFSET :offset"
+            ), {'limit': HISTORY_PAGE_SIZE, 'offset': page * HISTORY_PAGE_SIZE}).fetchall()
+
+        sqlite = db.engine.dialect.name == 'sqlite'
+        print(f"{'page':>8} {'keyset ms':>12} {'offset ms':>12}" + (f" {'no index ms':>12}" if sqlite else ''))
+        for page in sorted({0, pages // 4, pages // 2, pages - 1}):
+            keyset_ms = timed(lambda: (get_history_page(1, cursors[page]), db.session.expunge_all()))
+            offset_ms = timed(lambda: offset_page(page))
+            line = f"{page:>8} {keyset_ms:>12.2f} {offset_ms:>12.2f}"
+            if sqlite:
+                line += f" {timed(lambda: unindexed_page(page), repeat=1):>12.2f}"
+            print(line)
+
+        if sqlite:
+            plan = db.session.execute(db.text(
+                "EXPLAIN QUERY PLAN SELECT id, created_at, stress_score, ml_prediction FROM assessment "
+                "WHERE user_id = 1 AND (created_at, id) < ('2025-01-01', 0) "
+                "ORDER BY created_at DESC, id DESC LIMIT 21"
+            )).fetchall()
+            print("\nQuery plan:")
+            for row in plan:
+                print(f"  {row[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Flask-Login user loader
+Measures /quiz requests per second with the identity cache on and off
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each run')
+    parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                        help='simulated network round-trip added to every query (e.g. 1.0 for a remote Postgres)')
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_load_user_bench.db'))
+    return parser.parse_args()
+
+
+def run(client, seconds):
+    """Issue GET /quiz for a fixed time and return (requests/s, queries/request)"""
+    global query_count
+    query_count = 0
+    requests = 0
+    began = time.perf_counter()
+    while time.perf_counter() - began < seconds:
+        response = client.get('/quiz')
+        assert response.status_code == 200, response.status_code
+        requests += 1
+    elapsed = time.perf_counter() - began
+    return requests / elapsed, query_count / requests
+
+
+query_count = 0
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from sqlalchemy import event
+    from app import app, db
+    from models import User
+    import identity_cache
+
+    with app.app_context():
+        @event.listens_for(db.engine, 'before_cursor_execute')
+        def count_queries(conn, cursor, statement, parameters, context, executemany):
+            global query_count
+            query_count += 1
+            if args.db_latency_ms:
+                time.sleep(args.db_latency_ms / 1000)
+
+        if not User.query.filter_by(email='bench@bench.local').first():
+            from werkzeug.security import generate_password_hash
+            db.session.add(User(name='Bench', age=30, address='-', email='bench@bench.local',
+                                password_hash=generate_password_hash('bench')))
+            db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'bench@bench.local', 'password': 'bench'})
+
+    ttl = identity_cache.USER_CACHE_TTL or 30
+    results = {}
+    for label, cache_ttl in (('uncached', 0), ('cached', ttl)):
+        identity_cache.USER_CACHE_TTL = cache_ttl
+        identity_cache.clear()
+        run(client, min(1.0, args.seconds))  # warm up
+        results[label] = run(client, args.seconds)
+
+    print(f"GET /quiz, {args.seconds:.0f}s per run, simulated DB latency {args.db_latency_ms} ms")
+    for label, (qps, queries) in results.items():
+        print(f"  {label:>9}: {qps:8.1f} req/s  {queries:.2f} queries/request")
+    speedup = results['cached'][0] / results['uncached'][0]
+    print(f"  improvement: {(speedup - 1) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark for bytes transferred per page view
+Fetches a few pages and the assets they reference, first as an uncompressed client
+would see them and then with gzip/brotli accepted; run build_assets.py first
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ASSET_PATTERN = re.compile(r'(?:href|src)="(/(?:static|assets)/[^"]+)"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', nargs='+', default=['/login', '/quiz', '/history', '/book'])
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_page_weight_bench.db'))
+    return parser.parse_args()
+
+
+def page_view(client, page, accept_encoding):
+    """Return (html bytes, asset bytes, asset urls) for one uncached page view"""
+    headers = {'Accept-Encoding': accept_encoding}
+    response = client.get(page, headers=headers)
+    html = response.get_data()
+    text = html
+    if response.headers.get('Content-Encoding') == 'gzip':
+        import gzip
+        text = gzip.decompress(html)
+    urls = ASSET_PATTERN.findall(text.decode('utf-8'))
+    asset_bytes = sum(len(client.get(url, headers=headers).get_data()) for url in urls)
+    return len(html), asset_bytes, urls
+
+
+def repeat_requests(client, urls):
+    """Asset requests a browser still makes on a repeat view, given the Cache-Control it was sent"""
+    return sum(1 for url in urls if 'immutable' not in client.get(url).headers.get('Cache-Control', ''))
+
+
+def main():
+    args = parse_args()
+    os.environ['DATABASE_URL'] = args.database_url
+
+    from app import app, db
+    from models import User
+
+    with app.app_context():
+        if not User.query.filter_by(email='bench@bench.local').first():
+            from werkzeug.security import generate_password_hash
+            db.session.add(User(name='Bench', age=30, address='-', email='bench@bench.local',
+                                password_hash=generate_password_hash('bench')))
+            db.session.commit()
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'bench@bench.local', 'password': 'bench'})
+    client.get('/quiz')  # consume the login flash
+
+    print(f"{'page':<12} {'identity':>10} {'compressed':>11} {'saved':>7} {'repeat-view requests':>21}")
+    for page in args.pages:
+        html, assets, urls = page_view(client, page, 'identity')
+        html_c, assets_c, _ = page_view(client, page, 'gzip, br')
+        before, after = html + assets, html_c + assets_c
+        print(f"{page:<12} {before:>10} {after:>11} {(1 - after / before) * 100:>6.1f}% "
+              f"{repeat_requests(client, urls):>21}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark for login throughput at different password hash costs
+Runs POST /login from many client threads against each PASSWORD_HASH_METHOD (each in
+its own process, since the settings are read at import) and reports successful logins
+per second, latency percentiles and the share shed with a 503 by the bounded hashing
+queue (shed clients wait out Retry-After). The last run hashes inline on the request
+threads, as logins did before
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EMAIL = 'bench-login@bench.local'
+PASSWORD = 'correct horse battery staple'
+DEFAULT_METHODS = 'pbkdf2:sha256:600000,scrypt:16384:8:1,scrypt:32768:8:1,scrypt:65536:8:1'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--methods', default=DEFAULT_METHODS, help='comma-separated PASSWORD_HASH_METHOD values')
+    parser.add_argument('--clients', type=int, default=16, help='concurrent login threads')
+    parser.add_argument('--seconds', type=float, default=5.0, help='duration of each run')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='PASSWORD_HASH_WORKERS')
+    parser.add_argument('--queue', type=int, help='PASSWORD_HASH_QUEUE (default 4 per worker)')
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_password_bench.db'))
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run_child(args):
+    """One run with the settings in this process's environment; prints a JSON result"""
+    import logging
+    from app import app, db
+    from models import User
+    from password_service import HASH_METHOD, hash_password
+
+    logging.disable(logging.WARNING)
+    with app.app_context():
+        started = time.perf_counter()
+        password_hash = hash_password(PASSWORD)
+        single_ms = (time.perf_counter() - started) * 1000
+        user = User.query.filter_by(email=EMAIL).first()
+        if user is None:
+            db.session.add(User(name='Bench', age=30, address='-', email=EMAIL, password_hash=password_hash))
+        else:
+            user.password_hash = password_hash
+        db.session.commit()
+
+    statuses = {}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def client_loop():
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            began = time.perf_counter()
+            response = client.post('/login', data={'email': EMAIL, 'password': PASSWORD})
+            elapsed = time.perf_counter() - began
+            with lock:
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                if response.status_code == 302:
+                    latencies.append(elapsed)
+            if response.status_code == 503:
+                # Back off as asked instead of spinning on rejections
+                time.sleep(float(response.headers.get('Retry-After', 1)))
+
+    threads = [threading.Thread(target=client_loop) for _ in range(args.clients)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    print(json.dumps({
+        'method': HASH_METHOD, 'single_ms': single_ms, 'logins_per_second': statuses.get(302, 0) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000, 'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'shed': statuses.get(503, 0) / max(sum(statuses.values()), 1), 'statuses': statuses,
+    }))
+
+
+def run(args, method, workers):
+    env = dict(os.environ, DATABASE_URL=args.database_url, PASSWORD_HASH_METHOD=method,
+               PASSWORD_HASH_WORKERS=str(workers), USER_CACHE_TTL='0')
+    if args.queue is not None:
+        env['PASSWORD_HASH_QUEUE'] = str(args.queue)
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--clients', str(args.clients),
+               '--seconds', str(args.seconds)]
+    output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        run_child(args)
+        return
+
+    methods = [method.strip() for method in args.methods.split(',') if method.strip()]
+    runs = [(method, args.workers) for method in methods] + [(methods[-1], 0)]
+    print(f"{args.clients} clients for {args.seconds:.0f}s per run, {args.workers} hashing threads, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'method':<24} {'pool':>6} {'1 hash':>8} {'logins/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'shed':>6}")
+    for method, workers in runs:
+        result = run(args, method, workers)
+        pool = str(workers) if workers else 'inline'
+        print(f"{result['method']:<24} {pool:>6} {result['single_ms']:6.0f}ms {result['logins_per_second']:9.1f} "
+              f"{result['p50_ms']:6.0f}ms {result['p95_ms']:6.0f}ms {result['p99_ms']:6.0f}ms {result['shed']:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark for PDF report rendering throughput
+Renders synthetic assessment reports serially in this process and then through a
+process pool the way report_service does, and prints reports per second for each
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_service import generate_fallback_summary
+from ml_service import get_detailed_recommendations, get_prediction_confidence, get_fallback_prediction
+from report_service import build_payload, render_report
+
+NAMES = ['Alex Morgan', 'Sam Lee', 'Jordan Patel', 'Riley Chen', 'Taylor Okafor', 'Casey Novak']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reports', type=int, default=1000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--serial', type=int, default=100, help='reports rendered serially (0 to skip)')
+    return parser.parse_args()
+
+
+def synthetic_payloads(count):
+    rng = random.Random(38)
+    payloads = []
+    for assessment_id in range(1, count + 1):
+        stress_score = rng.randint(1, 10)
+        prediction = get_fallback_prediction(stress_score)
+        assessment = SimpleNamespace(
+            id=assessment_id, stress_score=stress_score, ml_prediction=prediction,
+            created_at=datetime(2026, 1, 1) + timedelta(minutes=37 * assessment_id),
+            gemini_summary=generate_fallback_summary(stress_score, rng.randint(18, 70)),
+        )
+        payloads.append(build_payload(assessment, rng.choice(NAMES),
+                                      get_detailed_recommendations(prediction, stress_score),
+                                      get_prediction_confidence(stress_score)))
+    return payloads
+
+
+def run_serial(payloads, out_dir):
+    started = time.perf_counter()
+    size = sum(render_report(payload, os.path.join(out_dir, f"{payload['assessment_id']}.pdf"))
+               for payload in payloads)
+    return time.perf_counter() - started, size
+
+
+def run_pool(payloads, out_dir, workers):
+    import multiprocessing
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        # Warm the workers so interpreter start-up isn't counted as rendering time
+        list(pool.map(render_report, payloads[:workers],
+                      [os.path.join(out_dir, f'warm-{i}.pdf') for i in range(workers)]))
+        started = time.perf_counter()
+        paths = [os.path.join(out_dir, f"{payload['assessment_id']}.pdf") for payload in payloads]
+        size = sum(pool.map(render_report, payloads, paths, chunksize=8))
+    return time.perf_counter() - started, size
+
+
+def main():
+    args = parse_args()
+    payloads = synthetic_payloads(args.reports)
+    print(f"{os.cpu_count()} CPUs, {args.reports} reports")
+    print(f"{'mode':<12} {'reports':>8} {'seconds':>9} {'reports/s':>10} {'avg KB':>8}")
+
+    out_dir = tempfile.mkdtemp(prefix='mindmetric-pdf-bench-')
+    try:
+        if args.serial:
+            elapsed, size = run_serial(payloads[:args.serial], out_dir)
+            print(f"{'serial':<12} {args.serial:>8} {elapsed:>9.2f} {args.serial / elapsed:>10.1f} "
+                  f"{size / args.serial / 1024:>8.1f}")
+        for workers in args.workers:
+            elapsed, size = run_pool(payloads, out_dir, workers)
+            print(f"{f'pool x{workers}':<12} {len(payloads):>8} {elapsed:>9.2f} {len(payloads) / elapsed:>10.1f} "
+                  f"{size / len(payloads) / 1024:>8.1f}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark for quiz response storage
+Loads the same random answers into a JSON text column (the old assessment.responses)
+and a packed BIGINT column (assessment.answers), then compares their size and the time
+of answer-filtered and answer-grouped queries on each
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from response_codec import FIELDS, answer_code, answers_match, decode_responses, encode_responses
+
+FILTER = {'q3': 'D', 'q12': 'High'}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--database-url',
+                        default='sqlite:///' + os.path.join(tempfile.gettempdir(), 'mindmetric_response_bench.db'))
+    parser.add_argument('--reuse', action='store_true', help='skip seeding if the tables are already populated')
+    return parser.parse_args()
+
+
+def seed(engine, json_table, packed_table, args):
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(json_table.delete())
+        connection.execute(packed_table.delete())
+    print(f"Seeding {args.rows:,} rows into each table...")
+    for first in range(1, args.rows + 1, args.batch_size):
+        ids = range(first, min(first + args.batch_size, args.rows + 1))
+        responses = [{name: rng.choice(answers) for name, answers, _, _ in FIELDS} for _ in ids]
+        with engine.begin() as connection:
+            connection.execute(json_table.insert(), [{'id': row_id, 'responses': json.dumps(answers)}
+                                                     for row_id, answers in zip(ids, responses)])
+            connection.execute(packed_table.insert(), [{'id': row_id, 'answers': encode_responses(answers)}
+                                                       for row_id, answers in zip(ids, responses)])
+    with engine.connect() as connection:
+        if engine.dialect.name == 'postgresql':
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(sa.text('VACUUM ANALYZE'))
+        else:
+            connection.execute(sa.text('VACUUM'))
+
+
+def table_bytes(connection, name):
+    """On-disk size of a table (heap, TOAST and indexes on PostgreSQL)"""
+    if connection.dialect.name == 'postgresql':
+        return connection.execute(sa.text(f"SELECT pg_total_relation_size('{name}')")).scalar()
+    return connection.execute(sa.text(f"SELECT sum(pgsize) FROM dbstat WHERE name = '{name}'")).scalar()
+
+
+def json_field(connection, column, name):
+    if connection.dialect.name == 'postgresql':
+        return sa.cast(column, sa.dialects.postgresql.JSONB)[name].astext
+    return sa.func.json_extract(column, f'$.{name}')
+
+
+def timed(fn, repeat=5):
+    """Median wall time of fn in milliseconds, and its last result"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    args = parse_args()
+    engine = sa.create_engine(args.database_url)
+    metadata = sa.MetaData()
+    json_table = sa.Table('bench_responses_json', metadata, sa.Column('id', sa.Integer, primary_key=True),
+                          sa.Column('responses', sa.Text, nullable=False))
+    packed_table = sa.Table('bench_responses_packed', metadata, sa.Column('id', sa.Integer, primary_key=True),
+                            sa.Column('answers', sa.BigInteger, nullable=False))
+    metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        existing = connection.execute(sa.select(sa.func.count()).select_from(packed_table)).scalar()
+    if not (args.reuse and existing == args.rows):
+        seed(engine, json_table, packed_table, args)
+
+    with engine.connect() as connection:
+        json_bytes = table_bytes(connection, json_table.name)
+        packed_bytes = table_bytes(connection, packed_table.name)
+        json_column = connection.execute(sa.select(sa.func.avg(sa.func.length(json_table.c.responses)))).scalar()
+        print(f"\nStorage for {args.rows:,} rows ({engine.dialect.name})")
+        print(f"  JSON text:  {json_bytes / 2**20:8.1f} MiB table, {json_column:.0f} bytes of column per row")
+        print(f"  packed:     {packed_bytes / 2**20:8.1f} MiB table, at most 8 bytes of column per row")
+        print(f"  reduction:  {1 - packed_bytes / json_bytes:.1%} of the table")
+
+        json_condition = sa.and_(*[json_field(connection, json_table.c.responses, name) == answer
+                                   for name, answer in FILTER.items()])
+        first_json = sa.select(json_table.c.responses).limit(100_000)
+        first_packed = sa.select(packed_table.c.answers).limit(100_000)
+        cases = [
+            ('count, JSON parsed in Python', lambda: sum(
+                1 for (text,) in connection.execute(sa.select(json_table.c.responses))
+                if all(json.loads(text).get(name) == answer for name, answer in FILTER.items()))),
+            ('count, JSON parsed in SQL', lambda: connection.execute(
+                sa.select(sa.func.count()).select_from(json_table).where(json_condition)).scalar()),
+            ('count, packed mask', lambda: connection.execute(
+                sa.select(sa.func.count()).select_from(packed_table).where(
+                    answers_match(packed_table.c.answers, **FILTER))).scalar()),
+            ('group by q11, JSON in SQL', lambda: sorted(connection.execute(
+                sa.select(json_field(connection, json_table.c.responses, 'q11'), sa.func.count()).group_by(
+                    json_field(connection, json_table.c.responses, 'q11'))).all())),
+            ('group by q11, packed', lambda: sorted(connection.execute(
+                sa.select(answer_code(packed_table.c.answers, 'q11'), sa.func.count()).group_by(
+                    answer_code(packed_table.c.answers, 'q11'))).all())),
+            ('decode 100k rows to dicts, JSON', lambda: len([
+                json.loads(text) for (text,) in connection.execute(first_json)])),
+            ('decode 100k rows to dicts, packed', lambda: len([
+                decode_responses(value) for (value,) in connection.execute(first_packed)])),
+        ]
+
+        print(f"\nQueries (median of 5; filter {FILTER})")
+        results = {}
+        for label, fn in cases:
+            ms, result = timed(fn)
+            results[label] = (ms, result)
+            print(f"  {label:<36} {ms:10.1f} ms   -> {result if not isinstance(result, list) else len(result)}")
+
+    python_ms, python_count = results['count, JSON parsed in Python']
+    sql_ms, sql_count = results['count, JSON parsed in SQL']
+    packed_ms, packed_count = results['count, packed mask']
+    assert python_count == sql_count == packed_count, "the filters disagree"
+    print(f"\nFiltered count: {sql_ms / packed_ms:.1f}x faster than JSON in SQL, "
+          f"{python_ms / packed_ms:.1f}x faster than parsing in Python")
+
+
+if __name__ == "__main__":
+    main()
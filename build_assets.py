@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Build fingerprinted, precompressed static assets for MindMetric AI
+Writes static/dist/<name>.<hash>.<ext> with .gz and .br variants plus manifest.json;
+run it as a deploy step after changing anything in static/
+Brotli variants are written only when the optional `brotli` package is installed
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from asset_service import ASSET_MAX_AGE, DIST_DIR, MANIFEST_PATH, STATIC_DIR
+
+# Source files that templates reference through asset_url
+ASSET_EXTENSIONS = ('.css', '.js')
+
+# Only compressed variants at least this much smaller than the original are kept
+MIN_SAVING = 0.05
+
+
+def fingerprint(data):
+    """Short content hash used in the built filename"""
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write_variant(path, data, original_size):
+    """Write a compressed variant if it is worth serving; returns its size or None"""
+    if len(data) > original_size * (1 - MIN_SAVING):
+        return None
+    with open(path, 'wb') as file:
+        file.write(data)
+    return len(data)
+
+
+def build_asset(filename):
+    """Fingerprint one asset and write its compressed variants"""
+    with open(os.path.join(STATIC_DIR, filename), 'rb') as file:
+        data = file.read()
+
+    stem, ext = os.path.splitext(filename)
+    hashed = f"{stem}.{fingerprint(data)}{ext}"
+    path = os.path.join(DIST_DIR, hashed)
+    with open(path, 'wb') as file:
+        file.write(data)
+
+    # mtime=0 keeps the gzip bytes identical across builds of the same content
+    sizes = {
+        'raw': len(data),
+        'gzip': write_variant(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data)),
+        'br': write_variant(path + '.br', brotli.compress(data, quality=11), len(data)) if brotli else None,
+    }
+    return hashed, sizes
+
+
+def build(clean=True):
+    """Build every asset and write the manifest; returns {filename: (hashed, sizes)}"""
+    if clean and os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    built = {}
+    for filename in sorted(os.listdir(STATIC_DIR)):
+        if filename.endswith(ASSET_EXTENSIONS) and os.path.isfile(os.path.join(STATIC_DIR, filename)):
+            built[filename] = build_asset(filename)
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as file:
+        json.dump({filename: hashed for filename, (hashed, _) in built.items()}, file, indent=2)
+    return built
+
+
+def report(built):
+    """Print per-asset sizes and the bytes a first page view saves"""
+    raw_total = best_total = 0
+    print(f"{'asset':<32} {'raw':>9} {'gzip':>9} {'br':>9}")
+    for filename, (hashed, sizes) in built.items():
+        best = min(size for size in sizes.values() if size is not None)
+        raw_total += sizes['raw']
+        best_total += best
+        print(f"{hashed:<32} {sizes['raw']:>9} {sizes['gzip'] or '-':>9} {sizes['br'] or '-':>9}")
+
+    if raw_total:
+        print(f"First view:  {raw_total} -> {best_total} bytes "
+              f"({(1 - best_total / raw_total) * 100:.1f}% smaller)")
+    print(f"Repeat views: 0 asset requests (immutable for {ASSET_MAX_AGE // 86400} days) instead of {len(built)} revalidations")
+    if brotli is None:
+        print("Note: install `brotli` to also write .br variants")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted, precompressed static assets")
+    parser.add_argument('--no-clean', action='store_true', help='keep previous builds in static/dist (for rolling deploys)')
+    args = parser.parse_args()
+    report(build(clean=not args.no_clean))
+
+
+if __name__ == "__main__":
+    main()
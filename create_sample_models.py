@@ -13,7 +13,7 @@ import pandas as pd
 
 def create_sample_data():
     """Create sample training data that mimics psychological assessment responses"""
-    np.random.seed(42)  # For reproducible results
+    rng = np.random.RandomState(42)  # Reproducible, without reseeding NumPy's global generator
     
     # Sample responses for 1000 users
     n_samples = 1000
@@ -21,14 +21,14 @@ def create_sample_data():
     # Generate personality/stress responses (Q1-Q10)
     data = {}
     for i in range(1, 11):
-        data[f'q{i}'] = np.random.choice(['A', 'B', 'C', 'D', 'E'], n_samples)
+        data[f'q{i}'] = rng.choice(['A', 'B', 'C', 'D', 'E'], n_samples)
     
     # Generate stress scores (0-10)
-    data['stress_score'] = np.random.uniform(0, 10, n_samples)
+    data['stress_score'] = rng.uniform(0, 10, n_samples)
     
     # Generate derived features
-    data['high_stress_count'] = np.random.randint(0, 6, n_samples)
-    data['low_stress_count'] = np.random.randint(0, 6, n_samples)
+    data['high_stress_count'] = rng.randint(0, 6, n_samples)
+    data['low_stress_count'] = rng.randint(0, 6, n_samples)
     
     # Create target labels (content types)
     content_types = ['Meditation', 'Nature Sounds', 'Relaxing Music', 'Guided Breathing', 'Professional Therapy', 'Podcasts']
@@ -0,0 +1,269 @@
+"""
+Database connection pools and read routing for MindMetric AI
+Pool size, overflow, timeout, recycle and liveness checks come from a named profile
+(DB_POOL_PROFILE) with per-setting overrides. Every pool reports checkouts, time spent
+waiting for a connection, time connections are held, timeouts and invalidations to
+/metrics. With DATABASE_REPLICA_URL set, views marked @read_only send their SELECTs to
+the replica, except for clients that wrote in the last DB_REPLICA_STICKY_SECONDS, so
+nobody is redirected to a page that reads what they just saved before it replicated
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from flask import g, has_app_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from metrics import inc, observe
+
+# (pool_size, max_overflow, pool_timeout, pool_recycle, liveness) per deployment shape:
+# default keeps the old pre-ping on every checkout; gunicorn sync workers need a connection or two;
+# uvicorn workers run up to ASGI_REQUEST_THREADS requests at once; scripts hold one long connection
+POOL_PROFILES = {
+    'default': (5, 10, 30, 300, 'pre_ping'),
+    'gunicorn': (2, 4, 10, 1800, 'idle'),
+    'asgi': (10, 20, 5, 1800, 'background'),
+    'script': (1, 2, 60, 3600, 'pre_ping'),
+}
+
+# One of POOL_PROFILES; the DB_POOL_* settings below override single values of it
+DB_POOL_PROFILE = os.environ.get("DB_POOL_PROFILE", "default")
+
+# Connections kept open per worker, and extra ones opened under load and closed when returned
+DB_POOL_SIZE = os.environ.get("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.environ.get("DB_MAX_OVERFLOW")
+
+# Seconds a request waits for a free connection before failing
+DB_POOL_TIMEOUT = os.environ.get("DB_POOL_TIMEOUT")
+
+# Connections older than this many seconds are replaced when next checked out
+DB_POOL_RECYCLE = os.environ.get("DB_POOL_RECYCLE")
+
+# How dead connections are caught: pre_ping (a round-trip on every checkout), idle (ping only
+# connections unused for DB_POOL_PING_SECONDS), background (a thread pings idle connections
+# every DB_POOL_PING_SECONDS) or none
+DB_POOL_LIVENESS = os.environ.get("DB_POOL_LIVENESS")
+DB_POOL_PING_SECONDS = float(os.environ.get("DB_POOL_PING_SECONDS", "30"))
+
+# Read replica for @read_only views; unset sends everything to DATABASE_URL
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL")
+
+# Seconds a client's reads stay on the primary after it writes (cover the replica's lag)
+DB_REPLICA_STICKY_SECONDS = float(os.environ.get("DB_REPLICA_STICKY_SECONDS", "5"))
+
+REPLICA = 'replica'
+
+# Set inside primary_reads()
+_primary_only = contextvars.ContextVar('db_primary_only', default=False)
+
+if DB_POOL_PROFILE not in POOL_PROFILES:
+    logging.warning(f"Unknown DB_POOL_PROFILE {DB_POOL_PROFILE!r}; using the default pool profile")
+    DB_POOL_PROFILE = 'default'
+
+
+def database_url(url):
+    """Normalize a Render/Heroku style URL for SQLAlchemy"""
+    # Fix postgres:// vs postgresql:// for SQLAlchemy
+    if url and url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+
+    # Force SSL for Render PostgreSQL
+    if url and "sslmode" not in url:
+        url = url + ("&" if "?" in url else "?") + "sslmode=require"
+    return url
+
+
+def pool_settings():
+    """The profile's settings with any DB_POOL_* overrides applied"""
+    size, overflow, timeout, recycle, liveness = POOL_PROFILES[DB_POOL_PROFILE]
+    return {
+        'pool_size': int(DB_POOL_SIZE) if DB_POOL_SIZE else size,
+        'max_overflow': int(DB_MAX_OVERFLOW) if DB_MAX_OVERFLOW else overflow,
+        'pool_timeout': float(DB_POOL_TIMEOUT) if DB_POOL_TIMEOUT else timeout,
+        'pool_recycle': int(DB_POOL_RECYCLE) if DB_POOL_RECYCLE else recycle,
+        'liveness': DB_POOL_LIVENESS or liveness,
+    }
+
+
+def engine_options(url, bind_name):
+    """SQLALCHEMY_ENGINE_OPTIONS for one database"""
+    settings = pool_settings()
+    if url and url.split('?')[0] in ('sqlite://', 'sqlite:///:memory:'):
+        # An in-memory database lives in its single connection; leave SQLAlchemy's pool alone
+        return {}
+    options = {key: settings[key] for key in ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle')}
+    options['pool_pre_ping'] = settings['liveness'] == 'pre_ping'
+    options['poolclass'] = _pool_class(bind_name, settings['liveness'])
+    return options
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection"""
+
+    bind_name = 'primary'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            inc('db_pool_timeouts', bind=self.bind_name)
+            raise
+        finally:
+            observe('db_pool_wait_seconds', time.perf_counter() - started, bind=self.bind_name)
+
+
+def _pool_class(bind_name, liveness):
+    # A subclass per bind keeps the label through engine.dispose(), which rebuilds the pool from its class.
+    # Pools log under their module name; staying under sqlalchemy.* keeps the app's DEBUG root logger
+    # from logging every checkout
+    pool_class = type(f'{bind_name.title()}QueuePool', (InstrumentedQueuePool,),
+                      {'bind_name': bind_name, '__module__': QueuePool.__module__})
+    event.listen(pool_class, 'connect', lambda dbapi_connection, record: inc(
+        'db_pool_connections_opened', bind=bind_name))
+    event.listen(pool_class, 'invalidate', lambda dbapi_connection, record, exception: inc(
+        'db_pool_invalidated', bind=bind_name))
+    event.listen(pool_class, 'checkout', functools.partial(_on_checkout, bind_name, liveness))
+    event.listen(pool_class, 'checkin', functools.partial(_on_checkin, bind_name))
+    return pool_class
+
+
+def _ping(dbapi_connection):
+    """True if the connection answers a trivial query"""
+    try:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        finally:
+            cursor.close()
+        return True
+    except Exception:
+        return False
+
+
+def _on_checkout(bind_name, liveness, dbapi_connection, connection_record, connection_proxy):
+    now = time.monotonic()
+    inc('db_pool_checkouts', bind=bind_name)
+    idle_since = connection_record.info.get('checked_in_at')
+    if liveness == 'idle' and idle_since is not None and now - idle_since > DB_POOL_PING_SECONDS:
+        alive = _ping(dbapi_connection)
+        inc('db_pool_pings', bind=bind_name, result='ok' if alive else 'dead')
+        if not alive:
+            # The pool invalidates this connection and retries the checkout with a fresh one
+            raise exc.DisconnectionError("Idle connection failed its liveness check")
+    elif liveness == 'background':
+        _start_background_pinger(connection_proxy._pool)
+    connection_record.info['checked_out_at'] = now
+
+
+def _on_checkin(bind_name, dbapi_connection, connection_record):
+    now = time.monotonic()
+    checked_out_at = connection_record.info.pop('checked_out_at', None)
+    if checked_out_at is not None:
+        observe('db_pool_hold_seconds', now - checked_out_at, bind=bind_name)
+    connection_record.info['checked_in_at'] = now
+
+
+_pingers = {}
+_pingers_lock = threading.Lock()
+
+
+def _start_background_pinger(pool):
+    """One pinger thread per pool per process (a forked worker starts its own)"""
+    key = (id(pool), os.getpid())
+    if key in _pingers:
+        return
+    with _pingers_lock:
+        if key in _pingers:
+            return
+        thread = threading.Thread(target=_ping_idle_loop, args=(pool,), name=f'db-pinger-{pool.bind_name}',
+                                  daemon=True)
+        _pingers[key] = thread
+    thread.start()
+
+
+def _ping_idle_loop(pool):
+    while True:
+        time.sleep(DB_POOL_PING_SECONDS)
+        try:
+            _ping_idle(pool)
+        except Exception as e:
+            logging.warning(f"Background connection check failed: {e}")
+
+
+def _ping_idle(pool):
+    """Check each idle connection once; the pool hands them out oldest first, so this cycles through them"""
+    for _ in range(pool.checkedin()):
+        if pool.checkedin() == 0:
+            return
+        connection = pool.connect()
+        try:
+            alive = _ping(connection.dbapi_connection)
+            inc('db_pool_pings', bind=pool.bind_name, result='ok' if alive else 'dead')
+            if not alive:
+                connection.invalidate()
+        finally:
+            connection.close()
+
+
+def read_only(view):
+    """Let a view's reads go to the replica; put it outside login_required so load_user is routed too"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if DATABASE_REPLICA_URL and session.get('db_primary_until', 0) <= time.time():
+            g.db_read_only = True
+        return view(*args, **kwargs)
+    return wrapped
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Send the block's reads to the primary, even inside a @read_only view
+
+    For per-worker caches, which would otherwise keep a lagging replica's answers for their whole TTL
+    """
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def _is_write(clause):
+    """DML, raw SQL (which may be DML) and SELECT ... FOR UPDATE all belong on the primary"""
+    return isinstance(clause, (UpdateBase, TextClause)) or getattr(clause, '_for_update_arg', None) is not None
+
+
+def remember_writes(response):
+    """Keep a client that just wrote on the primary for its next few requests"""
+    if g.pop('db_wrote', False):
+        session['db_primary_until'] = time.time() + DB_REPLICA_STICKY_SECONDS
+    return response
+
+
+class RoutingSession(Session):
+    """db.session that reads from the replica inside @read_only views; writes always use the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        replica = self._db.engines.get(REPLICA) if DATABASE_REPLICA_URL else None
+        if replica is None or bind is not None or engine is not self._db.engines.get(None) or not has_app_context():
+            return engine
+        if self._flushing or _is_write(clause):
+            g.db_wrote = True
+            return engine
+        if g.get('db_read_only') and not _primary_only.get():
+            inc('db_routed_statements', bind=REPLICA)
+            return replica
+        return engine
+
+
+def read_engine(db):
+    """The engine for long read-only jobs such as exports: the replica if there is one"""
+    return db.engines.get(REPLICA, db.engine) if DATABASE_REPLICA_URL else db.engine
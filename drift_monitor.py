@@ -0,0 +1,252 @@
+"""
+Drift Monitor for MindMetric AI
+Counts quiz answers, stress scores and predictions per time bucket in fixed-size
+histograms, merges every worker's counts into the drift_bucket table, and compares
+a window of buckets with the training data histograms in DRIFT_BASELINE_PATH (PSI and KL)
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import app, db
+from models import DriftBucket
+
+# Width of one drift bucket
+DRIFT_BUCKET_SECONDS = int(os.environ.get("DRIFT_BUCKET_SECONDS", "3600"))
+
+# Seconds between merges of this worker's counts into drift_bucket
+DRIFT_FLUSH_SECONDS = float(os.environ.get("DRIFT_FLUSH_SECONDS", "60"))
+
+# Training data histograms, written by `python drift_report.py --write-baseline` after retraining
+DRIFT_BASELINE_PATH = os.environ.get("DRIFT_BASELINE_PATH", "drift_baseline.json")
+
+# Conventional PSI bands: below the first is stable, above the second has clearly shifted
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+EPOCH = datetime(1970, 1, 1)
+PERSONALITY_ANSWERS = ['A', 'B', 'C', 'D', 'E']
+STRESS_ANSWERS = ['Low', 'Medium', 'High']
+SCORE_BINS = 10
+# Training classes plus 'Music', which only the fallback prediction produces
+PREDICTION_CLASSES = ['Meditation', 'Nature Sounds', 'Relaxing Music', 'Guided Breathing',
+                      'Professional Therapy', 'Podcasts', 'Music']
+
+# Every histogram ends with an 'other' slot for missing or unexpected values
+LAYOUT = {f'q{i}': PERSONALITY_ANSWERS for i in range(1, 11)}
+LAYOUT.update({f'q{i}': STRESS_ANSWERS for i in range(11, 16)})
+LAYOUT['stress_score'] = [f'{low}-{low + 1}' for low in range(SCORE_BINS)]
+LAYOUT['prediction'] = PREDICTION_CLASSES
+_SLOTS = {name: {value: index for index, value in enumerate(values)} for name, values in LAYOUT.items()}
+
+_lock = threading.Lock()
+_pending = {}
+_owner_pid = None
+_baseline = None
+
+
+def empty_counts():
+    return {name: [0] * (len(values) + 1) for name, values in LAYOUT.items()}
+
+
+def bucket_start(moment):
+    # Naive datetimes here are UTC (datetime.utcnow), so don't let .timestamp() apply the local zone
+    epoch = int((moment - EPOCH).total_seconds()) if isinstance(moment, datetime) else int(moment)
+    return datetime.utcfromtimestamp(epoch - epoch % DRIFT_BUCKET_SECONDS)
+
+
+def score_bin(stress_score):
+    return min(max(int(stress_score), 0), SCORE_BINS - 1)
+
+
+def _check_process():
+    """Drop counts inherited across fork and start this process's flush thread"""
+    global _owner_pid
+    pid = os.getpid()
+    if pid == _owner_pid:
+        return
+    with _lock:
+        if pid == _owner_pid:
+            return
+        _pending.clear()
+        _owner_pid = pid
+    threading.Thread(target=_flush_loop, name="drift-flush", daemon=True).start()
+    atexit.register(flush)
+
+
+def record_quiz(responses, stress_score, ml_prediction, now=None):
+    """Count one submitted quiz in the current bucket; O(1) and lock-protected"""
+    if _owner_pid != os.getpid():
+        _check_process()
+    key = bucket_start(now or time.time())
+    with _lock:
+        counts = _pending.get(key)
+        if counts is None:
+            counts = _pending[key] = [0, empty_counts()]
+        counts[0] += 1
+        histograms = counts[1]
+        for name in LAYOUT:
+            if name == 'stress_score':
+                histograms[name][score_bin(stress_score)] += 1
+            elif name == 'prediction':
+                histograms[name][_SLOTS[name].get(ml_prediction, -1)] += 1
+            else:
+                histograms[name][_SLOTS[name].get(responses.get(name), -1)] += 1
+
+
+def merge_counts(target, source):
+    for name, values in source.items():
+        merged = target.setdefault(name, [0] * len(values))
+        for index, value in enumerate(values):
+            merged[index] += value
+    return target
+
+
+def _add_to_bucket(start, observations, counts):
+    """Add this worker's counts to the stored bucket (row-locked read-modify-write)"""
+    row = db.session.query(DriftBucket).filter_by(bucket_start=start).with_for_update().first()
+    if row is None:
+        db.session.add(DriftBucket(bucket_start=start, observations=observations, counts=json.dumps(counts),
+                                   updated_at=datetime.utcnow()))
+    else:
+        row.observations += observations
+        row.counts = json.dumps(merge_counts(json.loads(row.counts), counts))
+        row.updated_at = datetime.utcnow()
+    db.session.commit()
+
+
+def flush():
+    """Merge this worker's pending counts into drift_bucket; counts are kept on failure"""
+    if _owner_pid != os.getpid():
+        return
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+
+    with app.app_context():
+        for start, (observations, counts) in pending.items():
+            try:
+                try:
+                    _add_to_bucket(start, observations, counts)
+                except IntegrityError:
+                    # Another worker created the bucket first; add to theirs
+                    db.session.rollback()
+                    _add_to_bucket(start, observations, counts)
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Failed to flush drift counts for {start}: {e}")
+                with _lock:
+                    kept = _pending.setdefault(start, [0, empty_counts()])
+                    kept[0] += observations
+                    merge_counts(kept[1], counts)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(DRIFT_FLUSH_SECONDS)
+        flush()
+
+
+def build_baseline():
+    """Histograms of the training set built by create_sample_models.create_sample_data (offline)"""
+    from create_sample_models import create_sample_data
+    data = create_sample_data()
+    counts = empty_counts()
+    for name in LAYOUT:
+        if name.startswith('q') and name in data.columns:
+            for value in data[name]:
+                counts[name][_SLOTS[name].get(value, -1)] += 1
+    for score in data['stress_score']:
+        counts['stress_score'][score_bin(score)] += 1
+    for target in data['target']:
+        counts['prediction'][_SLOTS['prediction'].get(target, -1)] += 1
+    return counts
+
+
+def write_baseline(path=DRIFT_BASELINE_PATH):
+    """Build the baseline and save it where workers load it from"""
+    counts = build_baseline()
+    with open(path, 'w') as file:
+        # One histogram per line, so a retrained baseline diffs readably
+        file.write('{\n' + ',\n'.join(f'  {json.dumps(name)}: {json.dumps(values)}'
+                                       for name, values in counts.items()) + '\n}\n')
+    return counts
+
+
+def baseline_counts():
+    """Training set histograms from DRIFT_BASELINE_PATH, loaded once per worker"""
+    global _baseline
+    if _baseline is None:
+        counts = empty_counts()
+        try:
+            with open(DRIFT_BASELINE_PATH) as file:
+                stored = json.load(file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"No drift baseline ({e}); run `python drift_report.py --write-baseline`")
+            stored = {}
+        for name, values in stored.items():
+            if name in counts and len(values) == len(counts[name]):
+                counts[name] = values
+            else:
+                # Written for a different LAYOUT; the feature shows as having no baseline
+                logging.warning(f"Ignoring drift baseline for {name}: it does not match the histogram layout")
+        _baseline = counts
+    return _baseline
+
+
+def _proportions(values, epsilon=1e-4):
+    total = sum(values)
+    # Smoothing keeps empty slots from making PSI/KL infinite
+    return [(value / total if total else 0.0) + epsilon for value in values]
+
+
+def psi(actual, expected):
+    """Population stability index between two count vectors"""
+    a, e = _proportions(actual), _proportions(expected)
+    return sum((x - y) * math.log(x / y) for x, y in zip(a, e))
+
+
+def kl_divergence(actual, expected):
+    """KL(actual || expected) in nats"""
+    a, e = _proportions(actual), _proportions(expected)
+    return sum(x * math.log(x / y) for x, y in zip(a, e))
+
+
+def window_counts(start, end):
+    """Merged counts of the stored buckets in [start, end)"""
+    rows = db.session.query(DriftBucket.observations, DriftBucket.counts).filter(
+        DriftBucket.bucket_start >= start, DriftBucket.bucket_start < end).all()
+    counts = empty_counts()
+    observations = 0
+    for row in rows:
+        observations += row.observations
+        merge_counts(counts, json.loads(row.counts))
+    return observations, counts
+
+
+def drift_report(hours=24, now=None):
+    """PSI/KL of every histogram in the last `hours` against the training baseline"""
+    end = bucket_start(now or datetime.utcnow()) + timedelta(seconds=DRIFT_BUCKET_SECONDS)
+    start = end - timedelta(hours=hours)
+    observations, counts = window_counts(start, end)
+    baseline = baseline_counts()
+
+    features = []
+    for name, values in LAYOUT.items():
+        actual = counts[name]
+        entry = {'feature': name, 'counts': dict(zip(values + ['other'], actual))}
+        # Q11-Q15 are not part of the training data, so they are reported without a comparison
+        if sum(baseline[name]) and sum(actual):
+            entry['psi'] = round(psi(actual, baseline[name]), 4)
+            entry['kl'] = round(kl_divergence(actual, baseline[name]), 4)
+            entry['status'] = ('alert' if entry['psi'] >= PSI_ALERT
+                               else 'warn' if entry['psi'] >= PSI_WARN else 'ok')
+        features.append(entry)
+    return {'start': start.isoformat(), 'end': end.isoformat(), 'observations': observations, 'features': features}
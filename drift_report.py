@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Print how quiz answers, stress scores and predictions compare with the training data
+Reads the drift_bucket counts that workers flush from submit_quiz (see drift_monitor)
+
+    python drift_report.py --hours 168
+    python drift_report.py --write-baseline   # after retraining model.pkl
+"""
+import argparse
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recent quiz traffic with the training distribution")
+    parser.add_argument('--hours', type=int, default=24, help='window ending at the current bucket')
+    parser.add_argument('--counts', action='store_true', help='also print every histogram')
+    parser.add_argument('--write-baseline', action='store_true',
+                        help='rebuild the training data histograms in DRIFT_BASELINE_PATH and exit')
+    args = parser.parse_args()
+
+    from app import app
+    from drift_monitor import DRIFT_BASELINE_PATH, PSI_ALERT, PSI_WARN, drift_report, write_baseline
+
+    if args.write_baseline:
+        counts = write_baseline()
+        print(f"Wrote the baseline of {sum(counts['prediction']):,} training rows to {DRIFT_BASELINE_PATH}")
+        return
+
+    with app.app_context():
+        report = drift_report(args.hours)
+    print(f"{report['observations']:,} quizzes from {report['start']} to {report['end']}")
+    print(f"PSI: below {PSI_WARN} stable, {PSI_WARN}-{PSI_ALERT} worth a look, above {PSI_ALERT} shifted\n")
+    print(f"{'feature':<14} {'PSI':>8} {'KL':>8}  status")
+    for entry in report['features']:
+        if 'psi' in entry:
+            print(f"{entry['feature']:<14} {entry['psi']:>8.4f} {entry['kl']:>8.4f}  {entry['status']}")
+        else:
+            print(f"{entry['feature']:<14} {'-':>8} {'-':>8}  no baseline")
+        if args.counts:
+            print('    ' + ', '.join(f"{value}: {count}" for value, count in entry['counts'].items()))
+
+
+if __name__ == "__main__":
+    main()
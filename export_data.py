@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Export MindMetric AI assessments or bookings as CSV or NDJSON
+Rows stream from a server-side cursor and are written batch by batch, so memory use
+does not grow with the table; the same code backs /admin/export/<kind>
+
+    python export_data.py assessments --start 2025-01-01 --end 2025-06-30 --gzip -o h1.csv.gz
+    python export_data.py bookings --format ndjson --columns id,user_id,session_date,status
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Stream an export of assessments or bookings")
+    parser.add_argument('kind', choices=['assessments', 'bookings'])
+    parser.add_argument('--format', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--start', help='first created_at date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', help='last created_at date to include (YYYY-MM-DD)')
+    parser.add_argument('--columns', help='comma-separated columns to export (default: all)')
+    parser.add_argument('--gzip', action='store_true', help='gzip the output')
+    parser.add_argument('--batch-size', type=int, help='rows per cursor fetch (default EXPORT_BATCH_SIZE)')
+    parser.add_argument('-o', '--output', help='file to write (default: stdout)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.batch_size:
+        os.environ['EXPORT_BATCH_SIZE'] = str(args.batch_size)
+    from app import app, db
+    from export_service import ExportError, export_stream, parse_date
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        try:
+            stream = export_stream(db.engine, args.kind, args.format, args.columns,
+                                   parse_date(args.start, 'start'), parse_date(args.end, 'end'), args.gzip)
+        except ExportError as e:
+            raise SystemExit(f"error: {e}")
+
+        output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        began = time.perf_counter()
+        written = 0
+        try:
+            for chunk in stream:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if args.output:
+                output.close()
+        if args.output:
+            print(f"Wrote {written / 1e6:.1f} MB to {args.output} in {time.perf_counter() - began:.1f}s",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Export Service for MindMetric AI
+Streams assessments and bookings as CSV or NDJSON straight from a server-side cursor,
+so memory stays flat and the first bytes go out before the query has finished
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime, time, timedelta
+
+from models import Assessment, Booking, SummaryBlob
+from response_codec import decode_responses
+from summary_store import decompress
+
+# Rows fetched per round trip from the server-side cursor (and encoded per output chunk)
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+
+# gzip level for compressed exports; low levels keep up with the cursor, high ones don't
+EXPORT_GZIP_LEVEL = int(os.environ.get("EXPORT_GZIP_LEVEL", "4"))
+
+EXPORTS = {
+    'assessments': Assessment.__table__,
+    'bookings': Booking.__table__,
+}
+# Columns exported with a decoded value: name -> (stored column, decoder). Packed answers and
+# compressed summaries mean nothing outside the app, so they go out as the text they used to be
+DECODED_COLUMNS = {
+    'assessments': {
+        'gemini_summary': (SummaryBlob.__table__.c.text_data, decompress),
+        'gemini_summary_html': (SummaryBlob.__table__.c.html_data, decompress),
+        'responses': (Assessment.__table__.c.answers, lambda packed: json.dumps(decode_responses(packed))),
+    },
+}
+# Stored columns that only go out decoded, and the tables the decoded columns come from
+HIDDEN_COLUMNS = {'assessments': {'answers', 'summary_sha256'}}
+SOURCES = {'assessments': Assessment.__table__.outerjoin(SummaryBlob.__table__)}
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class ExportError(ValueError):
+    """Raised for an unknown export, format or column, or a bad date range"""
+
+
+def export_columns(kind):
+    """Every column an export can contain: the table's own, then the decoded ones"""
+    hidden = HIDDEN_COLUMNS.get(kind, set())
+    return [column.name for column in EXPORTS[kind].columns if column.name not in hidden] + list(
+        DECODED_COLUMNS.get(kind, {}))
+
+
+def _source_column(kind, name):
+    decoded = DECODED_COLUMNS.get(kind, {}).get(name)
+    return decoded[0] if decoded else EXPORTS[kind].c[name]
+
+
+def parse_columns(kind, columns):
+    """Validate a column projection (comma-separated string or list); None means every column"""
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export '{kind}'; choose from {', '.join(EXPORTS)}")
+    available = export_columns(kind)
+    if not columns:
+        return available
+    if isinstance(columns, str):
+        columns = [name.strip() for name in columns.split(',') if name.strip()]
+    unknown = [name for name in columns if name not in available]
+    if unknown:
+        raise ExportError(f"Unknown {kind} columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f"{name} must be a date in YYYY-MM-DD format")
+
+
+def build_query(kind, columns, start=None, end=None):
+    """SELECT for an export; start/end are inclusive dates on created_at"""
+    table = EXPORTS[kind]
+    sources = [_source_column(kind, name) for name in columns]
+    query = table.select().with_only_columns(*sources)
+    if any(source.table is not table for source in sources):
+        # Only join summary_blob when a summary column was asked for
+        query = query.select_from(SOURCES[kind])
+    if start:
+        query = query.where(table.c.created_at >= datetime.combine(start, time.min))
+    if end:
+        query = query.where(table.c.created_at < datetime.combine(end + timedelta(days=1), time.min))
+    # Primary-key order lets Postgres walk the pkey index and return rows at once, with no sort step
+    return query.order_by(table.c.id)
+
+
+def stream_rows(engine, query, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of rows from a server-side cursor, batch_size at a time"""
+    with engine.connect() as connection:
+        # yield_per implies stream_results: a named cursor on psycopg2, so the server holds the result set
+        result = connection.execution_options(yield_per=batch_size).execute(query)
+        for partition in result.partitions():
+            yield partition
+
+
+def decode_batches(kind, columns, batches):
+    """Apply DECODED_COLUMNS to each batch of rows; a pass-through when none were selected"""
+    decoders = [(index, DECODED_COLUMNS[kind][name][1]) for index, name in enumerate(columns)
+                if name in DECODED_COLUMNS.get(kind, {})]
+    for rows in batches:
+        if decoders:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for index, decode in decoders:
+                    row[index] = decode(row[index])
+        yield rows
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(columns, batches):
+    """Yield the header, then one CSV chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([[_plain(value) for value in row] for row in rows])
+        yield buffer.getvalue()
+
+
+def encode_ndjson(columns, batches):
+    """Yield one chunk of newline-delimited JSON objects per batch"""
+    for rows in batches:
+        yield ''.join(json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False) + '\n'
+                      for row in rows)
+
+
+ENCODERS = {'csv': encode_csv, 'ndjson': encode_ndjson}
+
+
+def gzip_chunks(chunks, level=EXPORT_GZIP_LEVEL):
+    """Compress a stream of text chunks into one gzip member, flushing after each chunk"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        # A sync flush per batch costs a few bytes but lets every batch reach the client immediately
+        data = compressor.compress(chunk.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(engine, kind, fmt='csv', columns=None, start=None, end=None, compress=False):
+    """Bytes of a whole export, produced lazily batch by batch"""
+    if fmt not in ENCODERS:
+        raise ExportError(f"Unknown format '{fmt}'; choose from {', '.join(ENCODERS)}")
+    columns = parse_columns(kind, columns)
+    if start and end and start > end:
+        raise ExportError("start must not be after end")
+
+    batches = decode_batches(kind, columns, stream_rows(engine, build_query(kind, columns, start, end)))
+    chunks = ENCODERS[fmt](columns, batches)
+    if compress:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
+
+
+def export_filename(kind, fmt, start=None, end=None, compress=False):
+    span = f"-{start or 'start'}-to-{end or date.today()}" if start or end else f"-{date.today()}"
+    return f"{kind}{span}.{FORMATS[fmt][1]}" + ('.gz' if compress else '')
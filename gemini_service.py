@@ -1,11 +1,26 @@
 import os
+import asyncio
 import logging
+import weakref
 from google import genai
 from google.genai import types
+from metrics import timed
+
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "fallback-key")
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Set to send Gemini calls elsewhere, e.g. the stand-in in loadtest/fake_services.py
+GEMINI_API_BASE_URL = os.environ.get("GEMINI_API_BASE_URL")
+GEMINI_HTTP_OPTIONS = types.HttpOptions(base_url=GEMINI_API_BASE_URL) if GEMINI_API_BASE_URL else None
 
 # Initialize Gemini client
-client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY", "fallback-key"))
+client = genai.Client(api_key=GEMINI_API_KEY, http_options=GEMINI_HTTP_OPTIONS)
 
+# The async transport is bound to the event loop it first runs on, so keep one
+# client per loop (a single loop under ASGI, one per request under WSGI)
+_async_clients = weakref.WeakKeyDictionary()
+
+@timed('quiz_stage_seconds', stage='summary')
 def generate_psychological_summary(responses, stress_score, age):
     """Generate a personalized psychological summary using Gemini AI"""
     try:
@@ -14,7 +29,33 @@ def generate_psychological_summary(responses, stress_score, age):
         
         # Generate response using Gemini
         response = client.models.generate_content(
-            model="gemini-2.5-flash",
+            model=GEMINI_MODEL,
+            contents=prompt
+        )
+        
+        return response.text or "Unable to generate psychological summary at this time."
+    
+    except Exception as e:
+        logging.error(f"Error generating Gemini summary: {e}")
+        return generate_fallback_summary(stress_score, age)
+
+def _get_async_client():
+    """Return the async Gemini client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    loop_client = _async_clients.get(loop)
+    if loop_client is None:
+        loop_client = genai.Client(api_key=GEMINI_API_KEY, http_options=GEMINI_HTTP_OPTIONS)
+        _async_clients[loop] = loop_client
+    return loop_client.aio
+
+@timed('quiz_stage_seconds', stage='summary')
+async def generate_psychological_summary_async(responses, stress_score, age):
+    """Async variant of generate_psychological_summary using the native aio client"""
+    try:
+        prompt = create_psychological_prompt(responses, stress_score, age)
+        
+        response = await _get_async_client().models.generate_content(
+            model=GEMINI_MODEL,
             contents=prompt
         )
         
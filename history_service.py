@@ -0,0 +1,60 @@
+"""
+History Service for MindMetric AI
+Keyset pagination over a user's past assessments
+"""
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
+from models import Assessment
+
+HISTORY_PAGE_SIZE = 20
+MAX_HISTORY_PAGE_SIZE = 100
+
+# Columns shown in the history list; answers and the summary reference stay deferred
+SUMMARY_COLUMNS = (
+    Assessment.id,
+    Assessment.user_id,
+    Assessment.created_at,
+    Assessment.stress_score,
+    Assessment.ml_prediction,
+)
+
+
+def encode_cursor(assessment):
+    """Encode the (created_at, id) position of an assessment as an opaque token"""
+    raw = f"{assessment.created_at.isoformat()}|{assessment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token, returning None if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, assessment_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(assessment_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+def get_history_page(user_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Return (assessments, next_cursor) for one page, newest first"""
+    limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+
+    query = Assessment.query.options(load_only(*SUMMARY_COLUMNS)).filter(
+        Assessment.user_id == user_id
+    )
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        # Seek past the last row of the previous page using the composite index
+        query = query.filter(tuple_(Assessment.created_at, Assessment.id) < position)
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(
+        Assessment.created_at.desc(), Assessment.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
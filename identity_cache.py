@@ -0,0 +1,111 @@
+"""
+Identity Cache for MindMetric AI
+Per-worker TTL cache that lets Flask-Login rehydrate users without a query
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from metrics import inc
+from app import db
+from db_routing import primary_reads
+from models import User
+
+# Seconds a cached identity is trusted; 0 disables the cache
+USER_CACHE_TTL = float(os.environ.get("USER_CACHE_TTL", "30"))
+
+# Upper bound on cached identities per worker
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+# user id -> when it was last invalidated, oldest first; only the last USER_CACHE_TTL seconds matter
+_invalidated = OrderedDict()
+
+
+class CachedUser(UserMixin):
+    """Detached snapshot of the User fields that routes and templates read"""
+
+    def __init__(self, id, name, age, email):
+        self.id = id
+        self.name = name
+        self.age = age
+        self.email = email
+
+    def __repr__(self):
+        return f"<CachedUser {self.id}>"
+
+
+def _fetch(user_id):
+    """Load only the identity columns (skips address and password_hash)"""
+    # Cached for USER_CACHE_TTL, so never from a lagging replica
+    with primary_reads():
+        row = db.session.query(User.id, User.name, User.age, User.email).filter(User.id == user_id).first()
+    return CachedUser(*row) if row else None
+
+
+def load_cached_user(user_id):
+    """Return the user for a session id, querying the DB only on a cache miss"""
+    if USER_CACHE_TTL <= 0:
+        return _fetch(user_id)
+
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(user_id)
+            inc('identity_cache_lookups', result='hit')
+            return entry[1]
+
+    inc('identity_cache_lookups', result='miss')
+
+    user = _fetch(user_id)
+    if user is not None:
+        with _lock:
+            if _invalidated.get(user_id, now - 1) >= now:
+                # A change committed while this was loading; the row read may predate it
+                return user
+            _entries[user_id] = (now + USER_CACHE_TTL, user)
+            _entries.move_to_end(user_id)
+            while len(_entries) > USER_CACHE_SIZE:
+                _entries.popitem(last=False)
+    return user
+
+
+def invalidate_user(user_id):
+    """Drop a cached identity so the next request reloads it"""
+    now = time.monotonic()
+    with _lock:
+        _entries.pop(user_id, None)
+        _invalidated.pop(user_id, None)
+        _invalidated[user_id] = now
+        while _invalidated and next(iter(_invalidated.values())) < now - USER_CACHE_TTL:
+            _invalidated.popitem(last=False)
+
+
+def clear():
+    """Drop every cached identity in this worker"""
+    with _lock:
+        _entries.clear()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _note_change(mapper, connection, target):
+    # Flushed, not yet committed: invalidating now would let a concurrent miss cache the old row again
+    object_session(target).info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    # Profile edits, password changes and deletions must not be served stale
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('changed_user_ids', None)
@@ -0,0 +1,4 @@
+"""
+Load-test harness for MindMetric AI
+fake_services provides local Gemini/Twilio/SendGrid stand-ins; run drives user flows
+"""
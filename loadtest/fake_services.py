@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the Gemini, Twilio and SendGrid HTTP APIs
+Each service runs on its own port with a configurable latency distribution and error
+rate; point the app at them with GEMINI_API_BASE_URL, TWILIO_API_BASE_URL and
+SENDGRID_API_HOST (see base_url_env). The Gemini stand-in also takes inline batch jobs
+(batchGenerateContent), which finish BATCH_SECONDS after they are created
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_SUMMARY = (
+    "**Overview:** Your responses suggest a moderate level of everyday stress.\n\n"
+    "**Strengths:** You show resilience and a willingness to reflect on how you feel.\n\n"
+    "**Suggestions:** Short daily breathing exercises and regular sleep can help.\n\n"
+    "*This is a load-test response from the local Gemini stand-in.*"
+)
+
+# How long a stand-in batch job reports itself running before its results are ready
+BATCH_SECONDS = 2.0
+
+_batch_jobs = {}
+_batch_lock = threading.Lock()
+
+
+class LatencyProfile:
+    """Log-normal latency around a median, plus a probability of failing the call"""
+
+    def __init__(self, median_ms, sigma=0.5, error_rate=0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+
+    @classmethod
+    def parse(cls, spec, error_rate=0.0):
+        """Build from 'MEDIAN_MS' or 'MEDIAN_MS:SIGMA'"""
+        median, _, sigma = spec.partition(':')
+        return cls(float(median), float(sigma) if sigma else 0.5, error_rate)
+
+    def sample_seconds(self):
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(random.gauss(0, self.sigma)) / 1000
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+
+def _not_found(path):
+    return 404, {'error': {'code': 404, 'message': f'Unknown path {path}', 'status': 'NOT_FOUND'}}
+
+
+def _content_response(body):
+    return {
+        'candidates': [{
+            'content': {'role': 'model', 'parts': [{'text': FAKE_SUMMARY}]},
+            'finishReason': 'STOP',
+            'index': 0,
+        }],
+        'usageMetadata': {'promptTokenCount': len(body) // 4, 'candidatesTokenCount': len(FAKE_SUMMARY) // 4},
+        'modelVersion': 'fake-gemini',
+    }
+
+
+def _create_batch(model, body, error_rate):
+    """Queue an inline batch job; each request fails on its own with the profile's error rate"""
+    batch = json.loads(body or b'{}').get('batch', {})
+    requests = batch.get('inputConfig', {}).get('requests', {}).get('requests', [])
+    results = []
+    for item in requests:
+        result = {'metadata': item['metadata']} if 'metadata' in item else {}
+        if random.random() < error_rate:
+            result['error'] = {'code': 500, 'message': 'Injected failure', 'status': 'INTERNAL'}
+        else:
+            result['response'] = _content_response(json.dumps(item.get('request', {})))
+        results.append(result)
+    name = f'batches/{uuid.uuid4().hex[:16]}'
+    with _batch_lock:
+        _batch_jobs[name] = {'model': f'models/{model}', 'displayName': batch.get('displayName', ''),
+                             'created': time.time(), 'results': results}
+    return 200, _batch_status(name)
+
+
+def _batch_status(name):
+    with _batch_lock:
+        job = _batch_jobs.get(name)
+    if job is None:
+        return None
+    metadata = {'@type': 'type.googleapis.com/google.ai.generativelanguage.v1beta.GenerateContentBatch',
+                'name': name, 'model': job['model'], 'displayName': job['displayName'],
+                'state': 'BATCH_STATE_RUNNING'}
+    if time.time() - job['created'] >= BATCH_SECONDS:
+        metadata['state'] = 'BATCH_STATE_SUCCEEDED'
+        metadata['output'] = {'inlinedResponses': {'inlinedResponses': job['results']}}
+    return {'name': name, 'metadata': metadata, 'done': metadata['state'] == 'BATCH_STATE_SUCCEEDED'}
+
+
+def gemini_response(method, path, body, profile):
+    if method == 'POST':
+        if re.search(r'/models/[^/]+:generateContent$', path):
+            return 200, _content_response(body)
+        match = re.search(r'/models/([^/]+):batchGenerateContent$', path)
+        if match:
+            return _create_batch(match.group(1), body, profile.error_rate)
+    else:
+        match = re.search(r'/(batches/[^/]+)$', path)
+        status = _batch_status(match.group(1)) if match else None
+        if status is not None:
+            return 200, status
+    return _not_found(path)
+
+
+def twilio_response(method, path, body, profile):
+    match = re.match(r'^/2010-04-01/Accounts/([^/]+)/Messages\.json$', path)
+    if method != 'POST' or not match:
+        return 404, {'code': 20404, 'message': 'The requested resource was not found', 'status': 404}
+    return 201, {
+        'sid': 'SM' + uuid.uuid4().hex,
+        'account_sid': match.group(1),
+        'status': 'queued',
+        'direction': 'outbound-api',
+        'num_segments': '1',
+        'date_created': time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime()),
+        'uri': path.replace('.json', f'/SM{uuid.uuid4().hex}.json'),
+    }
+
+
+def sendgrid_response(method, path, body, profile):
+    if method != 'POST' or path != '/v3/mail/send':
+        return 404, {'errors': [{'message': f'Unknown path {path}'}]}
+    return 202, None
+
+
+RESPONDERS = {
+    'gemini': (gemini_response, 500, {'error': {'code': 500, 'message': 'Injected failure', 'status': 'INTERNAL'}}),
+    'twilio': (twilio_response, 500, {'code': 20500, 'message': 'Injected failure', 'status': 500}),
+    'sendgrid': (sendgrid_response, 500, {'errors': [{'message': 'Injected failure'}]}),
+}
+
+
+def make_handler(service, profile, stats, lock):
+    respond, error_status, error_body = RESPONDERS[service]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            self._respond('POST', self.rfile.read(length) if length else b'')
+
+        def do_GET(self):
+            self._respond('GET', b'')
+
+        def _respond(self, method, body):
+            time.sleep(profile.sample_seconds())
+
+            if profile.should_fail():
+                status, payload = error_status, error_body
+            else:
+                status, payload = respond(method, self.path.split('?')[0], body, profile)
+            with lock:
+                stats[(service, status)] += 1
+
+            data = json.dumps(payload).encode('utf-8') if payload is not None else b''
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class FakeServices:
+    """Runs one stand-in HTTP server per service in background threads"""
+
+    def __init__(self, profiles, host='127.0.0.1', ports=None):
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self.servers = {}
+        for service, profile in profiles.items():
+            port = (ports or {}).get(service, 0)
+            server = ThreadingHTTPServer((host, port), make_handler(service, profile, self.stats, self._lock))
+            server.daemon_threads = True
+            self.servers[service] = server
+
+    def start(self):
+        for service, server in self.servers.items():
+            threading.Thread(target=server.serve_forever, name=f'fake-{service}', daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def url(self, service):
+        host, port = self.servers[service].server_address[:2]
+        return f'http://{host}:{port}'
+
+    def base_url_env(self):
+        """Environment that points the app's services at these stand-ins"""
+        env = {}
+        if 'gemini' in self.servers:
+            env.update(GEMINI_API_KEY='loadtest', GEMINI_API_BASE_URL=self.url('gemini'))
+        if 'twilio' in self.servers:
+            env.update(TWILIO_ACCOUNT_SID='AC' + '0' * 32, TWILIO_AUTH_TOKEN='loadtest',
+                       TWILIO_PHONE_NUMBER='+15005550006', TWILIO_API_BASE_URL=self.url('twilio'))
+        if 'sendgrid' in self.servers:
+            env.update(SENDGRID_API_KEY='SG.loadtest', SENDGRID_API_HOST=self.url('sendgrid'))
+        return env
+
+    def calls(self):
+        """Calls served so far as {service: {status: count}}"""
+        with self._lock:
+            summary = {}
+            for (service, status), count in self.stats.items():
+                summary.setdefault(service, {})[status] = count
+            return summary
+
+
+def add_profile_arguments(parser):
+    """Latency/error options shared by this script and loadtest.run"""
+    for service, default in (('gemini', '800:0.5'), ('twilio', '150:0.4'), ('sendgrid', '120:0.4')):
+        parser.add_argument(f'--{service}-latency', default=default, metavar='MEDIAN_MS[:SIGMA]',
+                            help=f'log-normal latency of the {service} stand-in (default {default})')
+        parser.add_argument(f'--{service}-errors', type=float, default=0.0, metavar='RATE',
+                            help=f'fraction of {service} calls answered with a 500')
+
+
+def profiles_from_args(args):
+    return {
+        service: LatencyProfile.parse(getattr(args, f'{service}_latency'), getattr(args, f'{service}_errors'))
+        for service in RESPONDERS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Gemini, Twilio and SendGrid stand-ins")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port-base', type=int, default=8701,
+                        help='gemini, twilio and sendgrid listen on this port and the next two')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    ports = {service: args.port_base + offset for offset, service in enumerate(RESPONDERS)}
+    services = FakeServices(profiles_from_args(args), args.host, ports).start()
+    print("Export these to point the app at the stand-ins:")
+    for key, value in services.base_url_env().items():
+        print(f"  export {key}={value}")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"calls so far: {services.calls()}")
+    except KeyboardInterrupt:
+        services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Load test for MindMetric AI
+Starts the Gemini/Twilio/SendGrid stand-ins, launches the app against them (or uses
+--target), and drives signup -> quiz -> result -> booking flows from many concurrent
+virtual users, then reports throughput and latency percentiles per route
+
+    python -m loadtest.run --users 50 --duration 60
+    python -m loadtest.run --server gunicorn --workers 2 --gemini-latency 1500:0.6 --gemini-errors 0.05
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+
+import httpx
+
+from loadtest.fake_services import FakeServices, add_profile_arguments, profiles_from_args
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PERSONALITY_ANSWERS = ['A', 'B', 'C', 'D', 'E']
+STRESS_ANSWERS = ['Low', 'Medium', 'High']
+SESSION_TIMES = [f'{hour:02d}:00' for hour in range(9, 18)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive realistic user flows against a local MindMetric AI")
+    parser.add_argument('--users', type=int, default=20, help='concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='seconds to run')
+    parser.add_argument('--think-ms', type=float, default=500, help='mean pause between a user\'s requests')
+    parser.add_argument('--server', choices=['uvicorn', 'gunicorn'], default='uvicorn',
+                        help='how to launch the app (ignored with --target)')
+    parser.add_argument('--workers', type=int, default=1, help='app worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gunicorn worker')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--target', help='base URL of an already running app; no app is launched')
+    parser.add_argument('--database-url', help='defaults to a fresh SQLite file')
+    parser.add_argument('--app-log', default=os.path.join(tempfile.gettempdir(), 'mindmetric_loadtest_app.log'))
+    add_profile_arguments(parser)
+    return parser.parse_args()
+
+
+class Recorder:
+    """Latencies and failures per route"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.outcomes = defaultdict(int)
+
+    async def request(self, client, route, method, url, expect, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.latencies[route].append(time.perf_counter() - started)
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append(time.perf_counter() - started)
+        if response.status_code not in expect:
+            self.errors[route] += 1
+        return response
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def think(args):
+    if args.think_ms > 0:
+        await asyncio.sleep(random.expovariate(1000 / args.think_ms))
+
+
+async def virtual_user(base_url, recorder, args, deadline):
+    """One user: sign up once, then repeat quiz -> result -> booking until the deadline"""
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        email = f"vu-{uuid.uuid4().hex[:12]}@loadtest.local"
+        response = await recorder.request(client, 'POST /signup', 'POST', '/signup', (302,), data={
+            'name': 'Load Test', 'age': str(random.randint(18, 70)), 'address': 'Loadtest Lane',
+            'email': email, 'password': 'loadtest',
+        })
+        if response is None or response.status_code != 302:
+            return
+
+        while time.monotonic() < deadline:
+            await recorder.request(client, 'GET /quiz', 'GET', '/quiz', (200,))
+            await think(args)
+
+            answers = {f'q{i}': random.choice(PERSONALITY_ANSWERS) for i in range(1, 11)}
+            answers.update({f'q{i}': random.choice(STRESS_ANSWERS) for i in range(11, 16)})
+            response = await recorder.request(client, 'POST /submit_quiz', 'POST', '/submit_quiz', (302,),
+                                              data=answers)
+            location = response.headers.get('Location', '') if response is not None else ''
+            if '/result/' in location:
+                await recorder.request(client, 'GET /result/<id>', 'GET', location, (200,))
+            await think(args)
+
+            await recorder.request(client, 'GET /book', 'GET', '/book', (200,))
+            await recorder.request(client, 'GET /api/availability', 'GET', '/api/availability', (200,))
+            await think(args)
+
+            session_date = date.today() + timedelta(days=random.randint(1, 59))
+            response = await recorder.request(client, 'POST /submit_booking', 'POST', '/submit_booking', (302,),
+                                              data={
+                                                  'date': session_date.isoformat(),
+                                                  'time': random.choice(SESSION_TIMES),
+                                                  'consultation_type': random.choice(['video', 'in-person']),
+                                                  'phone': '+15005550006',
+                                              })
+            location = response.headers.get('Location', '') if response is not None else ''
+            if '/booking_confirmation/' in location:
+                recorder.outcomes['bookings confirmed'] += 1
+                await recorder.request(client, 'GET /booking_confirmation/<id>', 'GET', location, (200,))
+            elif location:
+                # Slot already taken; the app sends the user back to /book
+                recorder.outcomes['bookings rejected (slot taken)'] += 1
+            recorder.outcomes['flows completed'] += 1
+            await think(args)
+
+
+async def run_users(base_url, args):
+    recorder = Recorder()
+    began = time.monotonic()
+    deadline = began + args.duration
+    await asyncio.gather(*(virtual_user(base_url, recorder, args, deadline) for _ in range(args.users)))
+    return recorder, time.monotonic() - began
+
+
+def launch_app(args, env):
+    """Start the app under uvicorn or gunicorn and wait until it answers"""
+    if args.server == 'uvicorn':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(args.port),
+                   '--workers', str(args.workers), '--log-level', 'warning']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', 'main:app', '--bind', f'127.0.0.1:{args.port}',
+                   '--workers', str(args.workers), '--threads', str(args.threads), '--worker-class', 'gthread']
+    log = open(args.app_log, 'w')
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f'http://127.0.0.1:{args.port}'
+    for _ in range(300):
+        if process.poll() is not None:
+            raise SystemExit(f"App exited during startup; see {args.app_log}")
+        try:
+            if httpx.get(base_url + '/login', timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"App did not start within 60s; see {args.app_log}")
+
+
+def report(recorder, elapsed, services):
+    print(f"\n{'route':<34} {'reqs':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    total = 0
+    for route, values in sorted(recorder.latencies.items()):
+        values = sorted(values)
+        total += len(values)
+        print(f"{route:<34} {len(values):>7} {recorder.errors[route]:>7} {len(values) / elapsed:>8.1f} "
+              f"{percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.9) * 1000:>8.1f} "
+              f"{percentile(values, 0.99) * 1000:>8.1f} {values[-1] * 1000:>8.1f}")
+    print(f"{'all routes':<34} {total:>7} {sum(recorder.errors.values()):>7} {total / elapsed:>8.1f}")
+
+    print()
+    for outcome, count in sorted(recorder.outcomes.items()):
+        print(f"{outcome}: {count}")
+    if services:
+        print(f"stand-in calls (service: {{status: count}}): {services.calls()}")
+
+
+def main():
+    args = parse_args()
+    services = None
+    process = None
+    try:
+        if args.target:
+            base_url = args.target.rstrip('/')
+        else:
+            services = FakeServices(profiles_from_args(args)).start()
+            env = dict(os.environ)
+            env.update(services.base_url_env())
+            env['DATABASE_URL'] = args.database_url or 'sqlite:///' + os.path.join(
+                tempfile.mkdtemp(prefix='mindmetric-loadtest-'), 'loadtest.db')
+            env.setdefault('SESSION_SECRET', 'loadtest')
+            process, base_url = launch_app(args, env)
+
+        print(f"{args.users} virtual users for {args.duration:.0f}s against {base_url}")
+        recorder, elapsed = asyncio.run(run_users(base_url, args))
+        report(recorder, elapsed, services)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if services:
+            services.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Metrics for MindMetric AI
+Low-overhead counters and latency histograms exposed in Prometheus text format
+With METRICS_DIR set, each worker process writes its snapshot to that directory and
+/metrics merges all of them, so counts cover every gunicorn/uvicorn worker
+(empty the directory when deploying, as snapshots of exited workers are kept)
+"""
+import atexit
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Shared directory for per-process snapshots; unset keeps metrics per process
+METRICS_DIR = os.environ.get("METRICS_DIR")
+
+# Seconds between snapshot writes in multiprocess mode
+METRICS_FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "5"))
+
+# Bearer token required by /metrics when set
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_owner_pid = None
+
+
+def _labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _check_process():
+    """Reset state inherited across fork and start this process's flush thread"""
+    global _owner_pid
+    pid = os.getpid()
+    if pid == _owner_pid:
+        return
+    with _lock:
+        if pid == _owner_pid:
+            return
+        # A forked worker must not report the parent's observations as its own
+        _histograms.clear()
+        _counters.clear()
+        _owner_pid = pid
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(flush)
+
+
+def _observe(name, key, seconds):
+    index = bisect_left(BUCKETS, seconds)
+    if _owner_pid != os.getpid():
+        _check_process()
+    with _lock:
+        histogram = _histograms.get((name, key))
+        if histogram is None:
+            # Bucket counts followed by the running sum
+            histogram = _histograms[(name, key)] = [0] * (len(BUCKETS) + 1) + [0.0]
+        histogram[index] += 1
+        histogram[-1] += seconds
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in a histogram"""
+    _observe(name, _labels_key(labels), seconds)
+
+
+def inc(name, amount=1, **labels):
+    """Increase a counter"""
+    key = (name, _labels_key(labels))
+    if _owner_pid != os.getpid():
+        _check_process()
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+class timer:
+    """Context manager that records the time spent in its block"""
+
+    __slots__ = ('name', 'key', 'started')
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.key = _labels_key(labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _observe(self.name, self.key, time.perf_counter() - self.started)
+
+
+def timed(name, **labels):
+    """Decorator that records every call of a sync or async function in a histogram"""
+    key = _labels_key(labels)
+
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _observe(name, key, time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _observe(name, key, time.perf_counter() - started)
+        return wrapper
+
+    return decorate
+
+
+def snapshot():
+    """Copy of this process's metrics in the on-disk snapshot format"""
+    with _lock:
+        return {
+            'histograms': [[name, list(key), values[:]] for (name, key), values in _histograms.items()],
+            'counters': [[name, list(key), value] for (name, key), value in _counters.items()],
+        }
+
+
+def flush():
+    """Write this process's snapshot to METRICS_DIR atomically"""
+    if not METRICS_DIR or _owner_pid != os.getpid():
+        return
+    path = os.path.join(METRICS_DIR, f"metrics-{os.getpid()}.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(snapshot(), file)
+    os.replace(tmp_path, path)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            flush()
+        except OSError as e:
+            logging.error(f"Failed to write metrics snapshot: {e}")
+
+
+def _merge(snapshots):
+    histograms = {}
+    counters = {}
+    for data in snapshots:
+        for name, key, values in data['histograms']:
+            key = (name, tuple(tuple(pair) for pair in key))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    merged[index] += value
+        for name, key, value in data['counters']:
+            key = (name, tuple(tuple(pair) for pair in key))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _collect():
+    """Snapshots from every worker in multiprocess mode, otherwise just this process"""
+    if not METRICS_DIR:
+        return [snapshot()]
+
+    flush()
+    snapshots = []
+    for filename in os.listdir(METRICS_DIR):
+        if not (filename.startswith('metrics-') and filename.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(METRICS_DIR, filename), encoding='utf-8') as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable metrics snapshot {filename}: {e}")
+    return snapshots
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = ((label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for label, value in pairs)
+    return '{' + ','.join(f'{label}="{value}"' for label, value in escaped) + '}'
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format (version 0.0.4)"""
+    histograms, counters = _merge(_collect())
+    lines = []
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (metric, key), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}_total{_format_labels(key)} {value}")
+
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, key), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ('+Inf',), values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(key)} {values[-1]}")
+            lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+
+    return '\n'.join(lines) + '\n'
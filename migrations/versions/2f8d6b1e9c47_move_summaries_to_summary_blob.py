@@ -0,0 +1,126 @@
+"""Move summaries to summary_blob
+
+Revision ID: 2f8d6b1e9c47
+Revises: 7c3a91d4e2b8
+Create Date: 2026-10-20 01:12:44.095318
+
+"""
+import hashlib
+import zlib
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f8d6b1e9c47'
+down_revision = '7c3a91d4e2b8'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+assessment = sa.table('assessment', sa.column('id', sa.Integer), sa.column('gemini_summary', sa.Text),
+                      sa.column('gemini_summary_html', sa.Text), sa.column('summary_sha256', sa.String))
+summary_blob = sa.table('summary_blob', sa.column('sha256', sa.String), sa.column('text_data', sa.LargeBinary),
+                        sa.column('html_data', sa.LargeBinary), sa.column('size', sa.Integer),
+                        sa.column('created_at', sa.DateTime))
+
+
+def _compress(text):
+    # Same as summary_store.compress with its zlib defaults; readers tell codecs apart themselves
+    return zlib.compress(text.encode('utf-8'), 9) if text is not None else None
+
+
+def _decompress(data):
+    if data is None:
+        return None
+    data = bytes(data)
+    if data[:4] == b'\x28\xb5\x2f\xfd':
+        # Written with SUMMARY_COMPRESSION=zstd after this revision
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def _batches(bind, select):
+    after_id = 0
+    while True:
+        rows = bind.execute(select, {'after_id': after_id}).all()
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if not inspector.has_table('summary_blob'):
+        op.create_table('summary_blob',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('text_data', sa.LargeBinary(), nullable=False),
+        sa.Column('html_data', sa.LargeBinary(), nullable=True),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+        )
+    columns = {column['name'] for column in inspector.get_columns('assessment')}
+    if 'gemini_summary' not in columns:
+        return
+
+    if 'summary_sha256' not in columns:
+        with op.batch_alter_table('assessment', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('summary_sha256', sa.String(length=64), nullable=True))
+            batch_op.create_foreign_key('assessment_summary_sha256_fkey', 'summary_blob',
+                                        ['summary_sha256'], ['sha256'])
+
+    # Rewrites every row: run in a maintenance window on large tables
+    select = sa.select(assessment.c.id, assessment.c.gemini_summary, assessment.c.gemini_summary_html).where(
+        assessment.c.id > sa.bindparam('after_id'), assessment.c.gemini_summary.isnot(None)
+    ).order_by(assessment.c.id).limit(BATCH_SIZE)
+    update = assessment.update().where(assessment.c.id == sa.bindparam('row_id')).values(
+        summary_sha256=sa.bindparam('key'))
+    stored = set()
+    now = datetime.utcnow()
+    for rows in _batches(bind, select):
+        keys = [hashlib.sha256(row[1].encode('utf-8')).hexdigest() for row in rows]
+        unseen = set(keys) - stored
+        if unseen:
+            stored.update(row[0] for row in bind.execute(
+                sa.select(summary_blob.c.sha256).where(summary_blob.c.sha256.in_(unseen))))
+        new = {}
+        for key, row in zip(keys, rows):
+            if key not in stored and key not in new:
+                new[key] = {'sha256': key, 'text_data': _compress(row[1]), 'html_data': _compress(row[2]),
+                            'size': len(row[1].encode('utf-8')), 'created_at': now}
+        if new:
+            bind.execute(summary_blob.insert(), list(new.values()))
+            stored.update(new)
+        bind.execute(update, [{'row_id': row[0], 'key': key} for key, row in zip(keys, rows)])
+
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.drop_column('gemini_summary_html')
+        batch_op.drop_column('gemini_summary')
+
+
+def downgrade():
+    bind = op.get_bind()
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gemini_summary', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('gemini_summary_html', sa.Text(), nullable=True))
+
+    select = sa.select(assessment.c.id, summary_blob.c.text_data, summary_blob.c.html_data).select_from(
+        assessment.join(summary_blob, summary_blob.c.sha256 == assessment.c.summary_sha256)
+    ).where(assessment.c.id > sa.bindparam('after_id')).order_by(assessment.c.id).limit(BATCH_SIZE)
+    update = assessment.update().where(assessment.c.id == sa.bindparam('row_id')).values(
+        gemini_summary=sa.bindparam('text'), gemini_summary_html=sa.bindparam('html'))
+    for rows in _batches(bind, select):
+        bind.execute(update, [{'row_id': row[0], 'text': _decompress(row[1]), 'html': _decompress(row[2])}
+                              for row in rows])
+
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.drop_constraint('assessment_summary_sha256_fkey', type_='foreignkey')
+        batch_op.drop_column('summary_sha256')
+    op.drop_table('summary_blob')
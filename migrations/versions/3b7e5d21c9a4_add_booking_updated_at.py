@@ -0,0 +1,34 @@
+"""Add booking updated_at
+
+Revision ID: 3b7e5d21c9a4
+Revises: f628b1043f04
+Create Date: 2026-10-19 17:12:40.113582
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e5d21c9a4'
+down_revision = 'f628b1043f04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py runs db.create_all() at startup, but that never adds columns to existing tables
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('booking')}
+    if 'updated_at' in columns:
+        return
+
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # Existing rows have not changed since they were created
+    op.execute("UPDATE booking SET updated_at = created_at")
+
+
+def downgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,40 @@
+"""Add booking active slot index
+
+Revision ID: 5e1f9a7c3b20
+Revises: 2f8d6b1e9c47
+Create Date: 2026-10-20 09:41:17.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1f9a7c3b20'
+down_revision = '2f8d6b1e9c47'
+branch_labels = None
+depends_on = None
+
+ACTIVE = "status IS NULL OR status <> 'cancelled'"
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, which creates the index along with a new table
+    if 'uq_booking_active_slot' in {index['name'] for index in sa.inspect(bind).get_indexes('booking')}:
+        return
+
+    duplicates = bind.execute(sa.text(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM booking WHERE {ACTIVE} "
+        f"GROUP BY psychologist_id, session_date, session_time HAVING COUNT(*) > 1) d"
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(f"{duplicates} slots have more than one active booking; cancel or move the extra "
+                           f"bookings before upgrading")
+
+    op.create_index('uq_booking_active_slot', 'booking', ['psychologist_id', 'session_date', 'session_time'],
+                    unique=True, postgresql_where=sa.text(ACTIVE), sqlite_where=sa.text(ACTIVE))
+
+
+def downgrade():
+    op.drop_index('uq_booking_active_slot', table_name='booking')
@@ -0,0 +1,39 @@
+"""Add quiz submissions
+
+Revision ID: 6a8f0b3d2e15
+Revises: 9d2c4e7a1f60
+Create Date: 2026-10-19 20:31:47.552903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a8f0b3d2e15'
+down_revision = '9d2c4e7a1f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if sa.inspect(op.get_bind()).has_table('quiz_submission'):
+        return
+
+    op.create_table('quiz_submission',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('assessment_id', sa.Integer(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'token', name='uq_quiz_submission_user_token')
+    )
+
+
+def downgrade():
+    op.drop_table('quiz_submission')
@@ -0,0 +1,83 @@
+"""Pack assessment responses
+
+Revision ID: 7c3a91d4e2b8
+Revises: b58e2f6c0a37
+Create Date: 2026-10-19 23:58:02.731460
+
+"""
+import json
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3a91d4e2b8'
+down_revision = 'b58e2f6c0a37'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# The packing as of this revision (response_codec.FIELDS); later changes to the codec need their own migration
+FIELDS = [(f'q{i}', ['A', 'B', 'C', 'D', 'E'], 3 * (i - 1), 3) for i in range(1, 11)]
+FIELDS += [(f'q{i}', ['Low', 'Medium', 'High'], 30 + 2 * (i - 11), 2) for i in range(11, 16)]
+
+
+def _pack(text):
+    try:
+        responses = json.loads(text) or {}
+    except (TypeError, ValueError):
+        return 0
+    packed = 0
+    for name, answers, offset, _ in FIELDS:
+        if responses.get(name) in answers:
+            packed |= (answers.index(responses[name]) + 1) << offset
+    return packed
+
+
+def _unpack(packed):
+    responses = {}
+    for name, answers, offset, width in FIELDS:
+        code = (packed >> offset) & ((1 << width) - 1)
+        responses[name] = answers[code - 1] if 0 < code <= len(answers) else None
+    return json.dumps(responses)
+
+
+def _convert(bind, source, target, convert):
+    """Rewrite one column from another in id-ordered batches"""
+    table = sa.table('assessment', sa.column('id', sa.Integer), sa.column(source), sa.column(target))
+    select = sa.select(table.c.id, table.c[source]).where(table.c.id > sa.bindparam('after_id')).order_by(
+        table.c.id).limit(BATCH_SIZE)
+    update = table.update().where(table.c.id == sa.bindparam('row_id')).values({target: sa.bindparam('value')})
+    after_id = 0
+    while True:
+        rows = bind.execute(select, {'after_id': after_id}).all()
+        if not rows:
+            return
+        bind.execute(update, [{'row_id': row[0], 'value': convert(row[1])} for row in rows])
+        after_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, which creates a new table with answers already
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('assessment')}
+    if 'responses' not in columns:
+        return
+
+    # A constant default keeps the add catalog-only on PostgreSQL (and it reaches every partition)
+    if 'answers' not in columns:
+        op.add_column('assessment', sa.Column('answers', sa.BigInteger(), nullable=False, server_default='0'))
+    # Rewrites every row: run in a maintenance window on large tables
+    _convert(bind, 'responses', 'answers', _pack)
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.drop_column('responses')
+
+
+def downgrade():
+    bind = op.get_bind()
+    op.add_column('assessment', sa.Column('responses', sa.Text(), nullable=False, server_default='{}'))
+    _convert(bind, 'answers', 'responses', _unpack)
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.alter_column('responses', server_default=None)
+        batch_op.drop_column('answers')
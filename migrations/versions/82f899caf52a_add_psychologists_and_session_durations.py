@@ -0,0 +1,79 @@
+"""Add psychologists and session durations
+
+Revision ID: 82f899caf52a
+Revises: 80a9d69c4dd3
+Create Date: 2026-10-19 10:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = '82f899caf52a'
+down_revision = '80a9d69c4dd3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if sa.inspect(bind).has_table('psychologist'):
+        psychologist = sa.table('psychologist',
+            sa.column('name'), sa.column('title'), sa.column('email'),
+            sa.column('session_minutes'), sa.column('work_start'), sa.column('work_end'),
+            sa.column('working_days'), sa.column('active'), sa.column('created_at'))
+    else:
+        psychologist = op.create_table('psychologist',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=True),
+        sa.Column('session_minutes', sa.Integer(), nullable=False),
+        sa.Column('work_start', sa.Time(), nullable=False),
+        sa.Column('work_end', sa.Time(), nullable=False),
+        sa.Column('working_days', sa.String(length=20), nullable=False),
+        sa.Column('active', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    # Existing bookings were all made with the original single psychologist
+    if bind.execute(sa.text("SELECT COUNT(*) FROM psychologist")).scalar() == 0:
+        op.bulk_insert(psychologist, [{
+            'name': 'Meghana KS',
+            'title': 'Licensed Clinical Psychologist',
+            'email': 'meghana@mindmetric.ai',
+            'session_minutes': 50,
+            'work_start': datetime.time(9, 0),
+            'work_end': datetime.time(18, 0),
+            # Bookings were accepted on every day of the week before practitioners existed
+            'working_days': '0,1,2,3,4,5,6',
+            'active': True,
+            'created_at': datetime.datetime.utcnow(),
+        }])
+
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('psychologist_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), nullable=False, server_default='50'))
+        batch_op.create_foreign_key('fk_booking_psychologist_id', 'psychologist', ['psychologist_id'], ['id'])
+        batch_op.create_index('ix_booking_session_date', ['session_date'], unique=False)
+        batch_op.create_index('ix_booking_psychologist_date', ['psychologist_id', 'session_date'], unique=False)
+
+    op.execute(
+        "UPDATE booking SET psychologist_id = (SELECT MIN(id) FROM psychologist) "
+        "WHERE psychologist_id IS NULL"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('booking', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_psychologist_date')
+        batch_op.drop_index('ix_booking_session_date')
+        batch_op.drop_constraint('fk_booking_psychologist_id', type_='foreignkey')
+        batch_op.drop_column('duration_minutes')
+        batch_op.drop_column('psychologist_id')
+
+    op.drop_table('psychologist')
@@ -0,0 +1,29 @@
+"""Add assessment summary_sha256 index
+
+Revision ID: 8b4c2e6f1a93
+Revises: 5e1f9a7c3b20
+Create Date: 2026-10-21 10:12:44.381902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4c2e6f1a93'
+down_revision = '5e1f9a7c3b20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, which creates the index along with a new table
+    if 'ix_assessment_summary_sha256' in {index['name'] for index in sa.inspect(bind).get_indexes('assessment')}:
+        return
+    # On the partitioned table this builds the index on every partition
+    op.create_index('ix_assessment_summary_sha256', 'assessment', ['summary_sha256'])
+
+
+def downgrade():
+    op.drop_index('ix_assessment_summary_sha256', table_name='assessment')
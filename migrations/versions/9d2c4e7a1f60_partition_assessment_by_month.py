@@ -0,0 +1,116 @@
+"""Partition assessment by month
+
+Revision ID: 9d2c4e7a1f60
+Revises: 3b7e5d21c9a4
+Create Date: 2026-10-19 19:02:11.408215
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2c4e7a1f60'
+down_revision = '3b7e5d21c9a4'
+branch_labels = None
+depends_on = None
+
+# Keep in step with archive_service.PARTITION_MONTHS_AHEAD
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.oid = to_regclass('assessment'))"
+    )).scalar()
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if not sa.inspect(bind).has_table('archived_partition'):
+        op.create_table('archived_partition',
+        sa.Column('name', sa.String(length=63), nullable=False),
+        sa.Column('range_start', sa.DateTime(), nullable=False),
+        sa.Column('range_end', sa.DateTime(), nullable=False),
+        sa.Column('path', sa.Text(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('min_id', sa.Integer(), nullable=True),
+        sa.Column('max_id', sa.Integer(), nullable=True),
+        sa.Column('block_index', sa.Text(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+    # Declarative partitioning is PostgreSQL-only; other databases keep the plain table
+    if bind.dialect.name != 'postgresql' or _is_partitioned(bind):
+        return
+
+    # Rewrites the whole table under an exclusive lock: run in a maintenance window
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('assessment', 'id')")).scalar()
+    op.execute("ALTER TABLE assessment RENAME TO assessment_unpartitioned")
+    op.execute("ALTER TABLE assessment_unpartitioned RENAME CONSTRAINT assessment_pkey "
+               "TO assessment_unpartitioned_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_assessment_user_created_id "
+               "RENAME TO ix_assessment_unpartitioned_user_created_id")
+    op.execute("UPDATE assessment_unpartitioned SET created_at = now() AT TIME ZONE 'utc' "
+               "WHERE created_at IS NULL")
+
+    # LIKE copies every current column and default (including id's nextval); the
+    # partition key has to be part of the primary key
+    op.execute("CREATE TABLE assessment (LIKE assessment_unpartitioned INCLUDING DEFAULTS) "
+               "PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE assessment ALTER COLUMN created_at SET NOT NULL")
+    op.execute("ALTER TABLE assessment ADD CONSTRAINT assessment_pkey PRIMARY KEY (id, created_at)")
+    op.execute('ALTER TABLE assessment ADD CONSTRAINT assessment_user_id_fkey '
+               'FOREIGN KEY (user_id) REFERENCES "user" (id)')
+    op.execute("CREATE INDEX ix_assessment_user_created_id ON assessment (user_id, created_at, id) "
+               "INCLUDE (stress_score, ml_prediction)")
+    if sequence:
+        # Otherwise dropping the old table would drop the id sequence with it
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY assessment.id")
+
+    first = bind.execute(sa.text("SELECT min(created_at) FROM assessment_unpartitioned")).scalar()
+    now = datetime.utcnow()
+    month = datetime((first or now).year, (first or now).month, 1)
+    last = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last:
+        op.execute(f"CREATE TABLE assessment_p{month.year:04d}_{month.month:02d} PARTITION OF assessment "
+                   f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')")
+        month = _add_months(month, 1)
+    # Catches rows outside the prepared months; archive_assessments.py keeps it empty
+    op.execute("CREATE TABLE assessment_default PARTITION OF assessment DEFAULT")
+
+    op.execute("INSERT INTO assessment SELECT * FROM assessment_unpartitioned")
+    op.execute("DROP TABLE assessment_unpartitioned")
+    op.execute("ANALYZE assessment")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql' and _is_partitioned(bind):
+        # Rows already moved to archive files are not brought back
+        sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('assessment', 'id')")).scalar()
+        op.execute("ALTER TABLE assessment RENAME TO assessment_partitioned")
+        op.execute("ALTER TABLE assessment_partitioned RENAME CONSTRAINT assessment_pkey "
+                   "TO assessment_partitioned_pkey")
+        op.execute("ALTER INDEX ix_assessment_user_created_id RENAME TO ix_assessment_partitioned_user_created_id")
+        op.execute("CREATE TABLE assessment (LIKE assessment_partitioned INCLUDING DEFAULTS)")
+        op.execute("ALTER TABLE assessment ADD CONSTRAINT assessment_pkey PRIMARY KEY (id)")
+        op.execute('ALTER TABLE assessment ADD CONSTRAINT assessment_user_id_fkey '
+                   'FOREIGN KEY (user_id) REFERENCES "user" (id)')
+        if sequence:
+            op.execute(f"ALTER SEQUENCE {sequence} OWNED BY assessment.id")
+        op.execute("INSERT INTO assessment SELECT * FROM assessment_partitioned")
+        op.execute("DROP TABLE assessment_partitioned CASCADE")
+        op.execute("CREATE INDEX ix_assessment_user_created_id ON assessment (user_id, created_at, id) "
+                   "INCLUDE (stress_score, ml_prediction)")
+    op.drop_table('archived_partition')
@@ -0,0 +1,33 @@
+"""Add assessment summary html
+
+Revision ID: b58e2f6c0a37
+Revises: e41b7c9a5d02
+Create Date: 2026-10-19 22:40:19.963051
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b58e2f6c0a37'
+down_revision = 'e41b7c9a5d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py runs db.create_all() at startup, but that never adds columns to existing tables
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('assessment')}
+    if 'gemini_summary_html' in columns:
+        return
+
+    # Nullable with no default, so this is a catalog-only change on PostgreSQL (and reaches every partition)
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('gemini_summary_html', sa.Text(), nullable=True))
+    # Populate with: python backfill_summary_html.py
+
+
+def downgrade():
+    with op.batch_alter_table('assessment', schema=None) as batch_op:
+        batch_op.drop_column('gemini_summary_html')
@@ -0,0 +1,40 @@
+"""Add assessment history index
+
+Revision ID: ca31c8eca3c2
+Revises: 82f899caf52a
+Create Date: 2026-10-19 13:40:07.218954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ca31c8eca3c2'
+down_revision = '82f899caf52a'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_assessment_user_created_id'
+
+
+def upgrade():
+    bind = op.get_bind()
+    # app.py runs db.create_all() at startup, so a fresh database may already have it
+    existing = {index['name'] for index in sa.inspect(bind).get_indexes('assessment')}
+    if INDEX_NAME in existing:
+        return
+
+    if bind.dialect.name == 'postgresql':
+        # Build without locking writes; the INCLUDE columns make history pages index-only
+        with op.get_context().autocommit_block():
+            op.create_index(INDEX_NAME, 'assessment', ['user_id', 'created_at', 'id'],
+                            unique=False,
+                            postgresql_include=['stress_score', 'ml_prediction'],
+                            postgresql_concurrently=True)
+    else:
+        op.create_index(INDEX_NAME, 'assessment', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name='assessment')
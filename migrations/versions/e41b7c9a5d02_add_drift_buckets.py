@@ -0,0 +1,34 @@
+"""Add drift buckets
+
+Revision ID: e41b7c9a5d02
+Revises: 6a8f0b3d2e15
+Create Date: 2026-10-19 21:48:03.117460
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41b7c9a5d02'
+down_revision = '6a8f0b3d2e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if sa.inspect(op.get_bind()).has_table('drift_bucket'):
+        return
+
+    op.create_table('drift_bucket',
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('observations', sa.Integer(), nullable=False),
+    sa.Column('counts', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('bucket_start')
+    )
+
+
+def downgrade():
+    op.drop_table('drift_bucket')
@@ -0,0 +1,41 @@
+"""Add stress trend rollups
+
+Revision ID: f628b1043f04
+Revises: ca31c8eca3c2
+Create Date: 2026-10-19 16:05:52.840311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f628b1043f04'
+down_revision = 'ca31c8eca3c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # app.py runs db.create_all() at startup, so the table may already exist
+    if sa.inspect(op.get_bind()).has_table('stress_trend'):
+        return
+
+    op.create_table('stress_trend',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('assessment_count', sa.Integer(), nullable=False),
+    sa.Column('mean_score', sa.Float(), nullable=False),
+    sa.Column('ewma_score', sa.Float(), nullable=False),
+    sa.Column('last_score', sa.Float(), nullable=True),
+    sa.Column('recent_scores', sa.Text(), nullable=False),
+    sa.Column('prediction_counts', sa.Text(), nullable=False),
+    sa.Column('last_assessment_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    # Populate with: python backfill_trends.py
+
+
+def downgrade():
+    op.drop_table('stress_trend')
@@ -4,6 +4,7 @@ import pandas as pd
 import os
 from sklearn.preprocessing import LabelEncoder
 import logging
+from metrics import timed
 
 def load_model_and_encoders():
     """Load the trained ML model and encoders"""
@@ -38,6 +39,7 @@ def calculate_stress_score(stress_responses):
     
     return round(normalized_score, 2)
 
+@timed('quiz_stage_seconds', stage='predict')
 def predict_content_type(responses, stress_score):
     """Predict ideal content type based on user responses"""
     model, encoders = load_model_and_encoders()
@@ -81,6 +83,47 @@ def prepare_features(responses, stress_score, encoders):
     
     return features
 
+def prepare_feature_matrix(responses_list, stress_scores, encoders):
+    """Vectorized prepare_features for many assessments; returns (features, valid rows)
+
+    Rows with an answer the encoders don't know are marked invalid, where
+    predict_content_type would have fallen back for that assessment
+    """
+    count = len(responses_list)
+    features = np.zeros((count, 13))
+    valid = np.ones(count, dtype=bool)
+
+    for i in range(1, 11):
+        key = f'q{i}'
+        answers = [responses.get(key, 'A') for responses in responses_list]
+        if key in encoders:
+            codes = {answer: code for code, answer in enumerate(encoders[key].classes_)}
+            column = np.array([codes.get(answer, -1) for answer in answers])
+        else:
+            column = np.array([ord(answer) - ord('A') if isinstance(answer, str) and len(answer) == 1 else -1
+                               for answer in answers])
+        valid &= column >= 0
+        features[:, i - 1] = column
+
+    features[:, 10] = stress_scores
+    features[:, 11] = [sum(1 for r in responses.values() if r in ['D', 'E']) for responses in responses_list]
+    features[:, 12] = [sum(1 for r in responses.values() if r in ['A', 'B']) for responses in responses_list]
+    return features, valid
+
+def predict_content_types(responses_list, stress_scores, model, encoders):
+    """Batch version of predict_content_type with an already loaded model"""
+    if model is None or encoders is None:
+        return [get_fallback_prediction(score) for score in stress_scores]
+
+    features, valid = prepare_feature_matrix(responses_list, stress_scores, encoders)
+    predictions = [None] * len(responses_list)
+    if valid.any():
+        for index, prediction in zip(np.flatnonzero(valid), model.predict(features[valid])):
+            predictions[index] = str(prediction)
+    for index in np.flatnonzero(~valid):
+        predictions[index] = get_fallback_prediction(stress_scores[index])
+    return predictions
+
 def get_fallback_prediction(stress_score):
     """Enhanced fallback prediction based on stress score and research"""
     # More sophisticated prediction based on psychological research
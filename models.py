@@ -1,6 +1,8 @@
 from app import db
 from flask_login import UserMixin
-from datetime import datetime
+from datetime import datetime, time
+from response_codec import decode_responses, encode_responses, responses_from_json
+from summary_store import decompress, store_summary
 
 
 class User(UserMixin, db.Model):
@@ -15,24 +17,116 @@ class User(UserMixin, db.Model):
     # Relationships
     assessments = db.relationship('Assessment', backref='user', lazy=True)
     bookings = db.relationship('Booking', backref='user', lazy=True)
+    stress_trend = db.relationship('StressTrend', backref='user', lazy=True, uselist=False)
+
+
+class SummaryBlob(db.Model):
+    sha256 = db.Column(db.String(64), primary_key=True)  # of the uncompressed text
+    text_data = db.Column(db.LargeBinary, nullable=False)  # compressed by summary_store
+    html_data = db.Column(db.LargeBinary, nullable=True)
+    size = db.Column(db.Integer, nullable=False)  # uncompressed bytes of the text
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
 class Assessment(db.Model):
+    __table_args__ = (
+        # Keyset pagination of a user's history; covers the list columns on Postgres
+        db.Index('ix_assessment_user_created_id', 'user_id', 'created_at', 'id',
+                 postgresql_include=['stress_score', 'ml_prediction']),
+        # Finds the assessments of a blob, for the unreferenced-blob sweep and its foreign key check
+        db.Index('ix_assessment_summary_sha256', 'summary_sha256'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     stress_score = db.Column(db.Float, nullable=False)
     ml_prediction = db.Column(db.String(100), nullable=False)
-    gemini_summary = db.Column(db.Text, nullable=True)
-    responses = db.Column(db.Text,
-                          nullable=False)  # JSON string of all responses
+    # The summary lives in summary_blob, shared by every assessment with the same text;
+    # read and write it through `gemini_summary`
+    summary_sha256 = db.Column(db.String(64), db.ForeignKey('summary_blob.sha256'), nullable=True)
+    # Q1-Q15 packed by response_codec (40 bits); read and write them through `responses`
+    answers = db.Column(db.BigInteger, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    summary_blob = db.relationship('SummaryBlob', lazy=True)
+
+    @property
+    def gemini_summary(self):
+        return decompress(self.summary_blob.text_data) if self.summary_blob else None
+
+    @gemini_summary.setter
+    def gemini_summary(self, text):
+        self.summary_blob = store_summary(text)
+
+    @property
+    def gemini_summary_html(self):
+        # Rendered by summary_formatter once per distinct summary
+        return decompress(self.summary_blob.html_data) if self.summary_blob else None
+
+    @property
+    def responses(self):
+        return decode_responses(self.answers)
+
+    @responses.setter
+    def responses(self, value):
+        # Also takes the JSON strings older code and archive files carry
+        self.answers = responses_from_json(value) if isinstance(value, str) else encode_responses(value)
+
+
+class StressTrend(db.Model):
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    assessment_count = db.Column(db.Integer, nullable=False, default=0)
+    mean_score = db.Column(db.Float, nullable=False, default=0.0)
+    ewma_score = db.Column(db.Float, nullable=False, default=0.0)
+    last_score = db.Column(db.Float, nullable=True)
+    recent_scores = db.Column(db.Text, nullable=False,
+                              default='[]')  # JSON list, oldest first
+    prediction_counts = db.Column(db.Text, nullable=False,
+                                  default='{}')  # JSON object of prediction -> count
+    last_assessment_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class Psychologist(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    title = db.Column(db.String(100),
+                      nullable=False,
+                      default='Licensed Clinical Psychologist')
+    email = db.Column(db.String(120), nullable=True)
+    session_minutes = db.Column(db.Integer, nullable=False, default=50)
+    work_start = db.Column(db.Time, nullable=False, default=time(9, 0))
+    work_end = db.Column(db.Time, nullable=False, default=time(18, 0))
+    working_days = db.Column(db.String(20),
+                             nullable=False,
+                             default='0,1,2,3,4,5')  # Monday=0 ... Sunday=6
+    active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    bookings = db.relationship('Booking', backref='psychologist', lazy=True)
+
 
 class Booking(db.Model):
+    __table_args__ = (
+        db.Index('ix_booking_session_date', 'session_date'),
+        db.Index('ix_booking_psychologist_date', 'psychologist_id',
+                 'session_date'),
+        # Two active bookings can never start at the same time with the same practitioner
+        db.Index('uq_booking_active_slot', 'psychologist_id', 'session_date',
+                 'session_time', unique=True,
+                 postgresql_where=db.text("status IS NULL OR status <> 'cancelled'"),
+                 sqlite_where=db.text("status IS NULL OR status <> 'cancelled'")),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    psychologist_id = db.Column(db.Integer,
+                                db.ForeignKey('psychologist.id'),
+                                nullable=True)
     session_date = db.Column(db.Date, nullable=False)
     session_time = db.Column(db.Time, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=50)
     consultation_type = db.Column(db.String(50),
                                   nullable=False,
                                   default='video')  # 'video' or 'in-person'
@@ -43,3 +137,48 @@ class Booking(db.Model):
     notification_sent = db.Column(db.Boolean, default=False)
     psychologist_notified = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Version for the confirmation page's ETag and cached fragment
+    updated_at = db.Column(db.DateTime,
+                           default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+
+
+class ArchivedPartition(db.Model):
+    """A monthly assessment partition moved out of PostgreSQL into a gzip file"""
+    name = db.Column(db.String(63), primary_key=True)
+    range_start = db.Column(db.DateTime, nullable=False)
+    range_end = db.Column(db.DateTime, nullable=False)
+    path = db.Column(db.Text, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    min_id = db.Column(db.Integer, nullable=True)
+    max_id = db.Column(db.Integer, nullable=True)
+    block_index = db.Column(db.Text, nullable=False,
+                            default='[]')  # JSON list of [first id, byte offset, byte length]
+    sha256 = db.Column(db.String(64), nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class QuizSubmission(db.Model):
+    """Idempotency claim for one quiz form; the unique key makes the claim atomic across workers"""
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'token', name='uq_quiz_submission_user_token'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    token = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False,
+                       default='pending')  # 'pending', 'done' or 'failed'
+    # No foreign key: on PostgreSQL assessment's primary key is (id, created_at)
+    assessment_id = db.Column(db.Integer, nullable=True)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+
+class DriftBucket(db.Model):
+    """Answer, score and prediction histograms for one time bucket, summed over all workers"""
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    observations = db.Column(db.Integer, nullable=False, default=0)
+    counts = db.Column(db.Text, nullable=False,
+                       default='{}')  # JSON object of histogram name -> counts (see drift_monitor.LAYOUT)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -3,11 +3,15 @@ Notification Service for MindMetric AI
 Handles WhatsApp and Email notifications for booking confirmations
 """
 import os
+import asyncio
 import logging
 from datetime import datetime
+from urllib.parse import urlsplit
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from metrics import timed
 
 # Configuration
 TWILIO_ACCOUNT_SID = os.environ.get("TWILIO_ACCOUNT_SID")
@@ -15,14 +19,41 @@ TWILIO_AUTH_TOKEN = os.environ.get("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.environ.get("TWILIO_PHONE_NUMBER")
 SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY")
 
-def send_whatsapp_notification(to_phone, user_name, session_date, session_time, consultation_type):
+# Provider endpoints can be pointed elsewhere, e.g. at the stand-ins in loadtest/fake_services.py
+TWILIO_API_BASE_URL = os.environ.get("TWILIO_API_BASE_URL")
+SENDGRID_API_HOST = os.environ.get("SENDGRID_API_HOST", "https://api.sendgrid.com")
+
+# Seconds submit_booking waits for all notifications combined
+NOTIFICATION_DEADLINE_SECONDS = float(os.environ.get("NOTIFICATION_DEADLINE_SECONDS", "10"))
+
+# Used for bookings that have no assigned psychologist
+DEFAULT_PSYCHOLOGIST_NAME = os.environ.get("DEFAULT_PSYCHOLOGIST_NAME", "Meghana KS")
+DEFAULT_PSYCHOLOGIST_EMAIL = os.environ.get("DEFAULT_PSYCHOLOGIST_EMAIL", "meghana@mindmetric.ai")
+
+class RedirectingTwilioHttpClient(TwilioHttpClient):
+    """Twilio HTTP client that sends every API call to TWILIO_API_BASE_URL"""
+
+    def request(self, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        url = TWILIO_API_BASE_URL.rstrip('/') + parts.path + (f'?{parts.query}' if parts.query else '')
+        return super().request(method, url, *args, **kwargs)
+
+def get_twilio_client():
+    """Twilio client for the configured endpoint"""
+    if TWILIO_API_BASE_URL:
+        return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=RedirectingTwilioHttpClient())
+    return Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+
+@timed('notification_seconds', channel='whatsapp')
+def send_whatsapp_notification(to_phone, user_name, session_date, session_time, consultation_type,
+                               psychologist_name=DEFAULT_PSYCHOLOGIST_NAME):
     """Send WhatsApp notification for booking confirmation"""
     try:
         if not all([TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER]):
             logging.warning("Twilio credentials not configured")
             return False
 
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        client = get_twilio_client()
 
         # Format message
         message_body = f"""
@@ -33,7 +64,7 @@ Hello {user_name}! Your psychology session has been successfully booked.
 📅 *Date:* {session_date.strftime('%B %d, %Y')}
 🕐 *Time:* {session_time.strftime('%I:%M %p')}
 💬 *Type:* {consultation_type.title()}
-👩‍⚕️ *Psychologist:* Meghana KS
+👩‍⚕️ *Psychologist:* {psychologist_name}
 
 {"📞 *Meeting:* Video call link will be sent 30 minutes before session" if consultation_type == 'video' else "🏥 *Location:* MindMetric AI Clinic, Bangalore"}
 
@@ -61,14 +92,16 @@ _This is an automated message. Reply STOP to opt out._
         logging.error(f"Failed to send WhatsApp notification: {e}")
         return False
 
-def send_email_notification(to_email, user_name, session_date, session_time, consultation_type):
+@timed('notification_seconds', channel='email')
+def send_email_notification(to_email, user_name, session_date, session_time, consultation_type,
+                            psychologist_name=DEFAULT_PSYCHOLOGIST_NAME):
     """Send email notification for booking confirmation"""
     try:
         if not SENDGRID_API_KEY:
             logging.warning("SendGrid API key not configured")
             return False
 
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
+        sg = SendGridAPIClient(SENDGRID_API_KEY, host=SENDGRID_API_HOST)
 
         # HTML email template
         html_content = f"""
@@ -113,7 +146,7 @@ def send_email_notification(to_email, user_name, session_date, session_time, con
                     </div>
                     <div class="detail-item">
                         <span class="label">👩‍⚕️ Psychologist:</span>
-                        <span class="value">Meghana KS, Licensed Clinical Psychologist</span>
+                        <span class="value">{psychologist_name}, Licensed Clinical Psychologist</span>
                     </div>
                 </div>
 
@@ -156,7 +189,7 @@ def send_email_notification(to_email, user_name, session_date, session_time, con
         Date: {session_date.strftime('%A, %B %d, %Y')}
         Time: {session_time.strftime('%I:%M %p')}
         Type: {consultation_type.title()}
-        Psychologist: Meghana KS
+        Psychologist: {psychologist_name}
 
         {"Video call link will be sent 30 minutes before your session." if consultation_type == 'video' else "Location: MindMetric AI Clinic, Bangalore"}
 
@@ -187,6 +220,7 @@ def send_email_notification(to_email, user_name, session_date, session_time, con
         logging.error(f"Failed to send email notification: {e}")
         return False
 
+@timed('notification_seconds', channel='psychologist')
 def notify_psychologist(booking_data):
     """Send notification to psychologist about new booking"""
     try:
@@ -194,7 +228,7 @@ def notify_psychologist(booking_data):
             logging.warning("SendGrid API key not configured")
             return False
 
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
+        sg = SendGridAPIClient(SENDGRID_API_KEY, host=SENDGRID_API_HOST)
 
         html_content = f"""
         <!DOCTYPE html>
@@ -212,7 +246,7 @@ def notify_psychologist(booking_data):
                 <h2>New Booking Alert - MindMetric AI</h2>
             </div>
             <div class="content">
-                <p>Dear Meghana,</p>
+                <p>Dear {booking_data['psychologist_name'].split()[0]},</p>
                 <p>A new psychology session has been booked through MindMetric AI.</p>
 
                 <div class="booking-info">
@@ -223,6 +257,7 @@ def notify_psychologist(booking_data):
                     <p><strong>Date:</strong> {booking_data['session_date'].strftime('%A, %B %d, %Y')}</p>
                     <p><strong>Time:</strong> {booking_data['session_time'].strftime('%I:%M %p')}</p>
                     <p><strong>Type:</strong> {booking_data['consultation_type'].title()}</p>
+                    <p><strong>Duration:</strong> {booking_data['duration_minutes']} minutes</p>
                     <p><strong>Booking ID:</strong> #{booking_data['booking_id']}</p>
                 </div>
 
@@ -236,7 +271,7 @@ def notify_psychologist(booking_data):
 
         message = Mail(
             from_email='system@mindmetric.ai',
-            to_emails='meghana@mindmetric.ai',  # Psychologist's email
+            to_emails=booking_data['psychologist_email'],  # Psychologist's email
             subject=f'New Booking Alert - {booking_data["session_date"].strftime("%B %d, %Y")}',
             html_content=html_content
         )
@@ -249,32 +284,34 @@ def notify_psychologist(booking_data):
         logging.error(f"Failed to send psychologist notification: {e}")
         return False
 
-def send_booking_notifications(booking, user):
-    """Send all booking notifications (WhatsApp, Email, Psychologist)"""
-    results = {
-        'whatsapp': False,
-        'email': False,
-        'psychologist': False
-    }
+def _notification_jobs(booking, user):
+    """Build the (function, args) pair for each notification of a booking"""
+    psychologist = booking.psychologist
+    psychologist_name = psychologist.name if psychologist else DEFAULT_PSYCHOLOGIST_NAME
+    psychologist_email = (psychologist.email if psychologist else None) or DEFAULT_PSYCHOLOGIST_EMAIL
+
+    jobs = {}
 
     # Send WhatsApp notification to user
     if booking.phone_number:
-        results['whatsapp'] = send_whatsapp_notification(
+        jobs['whatsapp'] = (send_whatsapp_notification, (
             booking.phone_number,
             user.name,
             booking.session_date,
             booking.session_time,
-            booking.consultation_type
-        )
+            booking.consultation_type,
+            psychologist_name
+        ))
 
     # Send email notification to user
-    results['email'] = send_email_notification(
+    jobs['email'] = (send_email_notification, (
         user.email,
         user.name,
         booking.session_date,
         booking.session_time,
-        booking.consultation_type
-    )
+        booking.consultation_type,
+        psychologist_name
+    ))
 
     # Send notification to psychologist
     booking_data = {
@@ -284,8 +321,48 @@ def send_booking_notifications(booking, user):
         'session_date': booking.session_date,
         'session_time': booking.session_time,
         'consultation_type': booking.consultation_type,
-        'booking_id': booking.id
+        'duration_minutes': booking.duration_minutes,
+        'booking_id': booking.id,
+        'psychologist_name': psychologist_name,
+        'psychologist_email': psychologist_email
+    }
+    jobs['psychologist'] = (notify_psychologist, (booking_data,))
+
+    return jobs
+
+def send_booking_notifications(booking, user):
+    """Send all booking notifications (WhatsApp, Email, Psychologist)"""
+    results = {
+        'whatsapp': False,
+        'email': False,
+        'psychologist': False
+    }
+
+    for name, (send, args) in _notification_jobs(booking, user).items():
+        results[name] = send(*args)
+
+    return results
+
+@timed('booking_stage_seconds', stage='notify')
+async def send_booking_notifications_async(booking, user, timeout=NOTIFICATION_DEADLINE_SECONDS):
+    """Send all booking notifications concurrently, giving up on any still running at the deadline"""
+    results = {
+        'whatsapp': False,
+        'email': False,
+        'psychologist': False
+    }
+
+    # The Twilio and SendGrid SDKs are blocking, so each send runs in its own thread
+    jobs = await asyncio.to_thread(_notification_jobs, booking, user)
+    tasks = {
+        asyncio.ensure_future(asyncio.to_thread(send, *args)): name
+        for name, (send, args) in jobs.items()
     }
-    results['psychologist'] = notify_psychologist(booking_data)
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+
+    for task in done:
+        results[tasks[task]] = task.result()
+    for task in pending:
+        logging.warning(f"{tasks[task]} notification still running after {timeout}s; not waiting for it")
 
     return results
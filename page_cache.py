@@ -0,0 +1,88 @@
+"""
+Page Cache for MindMetric AI
+Conditional-request helpers and a per-worker cache of rendered page fragments
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from flask import make_response, request, session
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+
+# Bump after changing a cached template so old ETags and fragments stop matching
+PAGE_CACHE_VERSION = os.environ.get("PAGE_CACHE_VERSION", "3")
+
+# Upper bound on rendered fragments kept per worker
+FRAGMENT_CACHE_SIZE = int(os.environ.get("FRAGMENT_CACHE_SIZE", "2000"))
+
+_lock = threading.Lock()
+_fragments = OrderedDict()
+
+
+def page_etag(kind, row_id, version, user, revision=''):
+    """Strong ETag for a page built from one row at one version, as seen by one user
+
+    revision covers columns that can change without moving the version timestamp
+    """
+    # The navbar shows the user's name, so it is part of the representation
+    raw = f"{PAGE_CACHE_VERSION}:{kind}:{row_id}:{version.isoformat()}:{revision}:{user.id}:{user.name}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+def _http_date(version):
+    """Stored timestamps are naive UTC; HTTP dates need an aware second-precision value"""
+    return version.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def conditional_page(etag, version, render_page):
+    """Answer with a 304 when the client already holds this page, otherwise render it with validators"""
+    if session.get('_flashes'):
+        # A pending flash is rendered into the page, so this copy must never be revalidated
+        response = make_response(render_page())
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    if not is_resource_modified(request.environ, etag=etag, last_modified=_http_date(version)):
+        return _add_validators(make_response('', 304), etag, version)
+    return _add_validators(make_response(render_page()), etag, version)
+
+
+def _add_validators(response, etag, version):
+    response.set_etag(etag)
+    response.last_modified = _http_date(version)
+    # Browsers keep the page but always revalidate; shared caches never store it
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cached_fragment(kind, row_id, version, render):
+    """Return the rendered fragment for a row version, calling render() only on a miss"""
+    key = (kind, row_id, version, PAGE_CACHE_VERSION)
+    with _lock:
+        html = _fragments.get(key)
+        if html is not None:
+            _fragments.move_to_end(key)
+            return html
+
+    html = Markup(render())
+    with _lock:
+        _fragments[key] = html
+        _fragments.move_to_end(key)
+        while len(_fragments) > FRAGMENT_CACHE_SIZE:
+            _fragments.popitem(last=False)
+    return html
+
+
+def invalidate_fragments(kind, row_id):
+    """Drop every cached version of a row's fragment in this worker"""
+    with _lock:
+        for key in [key for key in _fragments if key[0] == kind and key[1] == row_id]:
+            del _fragments[key]
+
+
+def clear():
+    """Drop every cached fragment in this worker"""
+    with _lock:
+        _fragments.clear()
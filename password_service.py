@@ -0,0 +1,112 @@
+"""
+Password Service for MindMetric AI
+Hashes and checks passwords with werkzeug in a small bounded thread pool: hashlib's
+scrypt and PBKDF2 release the GIL, so the pool uses the cores without every request
+thread hashing at once, and a login storm past the queue limit is turned away at once
+(PasswordHashBusy, a 503) instead of piling up. Hashes made with an older method or
+cost are replaced at the next successful login
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from metrics import inc, timed
+
+# werkzeug method and cost for new hashes: scrypt:N:r:p or pbkdf2:HASH:ITERATIONS
+PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+
+# Threads hashing at once per worker (each scrypt hash at the default cost holds 32 MiB); 0 hashes inline
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Hashes allowed to wait for a thread before further logins and signups get a 503
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", str(4 * max(PASSWORD_HASH_WORKERS, 1))))
+
+
+class PasswordHashBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+def normalize_method(method):
+    """The method prefix werkzeug writes into a hash, defaults filled in"""
+    name, *args = method.split(':')
+    if name == 'scrypt' and len(args) in (0, 3):
+        n, r, p = map(int, args or (2 ** 15, 8, 1))
+        return f"scrypt:{n}:{r}:{p}"
+    if name == 'pbkdf2' and len(args) <= 2:
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Unsupported password hash method {method!r}")
+
+
+try:
+    HASH_METHOD = normalize_method(PASSWORD_HASH_METHOD)
+except ValueError as e:
+    logging.warning(f"{e}; hashing passwords with werkzeug's default scrypt")
+    HASH_METHOD = normalize_method('scrypt')
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_slots = None
+
+
+def _get_executor():
+    """Thread pool and queue slots for this worker, created on first use"""
+    global _executor, _executor_pid, _slots
+    if _executor is None or _executor_pid != os.getpid():
+        with _lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+                _slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+                _executor_pid = os.getpid()
+    return _executor, _slots
+
+
+def _run(fn, *args):
+    if PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+    executor, slots = _get_executor()
+    if not slots.acquire(blocking=False):
+        inc('password_hash_rejected')
+        raise PasswordHashBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda done: slots.release())
+    return future.result()
+
+
+def needs_rehash(password_hash):
+    """True if a stored hash was made with a different method or cost than HASH_METHOD"""
+    method = password_hash.split('$', 1)[0]
+    try:
+        return normalize_method(method) != HASH_METHOD
+    except ValueError:
+        return True
+
+
+def _verify(password_hash, password):
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash):
+        return True, generate_password_hash(password, method=HASH_METHOD)
+    return True, None
+
+
+@timed('password_hash_seconds', op='hash')
+def hash_password(password):
+    """Hash a new password with HASH_METHOD; raises PasswordHashBusy under overload"""
+    return _run(generate_password_hash, password, HASH_METHOD)
+
+
+@timed('password_hash_seconds', op='verify')
+def verify_password(password_hash, password):
+    """Check a password; returns (matches, replacement hash if the stored one is outdated, else None)
+
+    The rehash runs in the same pool job as the check, so an upgrade never queues twice
+    """
+    return _run(_verify, password_hash, password)
@@ -0,0 +1,315 @@
+"""
+Profiler for MindMetric AI
+WSGI middleware that profiles a sample of requests with cProfile, keeps stack samples of
+every request slower than a threshold, and retains the slowest few per worker
+A request is followed onto the event loop and worker threads its async view uses: each
+step of its tasks and each job it hands to a ProfiledExecutor (the loop's default
+executor, so asyncio.to_thread) is profiled on the thread that runs it and merged into
+the request's profile. Disabled unless PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS or
+PROFILE_TOKEN is set; app.py does not install the profiler at all in that case
+"""
+import asyncio
+import contextvars
+import cProfile
+import functools
+import heapq
+import hmac
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Fraction of requests profiled with cProfile (0-1)
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+
+# Requests slower than this are kept as sampled stacks; 0 turns the stack sampler off
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "0"))
+
+# Requests sending this value in X-Profile-Token are always profiled with cProfile
+PROFILE_TOKEN = os.environ.get("PROFILE_TOKEN")
+
+# Milliseconds between stack samples of in-flight requests
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+
+# Number of profiles kept per worker (the slowest ones win)
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20"))
+
+PROFILING_ENABLED = bool(PROFILE_SAMPLE_RATE > 0 or PROFILE_SLOW_MS > 0 or PROFILE_TOKEN)
+
+_lock = threading.Lock()
+_profiles = []  # min-heap of (duration, id, record)
+_ids = itertools.count(1)
+
+# The RequestProfile of the request being served; copied into its tasks and to_thread calls
+_current = contextvars.ContextVar('profiled_request', default=None)
+
+_loops = weakref.WeakSet()
+_loops_lock = threading.Lock()
+
+
+def _store(record):
+    """Keep a profile if it is among the PROFILE_KEEP slowest seen by this worker"""
+    with _lock:
+        record['id'] = next(_ids)
+        entry = (record['duration_ms'], record['id'], record)
+        if len(_profiles) < PROFILE_KEEP:
+            heapq.heappush(_profiles, entry)
+        else:
+            heapq.heappushpop(_profiles, entry)
+
+
+def list_profiles():
+    """Metadata of the retained profiles, slowest first"""
+    with _lock:
+        records = [record for _, _, record in _profiles]
+    return [
+        {key: value for key, value in record.items() if key != 'data'}
+        for record in sorted(records, key=lambda record: record['duration_ms'], reverse=True)
+    ]
+
+
+def get_profile(profile_id):
+    """Return (record, file bytes) for one retained profile, or None"""
+    with _lock:
+        record = next((record for _, _, record in _profiles if record['id'] == profile_id), None)
+    if record is None:
+        return None
+    if record['kind'] == 'cprofile':
+        # Same marshal format as Profile.dump_stats, so pstats and snakeviz can open it
+        return record, marshal.dumps(record['data'])
+    folded = ''.join(f"{stack} {count}\n" for stack, count in record['data'].most_common())
+    return record, folded.encode('utf-8')
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    """Render a stack in flamegraph collapsed format, outermost frame first"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Background thread that samples the stacks of threads currently working for a request"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.active = {}
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def _ensure_running(self):
+        # Threads do not survive fork, so each worker starts its own
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.active = {}
+                    self.pid = os.getpid()
+                    threading.Thread(target=self._run, name="profile-sampler", daemon=True).start()
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, samples in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None and ident != own:
+                        samples[_collapse(frame)] += 1
+
+    def attach(self, samples):
+        """Count this thread's stacks into samples until detach()"""
+        self._ensure_running()
+        with self.lock:
+            self.active[threading.get_ident()] = samples
+
+    def detach(self):
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+
+
+class RequestProfile:
+    """Profiling state of one request, shared by every thread that works for it"""
+
+    def __init__(self, cprofile, sampler):
+        self.sampler = sampler
+        self.samples = Counter() if sampler else None
+        self.cprofile = cprofile
+        self.lock = threading.Lock()
+        self.profiles = {}  # thread ident -> cProfile.Profile
+        self.depth = {}  # thread ident -> nesting of enter() calls
+
+    def enter(self):
+        ident = threading.get_ident()
+        with self.lock:
+            depth = self.depth.get(ident, 0)
+            self.depth[ident] = depth + 1
+            if depth:
+                return
+            profile = self.profiles.get(ident)
+            if self.cprofile and profile is None:
+                profile = self.profiles[ident] = cProfile.Profile()
+        if self.sampler:
+            self.sampler.attach(self.samples)
+        if profile:
+            profile.enable()
+
+    def exit(self):
+        ident = threading.get_ident()
+        with self.lock:
+            self.depth[ident] -= 1
+            if self.depth[ident]:
+                return
+            profile = self.profiles.get(ident)
+        if profile:
+            profile.disable()
+        if self.sampler:
+            self.sampler.detach()
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn on this thread with the request's profiling active"""
+        self.enter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.exit()
+
+    def stats(self):
+        """The cProfile stats of every thread, merged, in the dump_stats format"""
+        with self.lock:
+            # A task that outlives the request (one that missed its deadline) is left out while it runs
+            profiles = [profile for ident, profile in self.profiles.items() if not self.depth.get(ident)]
+        return pstats.Stats(*profiles).stats
+
+
+class _Traced:
+    """Awaitable that runs a coroutine with its request's profiling active around each step"""
+
+    def __init__(self, coro, request):
+        self.coro = coro
+        self.request = request
+
+    def __await__(self):
+        send, value = self.coro.send, None
+        while True:
+            self.request.enter()
+            try:
+                yielded = send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.request.exit()
+            try:
+                value = yield yielded
+                send = self.coro.send
+            except GeneratorExit:
+                self.coro.close()
+                raise
+            except BaseException as error:
+                send, value = self.coro.throw, error
+
+
+async def _traced(coro, request):
+    return await _Traced(coro, request)
+
+
+class ProfiledExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose jobs are profiled as part of the request that submitted them"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        request = _current.get()
+        if request is not None:
+            fn = functools.partial(request.run, fn)
+        return super().submit(fn, *args, **kwargs)
+
+
+def _instrument_loop(loop):
+    """Make a loop follow profiled requests into the tasks and to_thread calls they start"""
+    if loop in _loops:
+        return
+    with _loops_lock:
+        if loop in _loops:
+            return
+        previous = loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            context = kwargs.get('context')
+            request = context.get(_current) if context is not None else _current.get()
+            if request is not None:
+                coro = _traced(coro, request)
+            if previous is not None:
+                return previous(loop, coro, **kwargs)
+            return asyncio.Task(coro, loop=loop, **kwargs)
+
+        loop.set_task_factory(task_factory)
+        # Installed by the first async view on the loop, before any to_thread call of theirs
+        loop.set_default_executor(ProfiledExecutor(thread_name_prefix='asyncio'))
+        _loops.add(loop)
+
+
+def profile_async_views(async_to_sync):
+    """Wrap Flask's async_to_sync so async views are profiled on the loop that runs them"""
+    @functools.wraps(async_to_sync)
+    def wrapped(func):
+        @functools.wraps(func)
+        async def view(*args, **kwargs):
+            _instrument_loop(asyncio.get_running_loop())
+            request = _current.get()
+            if request is None:
+                return await func(*args, **kwargs)
+            return await _Traced(func(*args, **kwargs), request)
+        return async_to_sync(view)
+    return wrapped
+
+
+class ProfilerMiddleware:
+    """Profile sampled, slow or explicitly requested requests and keep the slowest"""
+
+    def __init__(self, app):
+        self.app = app
+        self.sampler = StackSampler(PROFILE_INTERVAL_MS / 1000) if PROFILE_SLOW_MS > 0 else None
+
+    def _wants_cprofile(self, environ):
+        if PROFILE_TOKEN and hmac.compare_digest(environ.get('HTTP_X_PROFILE_TOKEN', ''), PROFILE_TOKEN):
+            return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    def __call__(self, environ, start_response):
+        request = RequestProfile(self._wants_cprofile(environ), self.sampler)
+        if not (request.cprofile or request.sampler):
+            return self.app(environ, start_response)
+        token = _current.set(request)
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        try:
+            return request.run(self.app, environ, start_response)
+        finally:
+            _current.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            record = {
+                'method': environ.get('REQUEST_METHOD'),
+                'path': environ.get('PATH_INFO'),
+                'duration_ms': round(duration_ms, 2),
+                'started_at': started_at.isoformat(),
+                'threads': len(request.depth),
+            }
+            if request.cprofile:
+                _store(dict(record, kind='cprofile', data=request.stats()))
+            elif request.samples and duration_ms >= PROFILE_SLOW_MS:
+                samples = Counter(request.samples)
+                _store(dict(record, kind='stacks', samples=sum(samples.values()), data=samples))
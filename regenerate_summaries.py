@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Regenerate the summaries of assessments stored while Gemini was down
+Finds assessments whose summary is one of the canned generate_fallback_summary texts,
+groups them by the prompt create_psychological_prompt builds for them, and asks Gemini
+once per distinct prompt: concurrently under a requests-per-minute limit (online), or
+as inline batch jobs (--mode batch). Each answer is written to every assessment in its
+group, a few groups per transaction, so the database itself records progress and a
+rerun only picks up what is still a fallback; submitted batch jobs are kept in a state file and
+collected on the next run instead of being paid for twice
+
+    python regenerate_summaries.py --dry-run
+    python regenerate_summaries.py --rpm 300 --concurrency 16
+    python regenerate_summaries.py --mode batch --batch-size 500
+
+Point GEMINI_API_BASE_URL at loadtest/fake_services.py to try it without the real API
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+
+UNAVAILABLE_SUMMARY = "Unable to generate psychological summary at this time."
+
+# A stress score from each generate_fallback_summary band
+FALLBACK_BAND_SCORES = (0, 5, 10)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+BATCH_DONE_STATES = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replace fallback summaries with real Gemini analyses")
+    parser.add_argument('--mode', choices=('online', 'batch'), default='online',
+                        help='one request per prompt, or inline Gemini batch jobs')
+    parser.add_argument('--rpm', type=float, default=60, help='requests (or batch jobs) per minute at most')
+    parser.add_argument('--concurrency', type=int, default=8, help='online requests in flight at once')
+    parser.add_argument('--retries', type=int, default=3, help='retries of a rate-limited or failed request')
+    parser.add_argument('--batch-size', type=int, default=500, help='prompts per batch job')
+    parser.add_argument('--poll-seconds', type=float, default=30, help='wait between batch job status checks')
+    parser.add_argument('--state', default='regenerate_batches.json', help='submitted batch jobs, for resuming')
+    parser.add_argument('--write-batch', type=int, default=50, help='regenerated prompts written per transaction')
+    parser.add_argument('--scan-size', type=int, default=5000, help='assessments read per query')
+    parser.add_argument('--max-prompts', type=int, help='regenerate (or submit) at most this many prompts per run')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be regenerated')
+    return parser.parse_args()
+
+
+class Group:
+    """Assessments that produce the same prompt, and so can share one answer"""
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.ids = []
+
+
+class RateLimiter:
+    """Spaces calls evenly so no more than `per_minute` start in any minute"""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.next_at = time.monotonic()
+
+    def delay(self):
+        now = time.monotonic()
+        wait = max(0.0, self.next_at - now)
+        self.next_at = max(now, self.next_at) + self.interval
+        return wait
+
+    def wait(self):
+        time.sleep(self.delay())
+
+    async def wait_async(self):
+        await asyncio.sleep(self.delay())
+
+
+def fallback_keys(db, User):
+    """summary_blob keys of every text generate_fallback_summary can have produced"""
+    from gemini_service import generate_fallback_summary
+    from summary_store import summary_key
+    ages = db.session.execute(db.select(User.age).distinct()).scalars().all()
+    texts = {generate_fallback_summary(score, age) for score in FALLBACK_BAND_SCORES for age in ages}
+    texts.add(UNAVAILABLE_SUMMARY)
+    return [summary_key(text) for text in texts]
+
+
+def find_groups(db, Assessment, User, keys, scan_size):
+    """Fallback assessments grouped by prompt, in order of their first assessment"""
+    from gemini_service import create_psychological_prompt
+    from response_codec import decode_responses
+    from summary_store import summary_key
+    table = Assessment.__table__
+    query = db.select(table.c.id, table.c.answers, table.c.stress_score, User.age).join(
+        User, User.id == table.c.user_id
+    ).where(table.c.id > db.bindparam('after_id'), table.c.summary_sha256.in_(keys)).order_by(
+        table.c.id).limit(scan_size)
+    groups = OrderedDict()
+    after_id = 0
+    while True:
+        with db.engine.connect() as connection:
+            rows = connection.execute(query, {'after_id': after_id}).all()
+        if not rows:
+            return groups
+        for row_id, answers, stress_score, age in rows:
+            prompt = create_psychological_prompt(decode_responses(answers), stress_score, age)
+            key = summary_key(prompt)
+            if key not in groups:
+                groups[key] = Group(prompt)
+            groups[key].ids.append(row_id)
+        after_id = rows[-1][0]
+
+
+def apply_summaries(db, Assessment, results, keys):
+    """Point each group's assessments at its new summary in one transaction
+
+    Rows whose summary changed since the scan are left alone; returns the rows updated per group
+    """
+    from report_service import report_path
+    from summary_store import store_summary
+    table = Assessment.__table__
+    counts = []
+    for group, text in results:
+        blob = store_summary(text)
+        updated = 0
+        for start in range(0, len(group.ids), 1000):
+            updated += db.session.execute(table.update().where(
+                table.c.id.in_(group.ids[start:start + 1000]), table.c.summary_sha256.in_(keys)
+            ).values(summary_sha256=blob.sha256)).rowcount
+        counts.append(updated)
+    db.session.commit()
+    # Cached PDFs carry the old summary
+    for group, _ in results:
+        for row_id in group.ids:
+            try:
+                os.remove(report_path(row_id))
+            except FileNotFoundError:
+                pass
+    return counts
+
+
+class Progress:
+    def __init__(self, prompts):
+        self.prompts = prompts
+        self.done = self.failed = self.updated = 0
+        self.began = self.last_report = time.perf_counter()
+
+    def record(self, counts=(), failed=0):
+        self.done += len(counts)
+        self.updated += sum(counts)
+        self.failed += failed
+        now = time.perf_counter()
+        if now - self.last_report >= 5:
+            print(f"  {self.done + self.failed:,}/{self.prompts:,} prompts, {self.updated:,} assessments updated, "
+                  f"{self.failed:,} failed ({self.done / (now - self.began):,.1f} prompts/s)", file=sys.stderr)
+            self.last_report = now
+
+
+async def generate(models, prompt, limiter, retries):
+    """Summary text for one prompt, or None once the retries are spent"""
+    from gemini_service import GEMINI_MODEL
+    from google.genai import errors
+    for attempt in range(retries + 1):
+        await limiter.wait_async()
+        try:
+            response = await models.generate_content(model=GEMINI_MODEL, contents=prompt)
+            if response.text:
+                return response.text
+            logging.warning("Gemini returned an empty summary")
+        except errors.APIError as e:
+            if e.code not in RETRY_STATUS:
+                logging.error(f"Error regenerating Gemini summary: {e}")
+                return None
+            logging.warning(f"Gemini call failed ({e.code}), attempt {attempt + 1} of {retries + 1}")
+        except Exception as e:
+            logging.warning(f"Gemini call failed ({e}), attempt {attempt + 1} of {retries + 1}")
+        if attempt < retries:
+            await asyncio.sleep(min(2 ** attempt, 30))
+    return None
+
+
+async def run_online(db, Assessment, groups, keys, args, progress):
+    from gemini_service import _get_async_client
+    models = _get_async_client().models
+    limiter = RateLimiter(args.rpm)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    results = []
+
+    async def regenerate(group):
+        async with semaphore:
+            text = await generate(models, group.prompt, limiter, args.retries)
+        if not text:
+            progress.record(failed=1)
+            return
+        results.append((group, text))
+        # Writes run on the loop thread in the app context's session, a few groups per transaction
+        if len(results) >= args.write_batch:
+            progress.record(apply_summaries(db, Assessment, results, keys))
+            results.clear()
+
+    selected = list(groups.values())[:args.max_prompts]
+    await asyncio.gather(*(regenerate(group) for group in selected))
+    if results:
+        progress.record(apply_summaries(db, Assessment, results, keys))
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {'jobs': {}}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(state, file)
+    os.replace(tmp_path, path)
+
+
+def collect_batch(db, Assessment, job, groups, keys, write_batch, progress):
+    """Apply a finished batch job's answers; failed prompts stay fallbacks for the next run"""
+    responses = job.dest.inlined_responses if job.dest and job.dest.inlined_responses else []
+    results = []
+    failed = 0
+    for response in responses:
+        group = groups.pop((response.metadata or {}).get('key'), None)
+        if group is None:
+            # Already regenerated, or changed since the job was submitted
+            continue
+        text = response.response.text if response.response and not response.error else None
+        if text:
+            results.append((group, text))
+        else:
+            failed += 1
+    progress.record(failed=failed)
+    for start in range(0, len(results), write_batch):
+        progress.record(apply_summaries(db, Assessment, results[start:start + write_batch], keys))
+
+
+def submit_batch(client, model, prompts, display_name, limiter, retries):
+    """Create one inline batch job for (key, prompt) pairs, or None once the retries are spent"""
+    from google.genai import errors
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return client.batches.create(
+                model=model,
+                src=[{'contents': prompt, 'metadata': {'key': key}} for key, prompt in prompts],
+                config={'display_name': display_name},
+            )
+        except errors.APIError as e:
+            if e.code not in RETRY_STATUS:
+                logging.error(f"Error creating Gemini batch job: {e}")
+                return None
+            logging.warning(f"Batch job creation failed ({e.code}), attempt {attempt + 1} of {retries + 1}")
+        if attempt < retries:
+            time.sleep(min(2 ** attempt, 30))
+    return None
+
+
+def run_batch(db, Assessment, groups, keys, args, progress):
+    from gemini_service import GEMINI_MODEL, client
+    from google.genai import errors
+    limiter = RateLimiter(args.rpm)
+    state = load_state(args.state)
+    if state['jobs']:
+        print(f"Collecting {len(state['jobs'])} batch jobs submitted by an earlier run")
+
+    submitted = {key for job_keys in state['jobs'].values() for key in job_keys}
+    pending = [key for key in groups if key not in submitted][:args.max_prompts]
+    for start in range(0, len(pending), args.batch_size):
+        chunk = pending[start:start + args.batch_size]
+        job = submit_batch(client, GEMINI_MODEL, [(key, groups[key].prompt) for key in chunk],
+                           f'mindmetric-summaries-{int(time.time())}-{start // args.batch_size}', limiter, args.retries)
+        if job is None:
+            print("Stopped submitting; the remaining prompts are left for the next run", file=sys.stderr)
+            break
+        state['jobs'][job.name] = chunk
+        save_state(args.state, state)
+        print(f"  submitted {job.name} with {len(chunk):,} prompts", file=sys.stderr)
+
+    while state['jobs']:
+        for name in list(state['jobs']):
+            limiter.wait()
+            try:
+                job = client.batches.get(name=name)
+            except errors.APIError as e:
+                if e.code == 404:
+                    logging.warning(f"Batch job {name} no longer exists; its prompts will be resubmitted next run")
+                    del state['jobs'][name]
+                    save_state(args.state, state)
+                else:
+                    logging.warning(f"Could not check batch job {name} ({e.code}); will retry")
+                continue
+            state_name = job.state.name if job.state else ''
+            if state_name not in BATCH_DONE_STATES:
+                continue
+            if state_name == 'JOB_STATE_SUCCEEDED':
+                collect_batch(db, Assessment, job, groups, keys, args.write_batch, progress)
+            else:
+                logging.warning(f"Batch job {name} ended {state_name}; its prompts will be resubmitted next run")
+            del state['jobs'][name]
+            save_state(args.state, state)
+        if state['jobs']:
+            time.sleep(args.poll_seconds)
+
+
+def main():
+    args = parse_args()
+    from app import app, db
+    from models import Assessment, User
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with app.app_context():
+        keys = fallback_keys(db, User)
+        began = time.perf_counter()
+        groups = find_groups(db, Assessment, User, keys, args.scan_size)
+        assessments = sum(len(group.ids) for group in groups.values())
+        print(f"Found {assessments:,} assessments with fallback summaries and {len(groups):,} distinct prompts "
+              f"in {time.perf_counter() - began:.1f}s")
+        if args.dry_run or not groups:
+            return
+
+        progress = Progress(min(len(groups), args.max_prompts or len(groups)))
+        if args.mode == 'batch':
+            run_batch(db, Assessment, groups, keys, args, progress)
+        else:
+            asyncio.run(run_online(db, Assessment, groups, keys, args, progress))
+
+    elapsed = time.perf_counter() - progress.began
+    print(f"Regenerated {progress.done:,} prompts for {progress.updated:,} assessments in {elapsed:.1f}s "
+          f"({progress.done / max(elapsed, 1e-9):,.1f} prompts/s); {progress.failed:,} failed")
+    if progress.failed:
+        print("Failed prompts keep their fallback summary; run again to retry them")
+
+
+if __name__ == "__main__":
+    main()
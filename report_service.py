@@ -0,0 +1,155 @@
+"""
+Report Service for MindMetric AI
+Renders assessment PDFs with xhtml2pdf in a process pool and caches them on disk
+This module must stay importable without the Flask app: pool workers import it to render
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from markupsafe import Markup
+from summary_formatter import SUMMARY_FORMAT_VERSION, summary_html
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+REPORT_TEMPLATE = 'report.html'
+
+# Rendered PDFs live here, one subdirectory per template version
+REPORT_DIR = os.environ.get("REPORT_DIR", "reports")
+
+# Processes rendering PDFs; rendering is CPU-bound, so keep this at or below the core count
+REPORT_WORKERS = int(os.environ.get("REPORT_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Seconds a failed render is remembered, so polling clients get an error instead of a resubmit
+REPORT_FAILURE_TTL = float(os.environ.get("REPORT_FAILURE_TTL", "60"))
+
+with open(os.path.join(TEMPLATE_DIR, REPORT_TEMPLATE), 'rb') as template_file:
+    # Editing the template or the summary format changes the version, so stale PDFs are never served
+    TEMPLATE_VERSION = hashlib.blake2b(template_file.read() + f':{SUMMARY_FORMAT_VERSION}'.encode(),
+                                       digest_size=6).hexdigest()
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_pending = {}
+_failed = {}
+_jinja_env = None
+
+
+class ReportFailed(Exception):
+    """Raised when the report for an assessment failed to render within REPORT_FAILURE_TTL"""
+
+
+def report_path(assessment_id):
+    """Where the PDF for an assessment is cached"""
+    return os.path.join(REPORT_DIR, TEMPLATE_VERSION, f"assessment-{assessment_id}.pdf")
+
+
+def stress_band(stress_score):
+    if stress_score <= 3:
+        return 'low'
+    if stress_score <= 6:
+        return 'moderate'
+    return 'high'
+
+
+def build_payload(assessment, user_name, recommendations, confidence):
+    """Plain data a pool worker needs to render one report"""
+    return {
+        'assessment_id': assessment.id,
+        'user_name': user_name,
+        'created_at': assessment.created_at.strftime('%B %d, %Y at %I:%M %p'),
+        'stress_score': assessment.stress_score,
+        'stress_band': stress_band(assessment.stress_score),
+        'ml_prediction': assessment.ml_prediction,
+        'recommendations': recommendations,
+        'confidence': confidence,
+        'summary_html': str(summary_html(assessment)),
+    }
+
+
+def render_report(payload, path):
+    """Render one PDF to path (runs in a pool worker); returns the file size"""
+    global _jinja_env
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from xhtml2pdf import pisa
+
+    if _jinja_env is None:
+        _jinja_env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(['html']))
+    template = _jinja_env.get_template(REPORT_TEMPLATE)
+    html = template.render(dict(payload, summary_html=Markup(payload['summary_html'])))
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside the target and rename, so readers never see a half-written PDF
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as file:
+        result = pisa.CreatePDF(html, dest=file, encoding='utf-8')
+    if result.err:
+        os.remove(tmp_path)
+        raise RuntimeError(f"xhtml2pdf reported {result.err} errors for assessment {payload['assessment_id']}")
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _get_pool(replace=False):
+    """Process pool for this worker, created on first use (or after a child crashed)"""
+    global _pool, _pool_pid
+    if replace or _pool is None or _pool_pid != os.getpid():
+        # spawn, not fork: forking a threaded web worker can copy held locks into the child
+        _pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        _pool_pid = os.getpid()
+    return _pool
+
+
+def _finished(assessment_id, future):
+    failed = not future.cancelled() and future.exception() is not None
+    with _lock:
+        _pending.pop(assessment_id, None)
+        if failed:
+            _failed[assessment_id] = time.monotonic() + REPORT_FAILURE_TTL
+    if failed:
+        logging.error(f"Failed to render report for assessment {assessment_id}: {future.exception()}")
+
+
+def _check_failed(assessment_id):
+    """Raise ReportFailed if the last render failed recently (call with _lock held)"""
+    retry_at = _failed.get(assessment_id)
+    if retry_at is None:
+        return
+    if time.monotonic() < retry_at:
+        raise ReportFailed(assessment_id)
+    del _failed[assessment_id]
+
+
+def request_report(assessment_id, build):
+    """Return the cached PDF path, or queue a render (build() supplies the payload) and return None
+
+    Raises ReportFailed while a recent render of this report has failed
+    """
+    path = report_path(assessment_id)
+    if os.path.exists(path):
+        return path
+
+    with _lock:
+        if assessment_id in _pending:
+            return None
+        _check_failed(assessment_id)
+    # Loads the assessment from the database, so it runs outside the lock
+    payload = build()
+
+    with _lock:
+        # Another request may have queued it (or seen it fail) while this one was building
+        if assessment_id in _pending:
+            return None
+        _check_failed(assessment_id)
+        try:
+            future = _get_pool().submit(render_report, payload, path)
+        except BrokenProcessPool:
+            logging.warning("Report pool was broken by a crashed worker; starting a new one")
+            future = _get_pool(replace=True).submit(render_report, payload, path)
+        _pending[assessment_id] = future
+    future.add_done_callback(lambda done: _finished(assessment_id, done))
+    return None
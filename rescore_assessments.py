@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Re-score stored assessments with the current model.pkl
+Reads assessments in id-ordered chunks, predicts each chunk in one vectorized call in a
+process pool, and writes changed predictions back with batched UPDATEs keyed by id, in
+the same transaction as the moved prediction counts in the users' trend rollups; their
+cached PDFs are removed once it commits. Progress is checkpointed after every chunk, so an interrupted run picks
+up where it stopped; --dry-run only reports how predictions would change
+
+    python rescore_assessments.py --dry-run
+    python rescore_assessments.py --workers 4 --chunk-size 5000
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+MODEL_FILES = ('model.pkl', 'encoders.pkl')
+
+_model = None
+_encoders = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-score historical assessments after retraining model.pkl")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='prediction processes')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='assessments per chunk')
+    parser.add_argument('--checkpoint', default='rescore_checkpoint.json', help='progress file for resuming')
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint and start over')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='report the prediction changes without writing anything')
+    return parser.parse_args()
+
+
+def model_fingerprint():
+    """Hash of the model files, so a checkpoint is never resumed against a different model"""
+    digest = hashlib.sha256()
+    for path in MODEL_FILES:
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def load_checkpoint(path, fingerprint, restart):
+    if restart or not os.path.exists(path):
+        return {'model': fingerprint, 'last_id': 0, 'scanned': 0, 'updated': 0}
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint['model'] != fingerprint:
+        raise SystemExit(f"{path} was written for a different model.pkl; rerun with --restart")
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(checkpoint, file)
+    os.replace(tmp_path, path)
+
+
+def init_worker():
+    """Load the model once per pool process instead of once per prediction"""
+    global _model, _encoders
+    import warnings
+    from ml_service import load_model_and_encoders
+    warnings.filterwarnings('ignore', module='sklearn')
+    _model, _encoders = load_model_and_encoders()
+
+
+def score_chunk(rows):
+    """Predict one chunk of (id, packed answers, stress score, stored prediction, user id) rows
+
+    Returns (last id, [(old, new)] per row, [(id, old, new, user id)] for rows whose prediction changed)
+    """
+    from ml_service import predict_content_types
+    from response_codec import decode_responses
+    responses = [decode_responses(row[1]) for row in rows]
+    predictions = predict_content_types(responses, [row[2] for row in rows], _model, _encoders)
+    pairs = [(row[3], new) for row, new in zip(rows, predictions)]
+    changed = [(row[0], row[3], new, row[4]) for row, new in zip(rows, predictions) if new != row[3]]
+    return rows[-1][0], pairs, changed
+
+
+def read_chunks(db, Assessment, after_id, chunk_size):
+    """Keyset-paginated chunks; each read is its own short transaction so writes are never blocked"""
+    table = Assessment.__table__
+    query = db.select(table.c.id, table.c.answers, table.c.stress_score, table.c.ml_prediction,
+                      table.c.user_id).where(
+        table.c.id > db.bindparam('after_id')).order_by(table.c.id).limit(chunk_size)
+    while True:
+        with db.engine.connect() as connection:
+            rows = [tuple(row) for row in connection.execute(query, {'after_id': after_id})]
+        if not rows:
+            return
+        yield rows
+        after_id = rows[-1][0]
+
+
+def write_changes(db, Assessment, changed):
+    """Store new predictions and move their counts in the users' trends in one transaction"""
+    from report_service import report_path
+    from trend_service import move_predictions
+    table = Assessment.__table__
+    statement = table.update().where(table.c.id == db.bindparam('row_id')).values(
+        ml_prediction=db.bindparam('prediction'))
+    try:
+        db.session.execute(statement, [{'row_id': row_id, 'prediction': prediction}
+                                       for row_id, _, prediction, _ in changed])
+        move_predictions((user_id, old, new) for _, old, new, user_id in changed)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expunge_all()
+    # Cached PDFs carry the old prediction; result pages are versioned by it and re-render on their own
+    for row_id, _, _, _ in changed:
+        try:
+            os.remove(report_path(row_id))
+        except FileNotFoundError:
+            pass
+
+
+def print_diff(diff, scanned):
+    changed = sum(count for (old, new), count in diff.items() if old != new)
+    print(f"\n{changed:,} of {scanned:,} predictions would change ({changed / max(scanned, 1):.1%})")
+    print(f"{'stored prediction':<24} {'new prediction':<24} {'rows':>10} {'share':>7}")
+    for (old, new), count in diff.most_common():
+        if old != new:
+            print(f"{old:<24} {new:<24} {count:>10,} {count / scanned:>7.2%}")
+
+
+def main():
+    args = parse_args()
+    from app import app, db
+    from models import Assessment
+
+    logging.getLogger().setLevel(logging.WARNING)
+    fingerprint = model_fingerprint()
+    checkpoint = ({'model': fingerprint, 'last_id': 0, 'scanned': 0, 'updated': 0} if args.dry_run
+                  else load_checkpoint(args.checkpoint, fingerprint, args.restart))
+    if checkpoint['last_id']:
+        print(f"Resuming after assessment {checkpoint['last_id']} "
+              f"({checkpoint['scanned']:,} scanned, {checkpoint['updated']:,} updated so far)")
+
+    diff = Counter()
+    scanned = updated = 0
+    began = last_report = time.perf_counter()
+    with app.app_context(), ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        # Keep a bounded window of chunks in flight and handle results in id order,
+        # so the checkpoint only ever covers fully written chunks
+        in_flight = deque()
+        chunks = read_chunks(db, Assessment, checkpoint['last_id'], args.chunk_size)
+        exhausted = False
+        while in_flight or not exhausted:
+            while not exhausted and len(in_flight) < args.workers * 2:
+                rows = next(chunks, None)
+                if rows is None:
+                    exhausted = True
+                else:
+                    in_flight.append(pool.submit(score_chunk, rows))
+            if not in_flight:
+                break
+
+            last_id, pairs, changed = in_flight.popleft().result()
+            scanned += len(pairs)
+            if args.dry_run:
+                diff.update(pairs)
+            else:
+                if changed:
+                    write_changes(db, Assessment, changed)
+                updated += len(changed)
+                checkpoint.update(last_id=last_id, scanned=checkpoint['scanned'] + len(pairs),
+                                  updated=checkpoint['updated'] + len(changed))
+                save_checkpoint(args.checkpoint, checkpoint)
+
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                print(f"  {scanned:,} scanned, {updated:,} updated, {scanned / (now - began):,.0f} rows/s "
+                      f"(through id {last_id})", file=sys.stderr)
+                last_report = now
+
+    elapsed = time.perf_counter() - began
+    print(f"Scanned {scanned:,} assessments in {elapsed:.1f}s ({scanned / max(elapsed, 1e-9):,.0f} rows/s) "
+          f"with {args.workers} workers")
+    if args.dry_run:
+        print_diff(diff, scanned)
+        return
+
+    print(f"Updated {updated:,} predictions; checkpoint kept in {args.checkpoint} "
+          f"(delete it or use --restart before scoring with this model again)")
+    if checkpoint['updated']:
+        print("Archived partitions keep the predictions they were archived with.")
+
+
+if __name__ == "__main__":
+    main()
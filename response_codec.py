@@ -0,0 +1,79 @@
+"""
+Response Codec for MindMetric AI
+Packs the 15 quiz answers into one 40-bit integer: 3 bits for each of Q1-Q10 (A-E) and
+2 bits for each of Q11-Q15 (Low/Medium/High), with 0 meaning unanswered. Answers can be
+filtered in SQL with a single mask-and-compare instead of parsing a JSON blob per row
+"""
+import json
+
+PERSONALITY_ANSWERS = ['A', 'B', 'C', 'D', 'E']
+STRESS_ANSWERS = ['Low', 'Medium', 'High']
+
+# (question, allowed answers, bit offset, bit width); codes are 1-based so 0 stays "missing"
+FIELDS = [(f'q{i}', PERSONALITY_ANSWERS, 3 * (i - 1), 3) for i in range(1, 11)]
+FIELDS += [(f'q{i}', STRESS_ANSWERS, 30 + 2 * (i - 11), 2) for i in range(11, 16)]
+PACKED_BITS = 40
+
+_FIELDS = {name: (answers, offset, width) for name, answers, offset, width in FIELDS}
+_CODES = {name: {answer: code for code, answer in enumerate(answers, 1)} for name, answers, _, _ in FIELDS}
+
+
+class ResponseCodecError(ValueError):
+    """Raised for an unknown question or an answer that question does not allow"""
+
+
+def encode_responses(responses):
+    """Pack a {'q1': 'A', ...} dict; missing or unexpected answers are stored as unanswered"""
+    packed = 0
+    for name, _, offset, _ in FIELDS:
+        code = _CODES[name].get(responses.get(name))
+        if code:
+            packed |= code << offset
+    return packed
+
+
+def decode_responses(packed):
+    """The answers dict for a packed value; unanswered questions map to None, as the quiz form gives them"""
+    packed = packed or 0
+    responses = {}
+    for name, answers, offset, width in FIELDS:
+        code = (packed >> offset) & ((1 << width) - 1)
+        responses[name] = answers[code - 1] if 0 < code <= len(answers) else None
+    return responses
+
+
+def responses_from_json(text):
+    """Pack a legacy JSON responses string (archives and old exports still carry them)"""
+    try:
+        return encode_responses(json.loads(text) or {})
+    except (TypeError, ValueError):
+        return 0
+
+
+def answer_mask(**answers):
+    """(mask, value) selecting rows with every given answer, e.g. answer_mask(q1='A', q11='High')"""
+    mask = value = 0
+    for name, answer in answers.items():
+        if name not in _FIELDS:
+            raise ResponseCodecError(f"Unknown question '{name}'")
+        code = _CODES[name].get(answer)
+        if code is None:
+            raise ResponseCodecError(f"'{answer}' is not an answer to {name}")
+        _, offset, width = _FIELDS[name]
+        mask |= ((1 << width) - 1) << offset
+        value |= code << offset
+    return mask, value
+
+
+def answers_match(column, **answers):
+    """SQL condition on a packed column: one bitwise AND and an equality, on PostgreSQL and SQLite alike"""
+    mask, value = answer_mask(**answers)
+    return column.op('&')(mask) == value
+
+
+def answer_code(column, question):
+    """SQL expression for one question's answer code (0 = unanswered), for GROUP BY or expression indexes"""
+    if question not in _FIELDS:
+        raise ResponseCodecError(f"Unknown question '{question}'")
+    _, offset, width = _FIELDS[question]
+    return column.op('>>')(offset).op('&')((1 << width) - 1)
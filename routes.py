@@ -1,16 +1,63 @@
-from flask import render_template, request, redirect, url_for, flash, session
+from flask import render_template, request, redirect, url_for, flash, session, jsonify, abort, Response, send_file
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from app import app, db
-from models import User, Assessment, Booking
-from ml_service import predict_content_type, calculate_stress_score
-from gemini_service import generate_psychological_summary
-import json
+from models import User, Assessment, Booking, Psychologist
+from ml_service import (predict_content_type, calculate_stress_score, get_fallback_prediction,
+                        get_detailed_recommendations, get_prediction_confidence)
+from gemini_service import generate_psychological_summary_async, generate_fallback_summary
+from trend_service import record_assessment, get_trend, trend_summary
+from history_service import get_history_page, HISTORY_PAGE_SIZE
+from asset_service import send_asset
+from metrics import timed, inc, render_prometheus, METRICS_TOKEN
+from profiler import list_profiles, get_profile
+from report_service import ReportFailed, request_report, build_payload
+from archive_service import find_archived_assessment
+from submission_service import (CLAIMED, DONE, SubmissionTakenOver, valid_token, claim_submission,
+                                complete_submission, release_submission, wait_for_submission)
+from summary_formatter import summary_html
+from response_codec import encode_responses
+from drift_monitor import record_quiz, drift_report
+from export_service import ExportError, FORMATS, export_stream, export_filename, parse_date
+from db_routing import read_only, read_engine
+from password_service import PasswordHashBusy, hash_password, verify_password
+from page_cache import page_etag, conditional_page, cached_fragment, invalidate_fragments
+from availability_service import availability_payload, mark_slot_taken, mark_slot_released
+from scheduling_service import (SESSION_LENGTHS, assign_practitioner, booking_added, booking_removed,
+                                get_practitioners, has_conflict, next_free_slot)
+import asyncio
+import functools
+import hmac
 import csv
 import os
+import uuid
 from datetime import datetime, date, time
 
+# Seconds submit_quiz waits for the ML prediction and Gemini summary before falling back
+QUIZ_DEADLINE_SECONDS = float(os.environ.get("QUIZ_DEADLINE_SECONDS", "20"))
+
+# Comma-separated emails of users allowed on /admin pages
+ADMIN_EMAILS = {email.strip().lower() for email in os.environ.get("ADMIN_EMAILS", "").split(',') if email.strip()}
+
+# Fetch an assessment's summary blob in the same query as the assessment
+SUMMARY_LOAD = joinedload(Assessment.summary_blob)
+
+# Shown when the chosen slot went to someone else
+SLOT_TAKEN = 'This time slot is already booked. Please choose another time.'
+
+def admin_required(view):
+    """Like login_required, but only for users listed in ADMIN_EMAILS"""
+    @functools.wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.email.lower() not in ADMIN_EMAILS:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapped
+
 @app.route('/')
+@read_only
 def index():
     if current_user.is_authenticated:
         return redirect(url_for('quiz'))
@@ -30,13 +77,18 @@ def signup():
             flash('Email already exists. Please use a different email or login.', 'error')
             return render_template('signup.html')
         
+        try:
+            password_hash = hash_password(password)
+        except PasswordHashBusy:
+            return _hashing_busy('signup.html')
+        
         # Create new user
         user = User(
             name=name,
             age=int(age),
             address=address,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=password_hash
         )
         
         db.session.add(user)
@@ -56,7 +108,16 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password_hash, password):
+        try:
+            matches, new_hash = verify_password(user.password_hash, password) if user else (False, None)
+        except PasswordHashBusy:
+            return _hashing_busy('login.html')
+        
+        if matches:
+            if new_hash:
+                # Stored with an older PASSWORD_HASH_METHOD; upgrade it while we have the password
+                user.password_hash = new_hash
+                db.session.commit()
             login_user(user)
             flash('Logged in successfully!', 'success')
             return redirect(url_for('quiz'))
@@ -65,6 +126,13 @@ def login():
     
     return render_template('login.html')
 
+def _hashing_busy(template):
+    """Shed a login or signup while the password hashing queue is full (counted in password_hash_rejected)"""
+    flash('We are handling a lot of sign-ins right now. Please try again in a moment.', 'error')
+    response = Response(render_template(template), status=503)
+    response.headers['Retry-After'] = '2'
+    return response
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -73,13 +141,30 @@ def logout():
     return redirect(url_for('index'))
 
 @app.route('/quiz')
+@read_only
 @login_required
 def quiz():
-    return render_template('quiz.html')
+    # Repeats of this form (double-clicks, browser retries) share the token and run the pipeline once
+    return render_template('quiz.html', submission_token=uuid.uuid4().hex)
 
 @app.route('/submit_quiz', methods=['POST'])
 @login_required
-def submit_quiz():
+async def submit_quiz():
+    user_id = current_user.id
+    token = request.form.get('submission_token')
+    if not valid_token(token):
+        # Forms rendered before tokens existed still go through, without duplicate protection
+        token = None
+    
+    claimed_at = None
+    if token:
+        state, existing = await asyncio.to_thread(claim_submission, user_id, token)
+        if state == CLAIMED:
+            claimed_at = existing
+        else:
+            inc('quiz_duplicates', state=state)
+            return await _await_submission(user_id, token, existing if state == DONE else None)
+    
     try:
         # Collect all form responses
         responses = {}
@@ -103,101 +188,219 @@ def submit_quiz():
         # Calculate stress score (0-10)
         stress_score = calculate_stress_score(stress_responses)
         
-        # Get ML prediction
-        ml_prediction = predict_content_type(responses, stress_score)
+        # Read the identity once so worker threads never touch current_user
+        user_age, user_email = current_user.age, current_user.email
         
-        # Generate Gemini summary
-        gemini_summary = generate_psychological_summary(responses, stress_score, current_user.age)
+        # Run the ML prediction and the Gemini summary concurrently under one deadline
+        ml_task = asyncio.ensure_future(asyncio.to_thread(predict_content_type, responses, stress_score))
+        gemini_task = asyncio.ensure_future(generate_psychological_summary_async(responses, stress_score, user_age))
+        await asyncio.wait((ml_task, gemini_task), timeout=QUIZ_DEADLINE_SECONDS)
+        ml_prediction = _result_or_fallback('predict', ml_task, get_fallback_prediction, stress_score)
+        gemini_summary = _result_or_fallback('summary', gemini_task, generate_fallback_summary, stress_score, user_age)
         
-        # Save assessment to database
-        assessment = Assessment(
-            user_id=current_user.id,
-            stress_score=stress_score,
-            ml_prediction=ml_prediction,
-            gemini_summary=gemini_summary,
-            responses=json.dumps(responses)
+        # Save the assessment and log to CSV at the same time
+        assessment_id, _ = await asyncio.gather(
+            asyncio.to_thread(_save_assessment, user_id, responses, stress_score, ml_prediction, gemini_summary,
+                              token, claimed_at),
+            asyncio.to_thread(log_to_csv, user_email, stress_score, ml_prediction, gemini_summary)
         )
-        db.session.add(assessment)
-        db.session.commit()
+        record_quiz(responses, stress_score, ml_prediction)
         
-        # Log to CSV
-        log_to_csv(current_user.email, stress_score, ml_prediction, gemini_summary)
-        
-        return redirect(url_for('result', assessment_id=assessment.id))
+        return redirect(url_for('result', assessment_id=assessment_id))
         
+    except SubmissionTakenOver:
+        # This request outlived its claim; show the assessment of the request that took it over
+        inc('quiz_duplicates', state='taken_over')
+        return await _await_submission(user_id, token)
     except Exception as e:
         app.logger.error(f"Error processing quiz: {str(e)}")
+        if token:
+            await asyncio.to_thread(release_submission, user_id, token, claimed_at)
         flash('An error occurred while processing your quiz. Please try again.', 'error')
         return redirect(url_for('quiz'))
 
+async def _await_submission(user_id, token, existing_id=None):
+    """Redirect to the assessment another request saved for this token, waiting for it if needed"""
+    if existing_id is None:
+        existing_id = await wait_for_submission(user_id, token)
+    if existing_id is not None:
+        return redirect(url_for('result', assessment_id=existing_id))
+    flash('Your previous submission did not finish. Please submit the quiz again.', 'warning')
+    return redirect(url_for('quiz'))
+
+def _result_or_fallback(stage, task, fallback, *args):
+    """Return a finished task's result, or the fallback if it failed or missed the deadline"""
+    if task.done() and not task.cancelled() and task.exception() is None:
+        return task.result()
+    inc('quiz_fallbacks', stage=stage)
+    if task.done():
+        app.logger.error(f"Quiz stage failed: {task.exception()}")
+    else:
+        task.cancel()
+        app.logger.warning(f"Quiz stage missed the {QUIZ_DEADLINE_SECONDS}s deadline; using fallback")
+    return fallback(*args)
+
+@timed('quiz_stage_seconds', stage='save')
+def _save_assessment(user_id, responses, stress_score, ml_prediction, gemini_summary, token=None,
+                     claimed_at=None):
+    """Save an assessment, update the user's trend rollup and complete the submission claim in one transaction"""
+    created_at = datetime.utcnow()
+    try:
+        assessment = Assessment(
+            user_id=user_id,
+            stress_score=stress_score,
+            ml_prediction=ml_prediction,
+            # Reuses the stored blob when another assessment already has this exact summary
+            gemini_summary=gemini_summary,
+            answers=encode_responses(responses),
+            created_at=created_at
+        )
+        db.session.add(assessment)
+        record_assessment(user_id, stress_score, ml_prediction, created_at)
+        if token:
+            db.session.flush()
+            complete_submission(user_id, token, claimed_at, assessment.id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return assessment.id
+
 @app.route('/result/<int:assessment_id>')
+@read_only
 @login_required
 def result(assessment_id):
-    assessment = Assessment.query.get_or_404(assessment_id)
+    # Ownership and version need only a few columns; the summary text is loaded on a full render
+    row = db.session.query(Assessment.user_id, Assessment.created_at, Assessment.summary_sha256,
+                           Assessment.ml_prediction).filter(
+        Assessment.id == assessment_id
+    ).first()
+    archived = None
+    if row is None:
+        # Partitions past the retention window are read back from their archive file
+        row = archived = find_archived_assessment(assessment_id)
+        if row is None:
+            abort(404)
     
     # Ensure user can only view their own assessments
-    if assessment.user_id != current_user.id:
+    if row.user_id != current_user.id:
         flash('Access denied.', 'error')
         return redirect(url_for('quiz'))
     
-    return render_template('result.html', assessment=assessment)
+    # regenerate_summaries.py can replace a fallback summary and rescore_assessments.py the
+    # prediction after submit_quiz, so both version the page along with created_at
+    # (browsers revalidate with the ETag first)
+    revision = f"{row.summary_sha256 or ''}:{row.ml_prediction}"
+
+    def render_body():
+        assessment = archived or db.session.get(Assessment, assessment_id, options=[SUMMARY_LOAD])
+        return render_template('result_body.html', assessment=assessment, summary_html=summary_html(assessment))
+    
+    def render_page():
+        body = cached_fragment('result', assessment_id, (row.created_at, revision), render_body)
+        return render_template('result.html', body=body)
+    
+    etag = page_etag('result', assessment_id, row.created_at, current_user, revision)
+    return conditional_page(etag, row.created_at, render_page)
+
+@app.route('/result/<int:assessment_id>/report.pdf')
+@read_only
+@login_required
+def assessment_report(assessment_id):
+    owner_id = db.session.query(Assessment.user_id).filter(Assessment.id == assessment_id).scalar()
+    archived = None
+    if owner_id is None:
+        archived = find_archived_assessment(assessment_id)
+        if archived is None:
+            abort(404)
+        owner_id = archived.user_id
+    if owner_id != current_user.id:
+        flash('Access denied.', 'error')
+        return redirect(url_for('quiz'))
+    
+    def build():
+        assessment = archived or db.session.get(Assessment, assessment_id, options=[SUMMARY_LOAD])
+        return build_payload(assessment, current_user.name,
+                             get_detailed_recommendations(assessment.ml_prediction, assessment.stress_score),
+                             get_prediction_confidence(assessment.stress_score))
+    
+    # Rendering takes a few hundred ms of CPU, so it happens in the report pool, never in the request
+    try:
+        path = request_report(assessment_id, build)
+    except ReportFailed:
+        # Back to the result page, which does not refresh, instead of a pending page that would poll forever
+        flash('We could not create your PDF report. Please try again in a minute.', 'error')
+        return redirect(url_for('result', assessment_id=assessment_id))
+    if path is None:
+        response = Response(render_template('report_pending.html', assessment_id=assessment_id, retry_after=2),
+                            status=202)
+        response.headers['Retry-After'] = '2'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    # conditional=True gives ETag/Last-Modified revalidation and Range requests for resumed downloads
+    response = send_file(os.path.abspath(path), mimetype='application/pdf', as_attachment=True,
+                         download_name=f'mindmetric-report-{assessment_id}.pdf', conditional=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/history')
+@read_only
+@login_required
+def history():
+    assessments, next_cursor = get_history_page(current_user.id, request.args.get('cursor'))
+    return render_template('history.html', assessments=assessments, next_cursor=next_cursor,
+                           is_first_page=not request.args.get('cursor'),
+                           trend=trend_summary(get_trend(current_user.id)))
+
+@app.route('/api/history')
+@read_only
+@login_required
+def history_api():
+    limit = request.args.get('limit', HISTORY_PAGE_SIZE, type=int)
+    assessments, next_cursor = get_history_page(current_user.id, request.args.get('cursor'), limit)
+    return jsonify({
+        'assessments': [{
+            'id': assessment.id,
+            'created_at': assessment.created_at.isoformat(),
+            'stress_score': assessment.stress_score,
+            'ml_prediction': assessment.ml_prediction,
+            'url': url_for('result', assessment_id=assessment.id)
+        } for assessment in assessments],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/trend')
+@read_only
+@login_required
+def trend_api():
+    return jsonify({'trend': trend_summary(get_trend(current_user.id))})
 
 @app.route('/book')
+@read_only
 @login_required
 def booking():
     from datetime import datetime, timedelta
-    return render_template('booking.html', datetime=datetime, timedelta=timedelta)
+    return render_template('booking.html', datetime=datetime, timedelta=timedelta,
+                           psychologists=get_practitioners(), session_lengths=SESSION_LENGTHS)
 
 @app.route('/submit_booking', methods=['POST'])
 @login_required
-def submit_booking():
+async def submit_booking():
     try:
-        # Get form data
-        session_date = datetime.strptime(request.form['date'], '%Y-%m-%d').date()
-        session_time = datetime.strptime(request.form['time'], '%H:%M').time()
-        consultation_type = request.form.get('consultation_type', 'video')
-        phone_number = request.form.get('phone', '')
-        emergency_contact = request.form.get('emergency_contact', '')
-        notes = request.form.get('notes', '')
-        
-        # Validate required fields
-        if not phone_number:
-            flash('Phone number is required for booking confirmation.', 'error')
-            return redirect(url_for('booking'))
-        
-        # Check if slot is already booked
-        existing_booking = Booking.query.filter_by(
-            session_date=session_date,
-            session_time=session_time
-        ).first()
-        
-        if existing_booking:
-            flash('This time slot is already booked. Please choose another time.', 'error')
+        booking, error = await asyncio.to_thread(_reserve_booking, request.form, current_user.id)
+        if error:
+            flash(error, 'error')
             return redirect(url_for('booking'))
-        
-        # Create new booking
-        booking = Booking(
-            user_id=current_user.id,
-            session_date=session_date,
-            session_time=session_time,
-            consultation_type=consultation_type,
-            phone_number=phone_number,
-            emergency_contact=emergency_contact,
-            notes=notes
-        )
-        
-        db.session.add(booking)
-        db.session.commit()
+        booking_id = booking.id
         
         # Send notifications
         try:
-            from notification_service import send_booking_notifications
-            notification_results = send_booking_notifications(booking, current_user)
+            from notification_service import send_booking_notifications_async
+            notification_results = await send_booking_notifications_async(booking, current_user._get_current_object())
             
             # Update booking notification status
-            booking.notification_sent = notification_results['whatsapp'] or notification_results['email']
-            booking.psychologist_notified = notification_results['psychologist']
-            db.session.commit()
+            await asyncio.to_thread(_record_notification_status, booking, notification_results)
             
             # Flash success message based on notification results
             success_msg = 'Your session has been booked successfully!'
@@ -212,26 +415,231 @@ def submit_booking():
             app.logger.error(f"Notification error: {notification_error}")
             flash('Your session has been booked successfully! Confirmation notifications may be delayed.', 'warning')
         
-        return redirect(url_for('booking_confirmation', booking_id=booking.id))
+        return redirect(url_for('booking_confirmation', booking_id=booking_id))
         
     except Exception as e:
-        db.session.rollback()
+        await asyncio.to_thread(db.session.rollback)
         app.logger.error(f"Error processing booking: {str(e)}")
         flash('An error occurred while booking your session. Please try again.', 'error')
         return redirect(url_for('booking'))
 
+@timed('booking_stage_seconds', stage='reserve')
+def _reserve_booking(form, user_id):
+    """Validate a booking form, assign a practitioner and insert the booking; returns (booking, error)"""
+    # Get form data
+    session_date = datetime.strptime(form['date'], '%Y-%m-%d').date()
+    session_time = datetime.strptime(form['time'], '%H:%M').time()
+    consultation_type = form.get('consultation_type', 'video')
+    phone_number = form.get('phone', '')
+    emergency_contact = form.get('emergency_contact', '')
+    notes = form.get('notes', '')
+    psychologist_id = form.get('psychologist_id', type=int)
+    duration = form.get('duration', type=int)
+    
+    # Validate required fields
+    if not phone_number:
+        return None, 'Phone number is required for booking confirmation.'
+    
+    if duration is not None and duration not in SESSION_LENGTHS:
+        return None, 'Please choose a valid session length.'
+    
+    # Pick a psychologist who is working and free for the whole session
+    if duration is None:
+        preferred = Psychologist.query.get(psychologist_id) if psychologist_id else None
+        duration = preferred.session_minutes if preferred else 50
+    assigned_id = assign_practitioner(session_date, session_time, duration, psychologist_id)
+    
+    # The index may lag bookings made by other workers; confirm against the DB, holding the
+    # practitioner's lock until the insert below commits
+    if assigned_id is not None and has_conflict(assigned_id, session_date, session_time, duration):
+        db.session.rollback()
+        assigned_id = None
+    
+    if assigned_id is None:
+        return None, SLOT_TAKEN
+    
+    # Create new booking
+    booking = Booking(
+        user_id=user_id,
+        psychologist_id=assigned_id,
+        session_date=session_date,
+        session_time=session_time,
+        duration_minutes=duration,
+        consultation_type=consultation_type,
+        phone_number=phone_number,
+        emergency_contact=emergency_contact,
+        notes=notes
+    )
+    
+    db.session.add(booking)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker committed a booking for the same start (uq_booking_active_slot)
+        db.session.rollback()
+        return None, SLOT_TAKEN
+    booking_added(booking)
+    mark_slot_taken(booking.session_date, booking.session_time)
+    return booking, None
+
+@timed('booking_stage_seconds', stage='notification_status')
+def _record_notification_status(booking, notification_results):
+    """Persist which notifications went out for a booking"""
+    booking.notification_sent = notification_results['whatsapp'] or notification_results['email']
+    booking.psychologist_notified = notification_results['psychologist']
+    db.session.commit()
+
 @app.route('/booking_confirmation/<int:booking_id>')
+@read_only
 @login_required
 def booking_confirmation(booking_id):
-    booking = Booking.query.get_or_404(booking_id)
+    row = db.session.query(Booking.user_id, Booking.updated_at, Booking.created_at).filter(
+        Booking.id == booking_id
+    ).first()
+    if row is None:
+        abort(404)
     
     # Ensure user can only view their own bookings
+    if row.user_id != current_user.id:
+        flash('Access denied.', 'error')
+        return redirect(url_for('booking'))
+    
+    version = row.updated_at or row.created_at
+    
+    def render_page():
+        body = cached_fragment('booking_confirmation', booking_id, version, lambda: render_template(
+            'booking_confirmation_body.html', booking=db.session.get(Booking, booking_id)))
+        return render_template('booking_confirmation.html', body=body)
+    
+    etag = page_etag('booking_confirmation', booking_id, version, current_user)
+    return conditional_page(etag, version, render_page)
+
+@app.route('/cancel_booking/<int:booking_id>', methods=['POST'])
+@login_required
+def cancel_booking(booking_id):
+    booking = Booking.query.get_or_404(booking_id)
+    
+    # Ensure user can only cancel their own bookings
     if booking.user_id != current_user.id:
         flash('Access denied.', 'error')
         return redirect(url_for('booking'))
     
-    return render_template('booking_confirmation.html', booking=booking)
+    if booking.status == 'cancelled':
+        flash('This session has already been cancelled.', 'info')
+        return redirect(url_for('booking_confirmation', booking_id=booking.id))
+    
+    booking.status = 'cancelled'
+    db.session.commit()
+    invalidate_fragments('booking_confirmation', booking.id)
+    booking_removed(booking)
+    mark_slot_released(booking.session_date, booking.session_time)
+    
+    flash('Your session has been cancelled.', 'info')
+    return redirect(url_for('booking_confirmation', booking_id=booking.id))
+
+@app.route('/api/availability')
+@read_only
+@login_required
+def availability():
+    payload, etag = availability_payload()
+    
+    response = jsonify(payload)
+    response.set_etag(etag)
+    # Let the booking page revalidate cheaply instead of caching stale slots
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/next_slot')
+@read_only
+@login_required
+def next_slot():
+    from datetime import timedelta
+    
+    duration = request.args.get('duration', type=int)
+    if duration is not None and duration not in SESSION_LENGTHS:
+        return jsonify({'error': 'Invalid session length'}), 400
+    
+    # Sessions can be booked from tomorrow onwards
+    after = datetime.combine(date.today() + timedelta(days=1), time(0, 0))
+    found = next_free_slot(after, duration, request.args.get('psychologist_id', type=int))
+    if found is None:
+        return jsonify({'available': False})
+    
+    start, psychologist_id = found
+    psychologist = Psychologist.query.get(psychologist_id)
+    return jsonify({
+        'available': True,
+        'date': start.strftime('%Y-%m-%d'),
+        'time': start.strftime('%H:%M'),
+        'psychologist_id': psychologist_id,
+        'psychologist_name': psychologist.name if psychologist else None
+    })
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    return send_asset(filename)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        abort(401)
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/admin/profiles')
+@admin_required
+def admin_profiles():
+    profiles = list_profiles()
+    for profile in profiles:
+        profile['url'] = url_for('admin_profile', profile_id=profile['id'])
+    return jsonify({'profiles': profiles})
+
+@app.route('/admin/profiles/<int:profile_id>')
+@admin_required
+def admin_profile(profile_id):
+    found = get_profile(profile_id)
+    if found is None:
+        abort(404)
+    record, data = found
+    # cProfile captures open with pstats/snakeviz; stack samples feed flamegraph.pl or speedscope
+    if record['kind'] == 'cprofile':
+        filename, mimetype = f"profile-{profile_id}.prof", 'application/octet-stream'
+    else:
+        filename, mimetype = f"profile-{profile_id}.folded", 'text/plain'
+    return Response(data, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.route('/admin/drift')
+@read_only
+@admin_required
+def admin_drift():
+    """Answer, score and prediction drift against the training data, e.g. /admin/drift?hours=168"""
+    hours = request.args.get('hours', 24, type=int)
+    if not 1 <= hours <= 24 * 366:
+        return jsonify({'error': 'hours must be between 1 and 8784'}), 400
+    return jsonify(drift_report(hours))
+
+@app.route('/admin/export/<kind>')
+@admin_required
+def admin_export(kind):
+    """Stream assessments or bookings, e.g. /admin/export/assessments?format=ndjson&start=2025-01-01&gzip=1"""
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', '0') in ('1', 'true', 'yes')
+    try:
+        start = parse_date(request.args.get('start'), 'start')
+        end = parse_date(request.args.get('end'), 'end')
+        # Validation runs here; rows are only read as the client consumes the body
+        body = export_stream(read_engine(db), kind, fmt, request.args.get('columns'), start, end, compress)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    response = Response(body, mimetype='application/gzip' if compress else FORMATS[fmt][0])
+    response.headers['Content-Disposition'] = f'attachment; filename={export_filename(kind, fmt, start, end, compress)}'
+    response.headers['Cache-Control'] = 'no-store'
+    # Stop nginx from buffering the whole export before the client sees any of it
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
+@timed('quiz_stage_seconds', stage='csv_log')
 def log_to_csv(email, stress_score, ml_prediction, gemini_summary):
     """Log assessment results to CSV file"""
     csv_file = 'assessment_logs.csv'
@@ -0,0 +1,362 @@
+"""
+Scheduling Service for MindMetric AI
+Assigns sessions across psychologists using per-practitioner interval indexes
+"""
+import os
+import logging
+import threading
+import time as _time
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import or_
+from app import db
+from db_routing import primary_reads
+from models import Booking, Psychologist
+from notification_service import DEFAULT_PSYCHOLOGIST_NAME, DEFAULT_PSYCHOLOGIST_EMAIL
+
+# Sessions can be scheduled 1-60 days in advance
+BOOKING_WINDOW_DAYS = 60
+
+# Session lengths a client may request (minutes)
+SESSION_LENGTHS = (30, 50, 80)
+
+# Session starts are offered on this grid, measured from midnight
+SLOT_STEP_MINUTES = int(os.environ.get("SLOT_STEP_MINUTES", "60"))
+
+# How long a worker trusts its indexes before re-reading the window
+SCHEDULE_CACHE_TTL = float(os.environ.get("SCHEDULE_CACHE_TTL", "30"))
+
+# Bookings that still occupy their slot
+ACTIVE_BOOKING = or_(Booking.status.is_(None), Booking.status != 'cancelled')
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(day, at):
+    """Convert a date and time to an absolute minute count"""
+    return day.toordinal() * MINUTES_PER_DAY + at.hour * 60 + at.minute
+
+
+def from_minutes(minutes):
+    """Convert an absolute minute count back to a datetime"""
+    day, offset = divmod(minutes, MINUTES_PER_DAY)
+    return datetime.combine(date.fromordinal(day), time(offset // 60, offset % 60))
+
+
+class IntervalIndex:
+    """[start, end) intervals kept in parallel arrays sorted by start
+
+    Stored intervals may overlap each other (bookings that raced in before the database
+    guard existed), so reach[i] keeps the latest end among the first i + 1 intervals
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.reach = []
+        self.booking_ids = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _update_reach(self, i):
+        """Recompute the running maximum of ends from position i on"""
+        del self.reach[i:]
+        latest = self.reach[-1] if self.reach else None
+        for end in self.ends[i:]:
+            latest = end if latest is None or end > latest else latest
+            self.reach.append(latest)
+
+    def conflict(self, start, end):
+        """Return a time before which [start, end) cannot be free, or None if it is free"""
+        i = bisect_right(self.starts, start)
+        # Any earlier interval, not just the nearest one, may still run past start
+        if i > 0 and self.reach[i - 1] > start:
+            return self.reach[i - 1]
+        if i < len(self.starts) and self.starts[i] < end:
+            return self.ends[i]
+        return None
+
+    def overlaps(self, start, end):
+        """Check whether [start, end) intersects any stored interval"""
+        return self.conflict(start, end) is not None
+
+    def add(self, start, end, booking_id=None):
+        """Insert an interval, keeping the arrays sorted by start"""
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.booking_ids.insert(i, booking_id)
+        self._update_reach(i)
+
+    def remove(self, start, booking_id=None):
+        """Remove the interval starting at start (matching booking_id if given)"""
+        i = bisect_right(self.starts, start) - 1
+        while i >= 0 and self.starts[i] == start:
+            if booking_id is None or self.booking_ids[i] == booking_id:
+                del self.starts[i]
+                del self.ends[i]
+                del self.booking_ids[i]
+                self._update_reach(i)
+                return True
+            i -= 1
+        return False
+
+    def count_between(self, start, end):
+        """Count intervals starting within [start, end)"""
+        return bisect_right(self.starts, end - 1) - bisect_right(self.starts, start - 1)
+
+    def next_free(self, start, limit, duration, step=SLOT_STEP_MINUTES):
+        """Earliest grid-aligned t >= start with [t, t + duration) free and ending by limit"""
+        t = _align(start, step)
+        while t + duration <= limit:
+            blocked_until = self.conflict(t, t + duration)
+            if blocked_until is None:
+                return t
+            t = _align(blocked_until, step)
+        return None
+
+
+def _align(minutes, step):
+    """Round an absolute minute count up to the slot grid"""
+    return -(-minutes // step) * step
+
+
+class Practitioner:
+    """Lightweight, session-independent copy of a Psychologist row"""
+
+    def __init__(self, psychologist):
+        self.id = psychologist.id
+        self.name = psychologist.name
+        self.session_minutes = psychologist.session_minutes or 50
+        self.work_start = psychologist.work_start or time(9, 0)
+        self.work_end = psychologist.work_end or time(18, 0)
+        self.working_days = {
+            int(day) for day in (psychologist.working_days or '').split(',') if day.strip()
+        }
+
+    def works_on(self, day):
+        return day.weekday() in self.working_days
+
+    def working_bounds(self, day):
+        """Return the working hours of a day as absolute minutes"""
+        return to_minutes(day, self.work_start), to_minutes(day, self.work_end)
+
+
+class Scheduler:
+    """Per-practitioner interval indexes for the booking window"""
+
+    def __init__(self, practitioners):
+        self.practitioners = {p.id: p for p in practitioners}
+        self.indexes = {p.id: IntervalIndex() for p in practitioners}
+        self.default_id = min(self.practitioners) if self.practitioners else None
+
+    def load(self, start, end):
+        """Fill the indexes from a single range query over the window"""
+        rows = db.session.query(
+            Booking.id, Booking.psychologist_id, Booking.session_date,
+            Booking.session_time, Booking.duration_minutes
+        ).filter(
+            Booking.session_date.between(start, end),
+            ACTIVE_BOOKING
+        ).order_by(Booking.session_date, Booking.session_time).all()
+
+        for booking_id, psychologist_id, session_date, session_time, duration in rows:
+            self._add(booking_id, psychologist_id, session_date, session_time, duration)
+        return len(rows)
+
+    def _add(self, booking_id, psychologist_id, session_date, session_time, duration):
+        # Bookings made before practitioners existed belong to the default one
+        index = self.indexes.get(psychologist_id or self.default_id)
+        if index is None:
+            return
+        start = to_minutes(session_date, session_time)
+        index.add(start, start + (duration or 50), booking_id)
+
+    def add_booking(self, booking):
+        self._add(booking.id, booking.psychologist_id, booking.session_date,
+                  booking.session_time, booking.duration_minutes)
+
+    def remove_booking(self, booking):
+        index = self.indexes.get(booking.psychologist_id or self.default_id)
+        if index is not None:
+            index.remove(to_minutes(booking.session_date, booking.session_time), booking.id)
+
+    def is_free(self, psychologist_id, session_date, session_time, duration):
+        """Check working hours and overlaps for one practitioner"""
+        practitioner = self.practitioners.get(psychologist_id)
+        if practitioner is None or not practitioner.works_on(session_date):
+            return False
+        day_start, day_end = practitioner.working_bounds(session_date)
+        start = to_minutes(session_date, session_time)
+        if start < day_start or start + duration > day_end:
+            return False
+        return not self.indexes[psychologist_id].overlaps(start, start + duration)
+
+    def free_practitioners(self, session_date, session_time, duration=None):
+        """List practitioners who can take a session starting at the given time"""
+        return [
+            p for p in self.practitioners.values()
+            if self.is_free(p.id, session_date, session_time, duration or p.session_minutes)
+        ]
+
+    def assign(self, session_date, session_time, duration, psychologist_id=None):
+        """Pick a free practitioner, preferring the least loaded on that day"""
+        if psychologist_id is not None:
+            if self.is_free(psychologist_id, session_date, session_time, duration):
+                return psychologist_id
+            return None
+
+        day_start = to_minutes(session_date, time(0, 0))
+        day_end = day_start + MINUTES_PER_DAY
+        best_id, best_load = None, None
+        for p in self.practitioners.values():
+            if not self.is_free(p.id, session_date, session_time, duration):
+                continue
+            load = self.indexes[p.id].count_between(day_start, day_end)
+            if best_load is None or load < best_load:
+                best_id, best_load = p.id, load
+        return best_id
+
+    def next_free_for(self, psychologist_id, after, duration=None, days=BOOKING_WINDOW_DAYS):
+        """Earliest free start for one practitioner at or after a datetime"""
+        practitioner = self.practitioners[psychologist_id]
+        index = self.indexes[psychologist_id]
+        duration = duration or practitioner.session_minutes
+        after_minutes = to_minutes(after.date(), after.time())
+
+        for offset in range(days + 1):
+            day = after.date() + timedelta(days=offset)
+            if not practitioner.works_on(day):
+                continue
+            day_start, day_end = practitioner.working_bounds(day)
+            start = index.next_free(max(day_start, after_minutes), day_end, duration)
+            if start is not None:
+                return start
+        return None
+
+    def find_next_free_slot(self, after, duration=None, psychologist_ids=None, days=BOOKING_WINDOW_DAYS):
+        """Earliest (datetime, psychologist_id) free across practitioners"""
+        candidates = psychologist_ids or list(self.practitioners)
+        best = None
+        for psychologist_id in candidates:
+            if psychologist_id not in self.practitioners:
+                continue
+            start = self.next_free_for(psychologist_id, after, duration, days)
+            if start is not None and (best is None or start < best[0]):
+                best = (start, psychologist_id)
+        if best is None:
+            return None
+        return from_minutes(best[0]), best[1]
+
+
+_lock = threading.RLock()
+_scheduler = None
+_window_start = None
+_loaded_at = 0.0
+
+
+def booking_window(today=None):
+    """Return the first and last bookable dates (tomorrow to +60 days)"""
+    today = today or date.today()
+    return today + timedelta(days=1), today + timedelta(days=BOOKING_WINDOW_DAYS)
+
+
+def ensure_default_practitioner():
+    """Create the default psychologist when the table is empty"""
+    if Psychologist.query.first() is None:
+        # The original single psychologist took bookings on every day of the week
+        db.session.add(Psychologist(
+            name=DEFAULT_PSYCHOLOGIST_NAME,
+            email=DEFAULT_PSYCHOLOGIST_EMAIL,
+            working_days='0,1,2,3,4,5,6'
+        ))
+        db.session.commit()
+        logging.info(f"Created default psychologist {DEFAULT_PSYCHOLOGIST_NAME}")
+
+
+def get_practitioners():
+    """Return all active psychologists ordered by id"""
+    return Psychologist.query.filter_by(active=True).order_by(Psychologist.id).all()
+
+
+def _get_scheduler():
+    """Return this worker's scheduler, reloading it when stale (caller holds _lock)"""
+    global _scheduler, _window_start, _loaded_at
+
+    start, end = booking_window()
+    now = _time.monotonic()
+    if _scheduler is not None and _window_start == start and now - _loaded_at < SCHEDULE_CACHE_TTL:
+        return _scheduler
+
+    # Read from the primary even in @read_only views: a lagging replica would keep slots
+    # looking free or taken here, and in the availability bitmaps built from this, for the whole TTL
+    with primary_reads():
+        scheduler = Scheduler([Practitioner(p) for p in get_practitioners()])
+        # Include today so sessions running into the window are indexed too
+        loaded = scheduler.load(start - timedelta(days=1), end)
+    _scheduler = scheduler
+    _window_start = start
+    _loaded_at = now
+    logging.debug(f"Scheduler reloaded: {len(scheduler.practitioners)} practitioners, {loaded} bookings")
+    return scheduler
+
+
+def assign_practitioner(session_date, session_time, duration, psychologist_id=None):
+    """Return a psychologist id free for the requested session, or None"""
+    with _lock:
+        return _get_scheduler().assign(session_date, session_time, duration, psychologist_id)
+
+
+def next_free_slot(after, duration=None, psychologist_id=None):
+    """Return (datetime, psychologist_id) of the earliest free session, or None"""
+    with _lock:
+        scheduler = _get_scheduler()
+        ids = [psychologist_id] if psychologist_id is not None else None
+        return scheduler.find_next_free_slot(after, duration, ids)
+
+
+def unavailable_slots(day, slot_times):
+    """Return a bitmap of the slots on a day where no practitioner is free"""
+    with _lock:
+        scheduler = _get_scheduler()
+        bits = 0
+        for index, slot in enumerate(slot_times):
+            if not scheduler.free_practitioners(day, slot):
+                bits |= 1 << index
+        return bits
+
+
+def has_conflict(psychologist_id, session_date, session_time, duration):
+    """Authoritative overlap check against the database for one practitioner
+
+    Locks the practitioner's row first (PostgreSQL), so no other booking for them can be
+    checked or inserted until the caller's transaction ends; insert in that transaction
+    """
+    db.session.query(Psychologist.id).filter(Psychologist.id == psychologist_id).with_for_update().scalar()
+    start = to_minutes(session_date, session_time)
+    end = start + duration
+    same_day = db.session.query(Booking.session_time, Booking.duration_minutes).filter(
+        Booking.psychologist_id == psychologist_id,
+        Booking.session_date == session_date,
+        ACTIVE_BOOKING
+    ).all()
+    for other_time, other_duration in same_day:
+        other_start = to_minutes(session_date, other_time)
+        if other_start < end and start < other_start + (other_duration or 50):
+            return True
+    return False
+
+
+def booking_added(booking):
+    """Record a newly committed booking in this worker's indexes"""
+    with _lock:
+        if _scheduler is not None:
+            _scheduler.add_booking(booking)
+
+
+def booking_removed(booking):
+    """Drop a cancelled booking from this worker's indexes"""
+    with _lock:
+        if _scheduler is not None:
+            _scheduler.remove_booking(booking)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Seed MindMetric AI with synthetic users, assessments and bookings at production volume
+Answers follow the same shape as create_sample_models.create_sample_data: each user has a
+latent stress level that drives their Q1-Q15 answers, stress scores use the quiz formula and
+predictions follow the training rules. Rows go in with COPY on PostgreSQL and batched
+executemany elsewhere; new ids start after the existing ones, so seeding is additive
+
+    python seed_data.py --users 1000000 --seed 7
+"""
+
+import argparse
+import csv
+import io
+import logging
+import time
+from datetime import datetime, time as clock_time, timedelta
+
+import numpy as np
+
+from response_codec import encode_responses
+from summary_formatter import format_summary
+from summary_store import compress, summary_key
+
+PERSONALITY_ANSWERS = np.array(['A', 'B', 'C', 'D', 'E'])
+STRESS_ANSWERS = np.array(['Low', 'Medium', 'High'])
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya', 'Sam', 'Alex',
+               'Jordan', 'Taylor', 'Nikhil', 'Divya', 'Rahul', 'Sneha', 'Karthik', 'Lakshmi', 'Chris', 'Noor']
+LAST_NAMES = ['Sharma', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Rao', 'Gupta', 'Menon', 'Kumar', 'Singh',
+              'Smith', 'Fernandes', 'Das', 'Bose', 'Khan', 'Joshi', 'Pillai', 'Shetty', 'Verma', 'Mehta']
+CITIES = ['Bangalore', 'Chennai', 'Hyderabad', 'Mumbai', 'Pune', 'Delhi', 'Kochi', 'Mysore']
+
+# Paragraphs stitched into Gemini-style summaries, by stress band
+SUMMARY_PARAGRAPHS = {
+    'low': [
+        "**Overall wellbeing:** Your responses describe someone who is largely coping well with day-to-day pressures.",
+        "**Strengths:** You appear to recover quickly from setbacks and keep a steady routine.",
+        "**Suggestions:** Keep protecting your sleep and the activities that recharge you; short mindfulness breaks can help you stay here.",
+    ],
+    'moderate': [
+        "**Overall wellbeing:** Your answers point to a moderate, manageable level of stress that shows up on busier days.",
+        "**Patterns:** Worry and tension seem to build when commitments pile up, which is very common.",
+        "**Suggestions:** Regular exercise, a wind-down routine before bed and a few minutes of guided breathing can make a real difference.",
+    ],
+    'high': [
+        "**Overall wellbeing:** Your responses suggest stress is currently high and affecting several areas of life.",
+        "**Patterns:** Sleep, focus and mood all appear to be under strain at the moment.",
+        "**Suggestions:** Please consider speaking with a mental health professional; in the meantime prioritise rest, regular meals and gentle movement.",
+    ],
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk-insert synthetic users, assessments and bookings")
+    parser.add_argument('--users', type=int, default=100_000, help='users to add')
+    parser.add_argument('--assessments-per-user', type=float, default=10.0,
+                        help='mean assessments per user (Poisson distributed)')
+    parser.add_argument('--bookings-per-user', type=float, default=0.3, help='mean bookings per user')
+    parser.add_argument('--psychologists', type=int, default=0,
+                        help='extra psychologists to add so bookings have room (0 = use existing)')
+    parser.add_argument('--years', type=float, default=2.0, help='history span ending today')
+    parser.add_argument('--summary-bytes', type=int, default=1500, help='approximate length of each summary')
+    parser.add_argument('--fallback-rate', type=float, default=0.05,
+                        help='fraction of assessments stored with the fallback summary (Gemini outages)')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for reproducible data')
+    parser.add_argument('--batch-size', type=int, default=50_000, help='users generated per batch')
+    parser.add_argument('--skip-trends', action='store_true', help='do not rebuild stress_trend afterwards')
+    return parser.parse_args()
+
+
+class BulkWriter:
+    """Insert row tuples with COPY on PostgreSQL and executemany elsewhere, tracking throughput"""
+
+    def __init__(self, db):
+        self.db = db
+        self.use_copy = db.engine.dialect.name == 'postgresql'
+        self.counts = {}
+        self.seconds = {}
+
+    def write(self, table, columns, rows):
+        if not rows:
+            return
+        began = time.perf_counter()
+        with self.db.engine.begin() as connection:
+            if self.use_copy:
+                buffer = io.StringIO()
+                if any(isinstance(value, bytes) for value in rows[0]):
+                    # bytea columns take hex text in COPY's csv format
+                    rows = [['\\x' + value.hex() if isinstance(value, bytes) else value for value in row]
+                            for row in rows]
+                csv.writer(buffer).writerows(rows)
+                buffer.seek(0)
+                name = connection.dialect.identifier_preparer.format_table(table)
+                with connection.connection.cursor() as cursor:
+                    cursor.copy_expert(f"COPY {name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            else:
+                connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+        self.seconds[table.name] = self.seconds.get(table.name, 0.0) + time.perf_counter() - began
+
+    def reset_sequences(self, tables):
+        """COPY with explicit ids leaves PostgreSQL sequences behind; move them past the new rows"""
+        if not self.use_copy:
+            return
+        with self.db.engine.begin() as connection:
+            for table in tables:
+                name = connection.dialect.identifier_preparer.format_table(table)
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), COALESCE(MAX(id), 1)) FROM {name}"
+                )
+
+
+def next_id(db, model):
+    return (db.session.query(db.func.max(model.id)).scalar() or 0) + 1
+
+
+def summary_text(band, target_bytes, variant):
+    paragraphs = SUMMARY_PARAGRAPHS[band]
+    text = []
+    while sum(len(part) + 2 for part in text) < target_bytes:
+        text.append(paragraphs[(len(text) + variant) % len(paragraphs)])
+    return '\n\n'.join(text)
+
+
+def prediction_for(stress_score, high_stress_count):
+    """Same rules create_sample_models.create_sample_data uses for training labels"""
+    if stress_score < 2:
+        return 'Meditation'
+    if stress_score < 4:
+        return 'Nature Sounds'
+    if stress_score < 6:
+        return 'Relaxing Music'
+    if stress_score < 8:
+        return 'Guided Breathing'
+    if high_stress_count > 3:
+        return 'Professional Therapy'
+    return 'Podcasts'
+
+
+def generate_users(rng, first_id, count, start, span_seconds, password_hash):
+    """Rows for `count` users plus each one's latent stress level and signup time"""
+    ids = np.arange(first_id, first_id + count)
+    ages = np.clip(rng.normal(32, 10, count).round(), 18, 75).astype(int)
+    first = rng.integers(0, len(FIRST_NAMES), count)
+    last = rng.integers(0, len(LAST_NAMES), count)
+    city = rng.integers(0, len(CITIES), count)
+    # Most people sign up early in the window so they accumulate history
+    signup_offsets = (rng.beta(1.2, 3, count) * span_seconds).astype(int)
+    stress_level = rng.beta(2, 3, count)
+
+    rows = []
+    signups = []
+    for i in range(count):
+        created_at = start + timedelta(seconds=int(signup_offsets[i]))
+        signups.append(created_at)
+        rows.append((
+            int(ids[i]), f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}", int(ages[i]),
+            f"{rng.integers(1, 400)} Main Road, {CITIES[city[i]]}",
+            f"seed{ids[i]}@seed.mindmetric.local", password_hash, created_at,
+        ))
+    return rows, ids, ages, stress_level, signups
+
+
+def generate_assessments(rng, first_id, user_ids, ages, stress_level, signups, end, args, summaries):
+    """Assessment rows; summaries maps (band, variant or age) to a summary_blob key, and the
+    summary_blob rows for keys seen for the first time are returned alongside"""
+    counts = rng.poisson(args.assessments_per_user, len(user_ids))
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(user_ids)), counts)
+    latent = stress_level[owner]
+
+    # Higher latent stress shifts answers towards D/E and High, with per-answer noise
+    personality = np.clip(np.rint(latent[:, None] * 4 + rng.normal(0, 1.0, (total, 10))), 0, 4).astype(int)
+    stress = np.clip(np.rint(latent[:, None] * 2 + rng.normal(0, 0.7, (total, 5))), 0, 2).astype(int)
+    scores = np.round((stress + 1).sum(axis=1) / 15 * 10, 2)
+    high_counts = (personality >= 3).sum(axis=1)
+    fallback = rng.random(total) < args.fallback_rate
+    variants = rng.integers(0, 3, total)
+    offsets = rng.random(total)
+
+    rows = []
+    new_summaries = []
+    for n in range(total):
+        user = owner[n]
+        score = float(scores[n])
+        band = 'low' if score <= 3 else 'moderate' if score <= 6 else 'high'
+        key = ('fallback', band, int(ages[user])) if fallback[n] else ('gemini', band, int(variants[n]))
+        summary = summaries.get(key)
+        if summary is None:
+            if fallback[n]:
+                from gemini_service import generate_fallback_summary
+                text = generate_fallback_summary(score, int(ages[user]))
+            else:
+                text = summary_text(band, args.summary_bytes, int(variants[n]))
+            summary = summaries[key] = summary_key(text)
+            new_summaries.append((summary, text))
+
+        responses = {f'q{i + 1}': PERSONALITY_ANSWERS[personality[n, i]] for i in range(10)}
+        responses.update({f'q{i + 11}': STRESS_ANSWERS[stress[n, i]] for i in range(5)})
+        signup = signups[user]
+        created_at = signup + (end - signup) * float(offsets[n])
+        rows.append((
+            first_id + n, int(user_ids[user]), score, prediction_for(score, int(high_counts[n])),
+            summary, encode_responses(responses), created_at,
+        ))
+    return rows, new_summaries
+
+
+def generate_bookings(rng, first_id, user_ids, stress_level, slots, end, args):
+    """Bookings for users, each taking a distinct (psychologist, day, hour) slot"""
+    counts = rng.poisson(args.bookings_per_user * (0.5 + stress_level))
+    owner = np.repeat(np.arange(len(user_ids)), counts)
+    rows = []
+    for n, user in enumerate(owner):
+        slot = next(slots, None)
+        if slot is None:
+            logging.warning("Ran out of free booking slots; add psychologists with --psychologists")
+            break
+        psychologist_id, day, hour = slot
+        session_date = (end - timedelta(days=day)).date()
+        status = 'cancelled' if rng.random() < 0.12 else 'confirmed'
+        created_at = datetime.combine(session_date, datetime.min.time()) - timedelta(days=int(rng.integers(1, 21)))
+        rows.append((
+            first_id + n, int(user_ids[user]), psychologist_id, session_date, clock_time(hour), 50,
+            'video' if rng.random() < 0.7 else 'in-person', f"+91{rng.integers(7000000000, 9999999999)}",
+            None, status, None, True, True, created_at, created_at,
+        ))
+    return rows
+
+
+def free_slots(rng, psychologist_ids, days):
+    """Yield (psychologist, days-ago, hour) slots in random order without repeats"""
+    hours = list(range(9, 18))
+    per_day = len(psychologist_ids) * len(hours)
+    for index in rng.permutation(days * per_day):
+        day, rest = divmod(int(index), per_day)
+        yield psychologist_ids[rest // len(hours)], day, hours[rest % len(hours)]
+
+
+def main():
+    args = parse_args()
+    from werkzeug.security import generate_password_hash
+    from app import app, db
+    from models import Assessment, Booking, Psychologist, SummaryBlob, User
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rng = np.random.default_rng(args.seed)
+    end = datetime.utcnow().replace(microsecond=0)
+    span_seconds = int(args.years * 365 * 24 * 3600)
+    start = end - timedelta(seconds=span_seconds)
+    # Every seeded user can log in with the password "seeded"
+    password_hash = generate_password_hash('seeded')
+
+    with app.app_context():
+        writer = BulkWriter(db)
+        if args.psychologists:
+            first = next_id(db, Psychologist)
+            writer.write(Psychologist.__table__, ['id', 'name', 'title', 'email', 'session_minutes', 'work_start',
+                                                  'work_end', 'working_days', 'active', 'created_at'], [
+                (first + n, f"Dr. {FIRST_NAMES[n % len(FIRST_NAMES)]} {LAST_NAMES[(n * 7) % len(LAST_NAMES)]}",
+                 'Licensed Clinical Psychologist', f"psych{first + n}@seed.mindmetric.local", 50, clock_time(9),
+                 clock_time(18), '0,1,2,3,4,5', True, start)
+                for n in range(args.psychologists)])
+            writer.reset_sequences([Psychologist.__table__])
+        psychologist_ids = [row[0] for row in db.session.query(Psychologist.id).all()]
+        slots = free_slots(rng, psychologist_ids, int(args.years * 365))
+
+        user_id = next_id(db, User)
+        assessment_id = next_id(db, Assessment)
+        booking_id = next_id(db, Booking)
+        summaries = {}
+        began = time.perf_counter()
+
+        for batch_start in range(0, args.users, args.batch_size):
+            count = min(args.batch_size, args.users - batch_start)
+            user_rows, user_ids, ages, stress_level, signups = generate_users(
+                rng, user_id, count, start, span_seconds, password_hash)
+            writer.write(User.__table__, ['id', 'name', 'age', 'address', 'email', 'password_hash', 'created_at'],
+                         user_rows)
+            user_id += count
+
+            assessment_rows, new_summaries = generate_assessments(rng, assessment_id, user_ids, ages, stress_level,
+                                                                  signups, end, args, summaries)
+            # Each distinct summary is stored once; earlier runs may have stored some already
+            stored = {row[0] for row in db.session.query(SummaryBlob.sha256).filter(
+                SummaryBlob.sha256.in_([key for key, _ in new_summaries]))}
+            writer.write(SummaryBlob.__table__, ['sha256', 'text_data', 'html_data', 'size', 'created_at'], [
+                (key, compress(text), compress(format_summary(text)), len(text.encode('utf-8')), start)
+                for key, text in new_summaries if key not in stored])
+            writer.write(Assessment.__table__, ['id', 'user_id', 'stress_score', 'ml_prediction', 'summary_sha256',
+                                                'answers', 'created_at'], assessment_rows)
+            assessment_id += len(assessment_rows)
+
+            booking_rows = generate_bookings(rng, booking_id, user_ids, stress_level, slots, end, args)
+            writer.write(Booking.__table__, ['id', 'user_id', 'psychologist_id', 'session_date', 'session_time',
+                                             'duration_minutes', 'consultation_type', 'phone_number',
+                                             'emergency_contact', 'status', 'notes', 'notification_sent',
+                                             'psychologist_notified', 'created_at', 'updated_at'], booking_rows)
+            booking_id += len(booking_rows)
+
+            elapsed = time.perf_counter() - began
+            done = batch_start + count
+            print(f"  {done:,}/{args.users:,} users, {sum(writer.counts.values()):,} rows "
+                  f"({sum(writer.counts.values()) / elapsed:,.0f} rows/s overall)")
+
+        writer.reset_sequences([User.__table__, Assessment.__table__, Booking.__table__])
+        total_seconds = time.perf_counter() - began
+
+        print(f"\nSeeded with {'COPY' if writer.use_copy else 'executemany'} (seed {args.seed}):")
+        for table, count in writer.counts.items():
+            seconds = writer.seconds[table]
+            print(f"  {table:<14} {count:>12,} rows  {seconds:8.1f}s insert  {count / seconds:>10,.0f} rows/s")
+        print(f"  total wall time {total_seconds:.1f}s including generation")
+
+        if not args.skip_trends:
+            from trend_service import rebuild_trends
+            began = time.perf_counter()
+            rebuilt = rebuild_trends()
+            print(f"  rebuilt {rebuilt:,} stress trends in {time.perf_counter() - began:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
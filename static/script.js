@@ -48,14 +48,36 @@ function initializeQuizProgress() {
     }
     
     // Form submission handling
+    const submitButton = quizForm.querySelector('button[type="submit"]');
+    const submitLabel = submitButton.innerHTML;
+    
     quizForm.addEventListener('submit', function(e) {
-        const button = quizForm.querySelector('button[type="submit"]');
-        button.innerHTML = '<i class="bi bi-hourglass-split me-2"></i>Analyzing...';
-        button.disabled = true;
+        // A second click would only wait on the first request server-side, so don't send it
+        if (quizForm.dataset.submitted) {
+            e.preventDefault();
+            return;
+        }
+        if (!quizForm.checkValidity()) {
+            return;
+        }
+        quizForm.dataset.submitted = 'true';
+        
+        submitButton.innerHTML = '<i class="bi bi-hourglass-split me-2"></i>Analyzing...';
+        submitButton.disabled = true;
         
         // Show loading state
         document.body.classList.add('loading');
     });
+    
+    // Coming back from the results page restores this page as it was left; make it usable again
+    window.addEventListener('pageshow', function(e) {
+        if (e.persisted) {
+            delete quizForm.dataset.submitted;
+            submitButton.innerHTML = submitLabel;
+            submitButton.disabled = false;
+            document.body.classList.remove('loading');
+        }
+    });
 }
 
 // Form validation enhancements
@@ -231,63 +253,7 @@ function checkPasswordStrength(password) {
     return strength;
 }
 
-// AI Summary formatting and interaction
-function formatAISummary() {
-    const rawSummary = document.getElementById('raw-summary');
-    const summaryContent = document.getElementById('ai-summary-content');
-    
-    if (!rawSummary || !summaryContent) return;
-    
-    let text = rawSummary.textContent.trim();
-    
-    // Format the summary into sections
-    const sections = text.split('\n\n');
-    let formattedHTML = '';
-    
-    sections.forEach(section => {
-        section = section.trim();
-        if (!section) return;
-        
-        // Check if it's a heading (starts with capital and has fewer than 100 chars)
-        if (section.length < 100 && section.charAt(0) === section.charAt(0).toUpperCase() && !section.includes('.')) {
-            formattedHTML += `<h4>${section}</h4>`;
-        } else {
-            // Check if it contains bullet points
-            if (section.includes('•') || section.includes('-')) {
-                const lines = section.split('\n');
-                let ulContent = '';
-                let inList = false;
-                
-                lines.forEach(line => {
-                    line = line.trim();
-                    if (line.startsWith('•') || line.startsWith('-')) {
-                        if (!inList) {
-                            if (ulContent) formattedHTML += `<p>${ulContent}</p>`;
-                            ulContent = '';
-                            inList = true;
-                            formattedHTML += '<ul>';
-                        }
-                        formattedHTML += `<li>${line.substring(1).trim()}</li>`;
-                    } else if (line) {
-                        if (inList) {
-                            formattedHTML += '</ul>';
-                            inList = false;
-                        }
-                        ulContent += line + ' ';
-                    }
-                });
-                
-                if (inList) formattedHTML += '</ul>';
-                if (ulContent.trim()) formattedHTML += `<p>${ulContent.trim()}</p>`;
-            } else {
-                formattedHTML += `<div class="summary-section"><p>${section}</p></div>`;
-            }
-        }
-    });
-    
-    summaryContent.innerHTML = formattedHTML || text;
-}
-
+// AI Summary view toggle (the formatted HTML is rendered server-side by summary_formatter.py)
 function toggleSummaryView() {
     const content = document.getElementById('ai-summary-content');
     const icon = document.getElementById('toggle-icon');
@@ -297,14 +263,20 @@ function toggleSummaryView() {
     if (!content || !icon || !text || !rawSummary) return;
     
     if (content.classList.contains('detailed-view')) {
-        // Switch to formatted view
-        formatAISummary();
+        // Switch back to the server-rendered view
+        content.innerHTML = content.dataset.formatted;
         content.classList.remove('detailed-view');
         icon.className = 'bi bi-eye';
         text.textContent = 'Show Detailed View';
     } else {
         // Switch to raw view
-        content.innerHTML = `<div class="detailed-view"><pre>${rawSummary.textContent}</pre></div>`;
+        content.dataset.formatted = content.innerHTML;
+        const pre = document.createElement('pre');
+        pre.textContent = rawSummary.textContent;
+        const wrapper = document.createElement('div');
+        wrapper.className = 'detailed-view';
+        wrapper.appendChild(pre);
+        content.replaceChildren(wrapper);
         content.classList.add('detailed-view');
         icon.className = 'bi bi-eye-slash';
         text.textContent = 'Show Formatted View';
@@ -377,5 +349,4 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeFormValidation();
     initializeDateRestrictions();
     initializeAnimations();
-    formatAISummary(); // Format AI summary on results page
 });
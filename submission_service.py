@@ -0,0 +1,132 @@
+"""
+Submission Service for MindMetric AI
+Idempotency tokens for the quiz form: the first request with a token claims it and runs
+the pipeline, repeats wait for that result instead of running it again
+"""
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import QuizSubmission
+
+# A pending claim older than this is assumed abandoned (worker died) and can be taken over
+SUBMISSION_CLAIM_TIMEOUT = int(os.environ.get("SUBMISSION_CLAIM_TIMEOUT", "90"))
+
+# How long a repeat request waits for the original to finish before giving up
+SUBMISSION_WAIT_SECONDS = float(os.environ.get("SUBMISSION_WAIT_SECONDS", "30"))
+
+# Claims older than this many hours are deleted by archive_assessments.py; a repeat of an
+# older form after that runs the pipeline again
+SUBMISSION_RETENTION_HOURS = float(os.environ.get("SUBMISSION_RETENTION_HOURS", "168"))
+
+TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9-]{16,64}$')
+
+CLAIMED, DONE, IN_FLIGHT = 'claimed', 'done', 'in_flight'
+
+
+class SubmissionTakenOver(Exception):
+    """Raised when a claim went stale and another request took it over before this one finished"""
+
+
+def valid_token(token):
+    return bool(token) and TOKEN_PATTERN.match(token) is not None
+
+
+def claim_submission(user_id, token):
+    """Claim a token; returns (CLAIMED, claimed_at), (DONE, assessment_id) or (IN_FLIGHT, None)
+
+    claimed_at identifies this request's claim to complete_submission and release_submission
+    """
+    claimed_at = datetime.utcnow()
+    db.session.add(QuizSubmission(user_id=user_id, token=token, status='pending', claimed_at=claimed_at))
+    try:
+        db.session.commit()
+        return CLAIMED, claimed_at
+    except IntegrityError:
+        db.session.rollback()
+
+    submission = QuizSubmission.query.filter_by(user_id=user_id, token=token).first()
+    if submission.status == 'done':
+        return DONE, submission.assessment_id
+
+    # Failed or abandoned claims can be retried; the conditional UPDATE lets only one request win
+    claimed_at = datetime.utcnow()
+    stale = claimed_at - timedelta(seconds=SUBMISSION_CLAIM_TIMEOUT)
+    taken = QuizSubmission.query.filter(
+        QuizSubmission.id == submission.id,
+        (QuizSubmission.status == 'failed')
+        | ((QuizSubmission.status == 'pending') & (QuizSubmission.claimed_at < stale))
+    ).update({'status': 'pending', 'claimed_at': claimed_at}, synchronize_session=False)
+    db.session.commit()
+    return (CLAIMED, claimed_at) if taken else (IN_FLIGHT, None)
+
+
+def complete_submission(user_id, token, claimed_at, assessment_id):
+    """Mark this request's claim done in the current transaction (caller commits with the assessment)
+
+    Raises SubmissionTakenOver if the claim went stale and another request took it over;
+    the caller rolls back so that request's assessment is the only one
+    """
+    completed = QuizSubmission.query.filter_by(
+        user_id=user_id, token=token, status='pending', claimed_at=claimed_at
+    ).update({'status': 'done', 'assessment_id': assessment_id, 'completed_at': datetime.utcnow()},
+             synchronize_session=False)
+    if not completed:
+        raise SubmissionTakenOver(token)
+
+
+def release_submission(user_id, token, claimed_at):
+    """Mark this request's claim failed so the user's retry runs the pipeline again"""
+    try:
+        QuizSubmission.query.filter_by(user_id=user_id, token=token, status='pending',
+                                       claimed_at=claimed_at).update(
+            {'status': 'failed'}, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Could not release quiz submission {token}: {e}")
+
+
+def _submission_state(user_id, token):
+    row = db.session.query(QuizSubmission.status, QuizSubmission.assessment_id).filter_by(
+        user_id=user_id, token=token).first()
+    # End the read transaction so the next poll sees the other worker's commit
+    db.session.rollback()
+    return row
+
+
+async def wait_for_submission(user_id, token, timeout=SUBMISSION_WAIT_SECONDS):
+    """Poll a claim held by another request; returns its assessment id, or None if it failed or timed out"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = 0.1
+    while loop.time() < deadline:
+        await asyncio.sleep(delay)
+        row = await asyncio.to_thread(_submission_state, user_id, token)
+        if row is None or row.status == 'failed':
+            return None
+        if row.status == 'done':
+            return row.assessment_id
+        delay = min(delay * 2, 1.0)
+    return None
+
+
+def purge_submissions(retention_hours=SUBMISSION_RETENTION_HOURS, batch_size=5000, dry_run=False):
+    """Delete claims (done, failed or abandoned) older than the retention window; returns how many"""
+    cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+    if dry_run:
+        return QuizSubmission.query.filter(QuizSubmission.claimed_at < cutoff).count()
+    deleted = 0
+    while True:
+        # Short batches keep each delete's locks brief while requests are claiming tokens
+        ids = [row[0] for row in db.session.query(QuizSubmission.id).filter(
+            QuizSubmission.claimed_at < cutoff
+        ).order_by(QuizSubmission.id).limit(batch_size)]
+        if not ids:
+            return deleted
+        QuizSubmission.query.filter(QuizSubmission.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        deleted += len(ids)
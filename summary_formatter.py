@@ -0,0 +1,97 @@
+"""
+Summary Formatter for MindMetric AI
+Turns a Gemini (or fallback) summary into HTML once, when it is saved
+Every piece of text is escaped before markup is added, so the output can only contain
+the tags produced here: h4, p, ul, ol, li, strong, em and the summary-section div
+"""
+import re
+from markupsafe import Markup, escape
+
+# Bump when the output changes; backfill_summary_html.py --all re-renders stored rows
+SUMMARY_FORMAT_VERSION = 1
+
+HEADING_PATTERN = re.compile(r'^#{1,6}\s+(.+?)\s*#*$')
+BOLD_LINE_PATTERN = re.compile(r'^\*\*([^*]+?)\*\*:?$')
+BULLET_PATTERN = re.compile(r'^[*\-•]\s+(.*)$')
+NUMBERED_PATTERN = re.compile(r'^\d{1,2}[.)]\s+(.*)$')
+BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+ITALIC_PATTERN = re.compile(r'(?<![\w*])\*([^*\s][^*]*?)\*(?![\w*])')
+
+
+def format_inline(text):
+    """Escape a line of text, then turn **bold** and *italic* into tags"""
+    html = str(escape(text))
+    if '*' not in html:
+        return html
+    html = BOLD_PATTERN.sub(r'<strong>\1</strong>', html)
+    return ITALIC_PATTERN.sub(r'<em>\1</em>', html)
+
+
+def _is_heading(block):
+    # Same rule the results page used client-side: a short capitalised block without a full stop
+    return len(block) < 100 and '\n' not in block and block[0].isupper() and '.' not in block
+
+
+def _format_block(block):
+    lines = [line.strip() for line in block.splitlines() if line.strip()]
+    if len(lines) == 1:
+        heading = HEADING_PATTERN.match(lines[0]) or BOLD_LINE_PATTERN.match(lines[0])
+        if heading:
+            return f"<h4>{format_inline(heading.group(1).rstrip(':'))}</h4>"
+        if _is_heading(lines[0]):
+            return f"<h4>{format_inline(lines[0])}</h4>"
+
+    parts = []
+    paragraph = []
+    list_tag = None
+
+    def close_paragraph():
+        if paragraph:
+            parts.append(f"<p>{format_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            parts.append(f"</{list_tag}>")
+            list_tag = None
+
+    for line in lines:
+        heading = HEADING_PATTERN.match(line)
+        bullet = BULLET_PATTERN.match(line)
+        numbered = None if bullet else NUMBERED_PATTERN.match(line)
+        if heading:
+            close_paragraph()
+            close_list()
+            parts.append(f"<h4>{format_inline(heading.group(1))}</h4>")
+        elif bullet or numbered:
+            close_paragraph()
+            tag = 'ul' if bullet else 'ol'
+            if list_tag != tag:
+                close_list()
+                parts.append(f"<{tag}>")
+                list_tag = tag
+            parts.append(f"<li>{format_inline((bullet or numbered).group(1))}</li>")
+        else:
+            close_list()
+            paragraph.append(line)
+    close_paragraph()
+    close_list()
+
+    if len(parts) == 1 and parts[0].startswith('<p>'):
+        return f'<div class="summary-section">{parts[0]}</div>'
+    return ''.join(parts)
+
+
+def format_summary(text):
+    """Sanitized HTML for a summary; None for an empty one"""
+    if not text or not text.strip():
+        return None
+    blocks = re.split(r'\n\s*\n', text.replace('\r\n', '\n').strip())
+    return '\n'.join(_format_block(block) for block in blocks if block.strip())
+
+
+def summary_html(assessment):
+    """Stored HTML for an assessment, formatting on the fly for summaries stored without it"""
+    html = getattr(assessment, 'gemini_summary_html', None) or format_summary(assessment.gemini_summary)
+    return Markup(html or '')
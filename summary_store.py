@@ -0,0 +1,121 @@
+"""
+Summary Store for MindMetric AI
+Keeps each distinct summary once in summary_blob, keyed by the SHA-256 of its text and
+compressed with zlib (or zstd when the optional `zstandard` package is installed and
+SUMMARY_COMPRESSION=zstd). The sanitized HTML is rendered once per distinct summary and
+stored compressed next to it. Assessments reference a blob by hash; blobs left without
+any (archived partitions, regenerated summaries) are swept by archive_assessments.py
+"""
+import hashlib
+import logging
+import os
+import zlib
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from summary_formatter import format_summary
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# zlib or zstd for new blobs; stored blobs are read whichever codec wrote them
+SUMMARY_COMPRESSION = os.environ.get("SUMMARY_COMPRESSION", "zlib")
+
+# Compression level for new blobs (zlib 1-9, zstd 1-22); summaries are small, so high levels stay cheap
+SUMMARY_COMPRESSION_LEVEL = int(os.environ.get("SUMMARY_COMPRESSION_LEVEL", "9"))
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+if SUMMARY_COMPRESSION == 'zstd' and zstandard is None:
+    logging.warning("SUMMARY_COMPRESSION=zstd but zstandard is not installed; compressing summaries with zlib")
+
+
+def summary_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def compress(text):
+    data = text.encode('utf-8')
+    if SUMMARY_COMPRESSION == 'zstd' and zstandard is not None:
+        return zstandard.ZstdCompressor(level=SUMMARY_COMPRESSION_LEVEL).compress(data)
+    return zlib.compress(data, min(SUMMARY_COMPRESSION_LEVEL, 9))
+
+
+def decompress(data):
+    """Text of a stored blob; the codec is told apart by the zstd frame magic"""
+    if data is None:
+        return None
+    data = bytes(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("This summary was stored with zstd; install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(data).decode('utf-8')
+    return zlib.decompress(data).decode('utf-8')
+
+
+def make_blob(text, html=None):
+    """An unsaved SummaryBlob for a text; HTML is rendered unless given"""
+    from models import SummaryBlob
+    if text is None:
+        return None
+    if html is None:
+        html = format_summary(text)
+    return SummaryBlob(sha256=summary_key(text), text_data=compress(text),
+                       html_data=compress(html) if html is not None else None,
+                       size=len(text.encode('utf-8')), created_at=datetime.utcnow())
+
+
+def store_summary(text):
+    """The SummaryBlob for a text, inserting it only if no assessment has used that text before
+
+    The insert runs in a savepoint, so losing a race with another worker storing the same
+    text just means reading theirs; the caller's transaction is untouched either way
+    """
+    from app import db
+    from models import SummaryBlob
+    if text is None:
+        return None
+    key = summary_key(text)
+    blob = db.session.get(SummaryBlob, key)
+    if blob is not None:
+        return blob
+
+    blob = make_blob(text)
+    try:
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        blob = db.session.get(SummaryBlob, key, populate_existing=True)
+    return blob
+
+
+def purge_unreferenced_blobs(batch_size=5000, dry_run=False):
+    """Delete blobs that no assessment references any more; returns how many
+
+    Archive files carry their summaries as text, so archived assessments need no blob
+    """
+    from app import db
+    from models import Assessment, SummaryBlob
+    unreferenced = ~db.session.query(Assessment.id).filter(Assessment.summary_sha256 == SummaryBlob.sha256).exists()
+    if dry_run:
+        return db.session.query(SummaryBlob.sha256).filter(unreferenced).count()
+    deleted = 0
+    last_key = ''
+    while True:
+        keys = [row[0] for row in db.session.query(SummaryBlob.sha256).filter(
+            SummaryBlob.sha256 > last_key, unreferenced
+        ).order_by(SummaryBlob.sha256).limit(batch_size)]
+        if not keys:
+            return deleted
+        try:
+            # Checked again by the DELETE, so a blob picked up by a new assessment since is kept
+            deleted += db.session.query(SummaryBlob).filter(
+                SummaryBlob.sha256.in_(keys), unreferenced
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except IntegrityError:
+            # An assessment using one of them committed during the delete; redo the batch without it
+            db.session.rollback()
+            continue
+        last_key = keys[-1]
@@ -0,0 +1,175 @@
+"""
+Trend Service for MindMetric AI
+Maintains per-user stress rollups incrementally as assessments are saved
+"""
+import json
+import logging
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import ArchivedPartition, Assessment, StressTrend, User
+
+# Number of most recent scores kept for the trend widget
+TREND_WINDOW = 10
+
+# Weight of the newest score in the exponentially weighted moving average
+EWMA_ALPHA = 0.3
+
+# EWMA movement relative to the long-run mean treated as a real change
+TREND_THRESHOLD = 0.5
+
+
+def apply_assessment(trend, stress_score, ml_prediction, created_at):
+    """Fold one assessment into a trend row in O(1)"""
+    count = (trend.assessment_count or 0) + 1
+    if count == 1:
+        trend.mean_score = stress_score
+        trend.ewma_score = stress_score
+    else:
+        trend.mean_score = trend.mean_score + (stress_score - trend.mean_score) / count
+        trend.ewma_score = EWMA_ALPHA * stress_score + (1 - EWMA_ALPHA) * trend.ewma_score
+    trend.assessment_count = count
+    trend.last_score = stress_score
+    trend.last_assessment_at = created_at
+
+    recent = json.loads(trend.recent_scores or '[]')
+    recent.append(stress_score)
+    trend.recent_scores = json.dumps(recent[-TREND_WINDOW:])
+
+    counts = json.loads(trend.prediction_counts or '{}')
+    counts[ml_prediction] = counts.get(ml_prediction, 0) + 1
+    trend.prediction_counts = json.dumps(counts)
+
+
+def record_assessment(user_id, stress_score, ml_prediction, created_at):
+    """Update the user's rollup in the current transaction (caller commits)
+
+    A first assessment inserts the row in a savepoint: FOR UPDATE has nothing to lock yet,
+    so two first submissions can race, and the loser then locks the winner's row instead
+    of failing (and rolling back) the caller's transaction
+    """
+    query = db.session.query(StressTrend).filter_by(user_id=user_id).with_for_update()
+    trend = query.first()
+    if trend is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(StressTrend(user_id=user_id, assessment_count=0, recent_scores='[]',
+                                           prediction_counts='{}'))
+        except IntegrityError:
+            pass
+        trend = query.populate_existing().one()
+    apply_assessment(trend, stress_score, ml_prediction, created_at)
+    return trend
+
+
+def get_trend(user_id):
+    """Return the user's rollup row, or None before their first assessment"""
+    return db.session.get(StressTrend, user_id)
+
+
+def trend_summary(trend):
+    """Shape a rollup row for the trend widget"""
+    if trend is None or not trend.assessment_count:
+        return None
+
+    counts = json.loads(trend.prediction_counts or '{}')
+    if trend.assessment_count < 2:
+        direction = 'new'
+    elif trend.ewma_score < trend.mean_score - TREND_THRESHOLD:
+        direction = 'improving'
+    elif trend.ewma_score > trend.mean_score + TREND_THRESHOLD:
+        direction = 'rising'
+    else:
+        direction = 'steady'
+
+    return {
+        'assessment_count': trend.assessment_count,
+        'mean_score': round(trend.mean_score, 2),
+        'ewma_score': round(trend.ewma_score, 2),
+        'last_score': trend.last_score,
+        'recent_scores': json.loads(trend.recent_scores or '[]'),
+        'prediction_counts': counts,
+        'top_prediction': max(counts, key=counts.get) if counts else None,
+        'direction': direction,
+        'last_assessment_at': trend.last_assessment_at.isoformat() if trend.last_assessment_at else None
+    }
+
+
+def _fold_assessments(condition):
+    """Fresh (unsaved) rollups of the users whose assessments match condition, by user id"""
+    # Walks the (user_id, created_at, id) index in order; no summaries are loaded
+    rows = db.session.query(
+        Assessment.user_id, Assessment.stress_score, Assessment.ml_prediction, Assessment.created_at
+    ).filter(condition).order_by(Assessment.user_id, Assessment.created_at, Assessment.id).yield_per(5000)
+
+    trends = {}
+    for user_id, stress_score, ml_prediction, created_at in rows:
+        trend = trends.get(user_id)
+        if trend is None:
+            trend = trends[user_id] = StressTrend(
+                user_id=user_id, assessment_count=0, recent_scores='[]', prediction_counts='{}'
+            )
+        apply_assessment(trend, stress_score, ml_prediction, created_at)
+    return trends
+
+
+def move_predictions(changes):
+    """Apply re-scored predictions to the rollups in the current transaction (caller commits)
+
+    changes is an iterable of (user id, old prediction, new prediction). Only the prediction
+    counts move, so history from archived partitions (no longer in the assessment table)
+    is kept; users without a rollup yet are left for backfill_trends.py
+    """
+    deltas = {}
+    for user_id, old, new in changes:
+        counts = deltas.setdefault(user_id, {})
+        counts[old] = counts.get(old, 0) - 1
+        counts[new] = counts.get(new, 0) + 1
+
+    trends = db.session.query(StressTrend).filter(
+        StressTrend.user_id.in_(sorted(deltas))
+    ).order_by(StressTrend.user_id).with_for_update()
+    for trend in trends:
+        counts = json.loads(trend.prediction_counts or '{}')
+        for prediction, delta in deltas[trend.user_id].items():
+            count = counts.get(prediction, 0) + delta
+            if count > 0:
+                counts[prediction] = count
+            else:
+                counts.pop(prediction, None)
+        trend.prediction_counts = json.dumps(counts)
+
+
+def rebuild_trends(batch_size=1000):
+    """Rebuild every rollup from the assessment table, one batch of users at a time
+
+    Refuses once partitions have been archived: their assessments are no longer in the
+    table, so a rebuild would silently drop that history from every rollup
+    """
+    archived = db.session.query(ArchivedPartition.name).count()
+    if archived:
+        raise RuntimeError(f"{archived} assessment partitions have been archived; rebuilding would drop "
+                           f"their history from the trend rollups")
+
+    last_user_id = 0
+    rebuilt = 0
+    while True:
+        user_ids = [row[0] for row in db.session.query(User.id).filter(
+            User.id > last_user_id
+        ).order_by(User.id).limit(batch_size).all()]
+        if not user_ids:
+            break
+
+        trends = _fold_assessments(Assessment.user_id.between(user_ids[0], user_ids[-1]))
+
+        db.session.query(StressTrend).filter(
+            StressTrend.user_id.between(user_ids[0], user_ids[-1])
+        ).delete(synchronize_session=False)
+        db.session.add_all(trends.values())
+        db.session.commit()
+        db.session.expunge_all()
+
+        rebuilt += len(trends)
+        last_user_id = user_ids[-1]
+        logging.info(f"Rebuilt trends through user {last_user_id} ({rebuilt} users with assessments)")
+
+    return rebuilt